@@ -0,0 +1,120 @@
+"""
+Feeds every parser lines which are built to make regex searches backtrack (long words, runs of brackets, commas and
+dots, generics which never close, ...) along with random junk made from the same pieces, at the longest length which
+is still parsed (`JsdocsParser.maxDefinitionLength`). Fails if any single parse takes longer than the budget, or if
+reading a definition from one of the lines repeated ten times over (eg: a whole file of minified code) does.
+
+    python benchmarks/bench_adversarial.py [budget in ms, default 50]
+"""
+import random
+import sys
+import time
+
+import fake_sublime
+fake_sublime.install()
+
+from jsdocs_core import parsers
+
+PARSERS = (
+    parsers.JsdocsJavascript,
+    parsers.JsdocsPHP,
+    parsers.JsdocsCPP,
+    parsers.JsdocsCoffee,
+    parsers.JsdocsActionscript,
+    parsers.JsdocsObjC,
+    parsers.JsdocsJava,
+    parsers.JsdocsRust,
+    parsers.JsdocsTypescript,
+)
+
+# (prefix, repeated piece, suffix)
+PATTERNS = {
+    'word': ('', 'a', '('),
+    'words': ('', 'a ', '('),
+    'commas': ('int f(', 'a, ', ''),
+    'c++ args': ('int x(', 'a', ''),
+    'c++ call': ('int x(', ',a', ''),
+    'open brackets': ('', '(', 'a) =>'),
+    'close brackets': ('(', 'a)', ' =>'),
+    'nested brackets': ('(', ' (0) ', ' =>'),
+    'spaces': ('', ' ', 'x('),
+    'tabs': ('f', '\t', '('),
+    'dots': ('', 'a.', 'b c('),
+    'generics': ('public ', 'a<', 'b c('),
+    'arrays': ('int', '[]', ' a('),
+    'colons': ('foo(', 'a: ', ''),
+    'php vars': ('function f(', '$a->', ''),
+    'php types': ('function f(', '\\a', ''),
+    'pointers': ('int ', '*', ' f('),
+    'assignments': ('', 'a = ', 'function ('),
+    'objc': ('- (', 'a', ''),
+    'arrows': ('', 'x ->', ''),
+    'quotes': ('f(', '"', ''),
+}
+
+PIECES = ['a', 'b1', ' ', ', ', '(', ')', '<', '>', '.', '[]', ':', '=', '=>', '->', '{', '$', '*', '&', 'function ',
+          'public ', 'int ', '"', "'", '\\', '@']
+
+
+def adversarialLines(length):
+    for name in sorted(PATTERNS):
+        prefix, piece, suffix = PATTERNS[name]
+        count = (length - len(prefix) - len(suffix)) // len(piece)
+        yield name, prefix + piece * count + suffix
+
+
+def fuzzLines(length, count, seed=0):
+    rand = random.Random(seed)
+    for index in range(count):
+        line = ''
+        while len(line) < length:
+            line += rand.choice(PIECES) * rand.randint(1, 40)
+        yield 'fuzz %d' % index, line[:length]
+
+
+def timeParse(parser, line):
+    started = time.time()
+    parser.parse(line)
+    return (time.time() - started) * 1e3
+
+
+def timeRead(parser, line):
+    started = time.time()
+    parser.readDefinition(iter([line * 10, 'x']))
+    return (time.time() - started) * 1e3
+
+
+def main(budget=50.0, fuzzCount=50):
+    settings = parsers.JsdocsSettings(fake_sublime.Settings())
+    length = parsers.JsdocsParser.maxDefinitionLength
+    lines = list(adversarialLines(length)) + list(fuzzLines(length, fuzzCount))
+
+    print('%d adversarial and random lines of %d characters, budget %.0fms per parse' % (len(lines), length, budget))
+    print('%-20s %14s %-16s %15s %14s %-16s' % (
+        'parser', 'slowest (ms)', 'on', 'too long (ms)', 'read (ms)', 'on'
+    ))
+    failures = []
+    for parserClass in PARSERS:
+        parser = parserClass(settings)
+        slowest, slowestName = max((timeParse(parser, line), name) for name, line in lines)
+        # anything past the limit gets a plain block without being searched at all
+        tooLong = max(timeParse(parser, line + line) for name, line in lines)
+        slowestRead, slowestReadName = max((timeRead(parser, line), name) for name, line in lines)
+        print('%-20s %14.2f %-16s %15.3f %14.2f %-16s' % (
+            parserClass.__name__, slowest, slowestName, tooLong, slowestRead, slowestReadName
+        ))
+        if slowest > budget:
+            failures.append('%s took %.0fms on %s' % (parserClass.__name__, slowest, slowestName))
+        if slowestRead > budget:
+            failures.append('%s took %.0fms to read a definition from %s' % (
+                parserClass.__name__, slowestRead, slowestReadName
+            ))
+
+    if failures:
+        print('')
+        print('FAILED: ' + '; '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(*[float(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,218 @@
+"""
+Replays a corpus of real signatures in every language through `JsdocsCommand`, on the stand-in View, and reports the
+p50 and p99 latency of each phase of building a DocBlock:
+
+    getDefinition   finding the parser and reading the definition below the cursor (`initializeCursor`)
+    parse           matching the definition and reading its arguments (`parseFunction`, `parseVar`)
+    format          turning what was matched into tags (`formatFunction`, `formatVar`)
+    align           working out the column widths (`alignTags`)
+    fixTabStops     rendering the tags with numbered tab stops (`JsdocsTag.render`)
+    createSnippet   joining the lines into the snippet (`createSnippet`)
+
+Each phase fails if its p99 goes over the limit below, or over its p99 in a saved baseline by more than the tolerance:
+
+    python benchmarks/bench_latency.py [--save results.json] [--baseline results.json] [--tolerance 1.5]
+"""
+import argparse
+import json
+import sys
+import timeit
+
+import fake_sublime
+fake_sublime.install()
+
+import jsdocs
+
+clock = timeit.default_timer
+
+# the p99 of each phase (in microseconds) which counts as a regression on any machine
+LIMITS = {
+    'getDefinition': 2000,
+    'parse': 2000,
+    'format': 2000,
+    'align': 1000,
+    'fixTabStops': 1000,
+    'createSnippet': 1000,
+    'total': 5000,
+}
+
+PHASES = ('getDefinition', 'parse', 'format', 'align', 'fixTabStops', 'createSnippet', 'total')
+
+CORPUS = {
+    'source.js': [
+        'function debounce(func, wait, immediate) {',
+        'export function createStore(reducer, preloadedState, enhancer) {',
+        'Foo.prototype.bar = function (baz, callback) {',
+        'const fetchUser = async (id, { retries = 3, timeout = 1000 } = {}) => {',
+        'function* walk(node, visit, depth = 0) {',
+        'handleChange(event, index) {',
+        'var isReady = false;',
+        'function setItems(items, silent,\n                  options) {',
+    ],
+    'source.php': [
+        'public function __construct(ContainerInterface $container, array $options = []) {',
+        'public static function create(string $name, ?int $limit = null): self {',
+        'function array_pluck(array $array, $key, &$out = null) {',
+        'protected function isValid($value) {',
+        'private $connection;',
+    ],
+    'source.java': [
+        'public static <T> List<T> filter(List<T> items, Predicate<? super T> predicate) {',
+        'public void onBindViewHolder(ViewHolder holder, int position) {',
+        '@Override\npublic boolean equals(Object other) {',
+        'protected Map<String, Integer> countWords(String text) throws IOException {',
+    ],
+    'source.ts': [
+        'public async resolve(route: ActivatedRouteSnapshot, state: RouterStateSnapshot): Promise<User> {',
+        'function identity<T>(arg: T): T {',
+        'private handleError(error: HttpErrorResponse) {',
+        'static defaultProps: Props = {};',
+    ],
+    'source.c++': [
+        'int main(int argc, char** argv)',
+        'std::vector<int> Solver::solve(const Graph &graph, int source, int target[])',
+        'static void handle_signal(int signo)',
+        'virtual bool operator==(const Point &other) const',
+    ],
+    'source.objc': [
+        '- (UITableViewCell *)tableView:(UITableView *)tableView cellForRowAtIndexPath:(NSIndexPath *)indexPath {',
+        '+ (instancetype)sharedManager;',
+        '- (void)viewDidLoad {',
+    ],
+    'source.coffee': [
+        'fetchAll = (url, options) ->',
+        'render: (template, context) =>',
+        'isVisible = true',
+    ],
+    'source.actionscript.2': [
+        'public function addEventListener(type:String, listener:Function, useCapture:Boolean = false):void {',
+        'private function get isOpen():Boolean {',
+    ],
+    'source.rust': [
+        'pub fn from_str(s: &str) -> Result<Self, Self::Err> {',
+    ],
+}
+
+SETTINGS = {
+    'jsdocs_align_tags': 'deep',
+    'jsdocs_function_description': True,
+    'jsdocs_param_description': True,
+    'jsdocs_return_description': True,
+    'jsdocs_spacer_between_sections': False,
+    'jsdocs_indentation_spaces': 1,
+    'jsdocs_extra_tags': ['@since {{date}}'],
+    'tab_size': 4,
+}
+
+
+class PhaseTimer(object):
+    """
+    Wraps methods so that the time spent in each phase of a run is added up. Only the outermost call of a phase is
+    timed, so methods which call their parent class's version aren't counted twice.
+    """
+    def __init__(self):
+        self.totals = {}
+        self.depth = {}
+
+    def wrap(self, owner, name, phase):
+        original = owner.__dict__[name]
+
+        def timed(*args, **kwargs):
+            depth = self.depth.get(phase, 0)
+            self.depth[phase] = depth + 1
+            started = clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.depth[phase] = depth
+                if not depth:
+                    self.totals[phase] = self.totals.get(phase, 0) + clock() - started
+
+        setattr(owner, name, timed)
+
+    def wrapAll(self):
+        self.wrap(jsdocs.JsdocsCommand, 'initializeCursor', 'getDefinition')
+        self.wrap(jsdocs.JsdocsSnippetBuilder, 'alignTags', 'align')
+        self.wrap(jsdocs.JsdocsTag, 'render', 'fixTabStops')
+        self.wrap(jsdocs.JsdocsSnippetBuilder, 'createSnippet', 'createSnippet')
+        parserClasses = [jsdocs.JsdocsParser] + jsdocs.JsdocsParser.__subclasses__()
+        for parserClass in parserClasses:
+            for name, phase in (('parseFunction', 'parse'), ('parseVar', 'parse'),
+                                ('formatFunction', 'format'), ('formatVar', 'format')):
+                if name in parserClass.__dict__:
+                    self.wrap(parserClass, name, phase)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def runOnce(timer, scope, signature):
+    view = fake_sublime.View('/**\n' + signature, scope, SETTINGS)
+    view.sel().add(3)
+    timer.totals = {}
+    started = clock()
+    jsdocs.JsdocsCommand(view).run(None)
+    timer.totals['total'] = clock() - started
+    return timer.totals
+
+
+def main():
+    argParser = argparse.ArgumentParser(description='Time each phase of building a DocBlock.')
+    argParser.add_argument('--repeat', type=int, default=200, help='runs of each signature (default: 200)')
+    argParser.add_argument('--save', metavar='FILE', help='write the results to a JSON file, to use as a baseline')
+    argParser.add_argument('--baseline', metavar='FILE', help='fail if a p99 is worse than the one in this file')
+    argParser.add_argument('--tolerance', type=float, default=1.5,
+                           help='how many times slower than the baseline a phase may get (default: 1.5)')
+    args = argParser.parse_args()
+
+    timer = PhaseTimer()
+    timer.wrapAll()
+
+    samples = dict((phase, []) for phase in PHASES)
+    byLanguage = {}
+    for scope in sorted(CORPUS):
+        totals = byLanguage[scope] = []
+        for signature in CORPUS[scope]:
+            runOnce(timer, scope, signature)  # warm up the caches
+            for index in range(args.repeat):
+                result = runOnce(timer, scope, signature)
+                for phase in PHASES:
+                    samples[phase].append(result.get(phase, 0) * 1e6)
+                totals.append(result['total'] * 1e6)
+
+    results = dict(
+        (phase, {'p50': percentile(samples[phase], 0.5), 'p99': percentile(samples[phase], 0.99)})
+        for phase in PHASES
+    )
+    baseline = json.load(open(args.baseline)) if args.baseline else {}
+
+    print('%-16s %10s %10s %10s' % ('phase', 'p50 (us)', 'p99 (us)', 'limit (us)'))
+    failures = []
+    for phase in PHASES:
+        p99 = results[phase]['p99']
+        limit = LIMITS[phase]
+        if phase in baseline:
+            limit = min(limit, baseline[phase]['p99'] * args.tolerance)
+        print('%-16s %10.1f %10.1f %10.1f' % (phase, results[phase]['p50'], p99, limit))
+        if p99 > limit:
+            failures.append('%s p99 %.1fus > %.1fus' % (phase, p99, limit))
+
+    print('')
+    print('%-24s %10s %10s' % ('language', 'p50 (us)', 'p99 (us)'))
+    for scope in sorted(byLanguage):
+        print('%-24s %10.1f %10.1f' % (scope, percentile(byLanguage[scope], 0.5), percentile(byLanguage[scope], 0.99)))
+
+    if args.save:
+        with open(args.save, 'w') as resultsFile:
+            json.dump(results, resultsFile, indent=2, sort_keys=True)
+
+    if failures:
+        print('')
+        print('FAILED: ' + '; '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
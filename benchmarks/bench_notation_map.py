@@ -0,0 +1,70 @@
+"""
+Looks up names against a 200-rule Hungarian-style jsdocs_notation_map, comparing the rule-by-rule matching which
+`getMatchingNotations` used to do against the compiled `JsdocsNotationIndex`, both on first sight of each name and once
+the names have been seen before.
+
+    python benchmarks/bench_notation_map.py
+"""
+import re
+import timeit
+
+import fake_sublime
+fake_sublime.install()
+
+import jsdocs
+
+
+def referenceMatchingNotations(rules, name):
+    def checkMatch(rule):
+        if 'prefix' in rule:
+            regex = re.escape(rule['prefix'])
+            if re.match('.*[a-z]', rule['prefix']):
+                regex += '(?:[A-Z_]|$)'
+            return re.match(regex, name)
+        elif 'regex' in rule:
+            return re.search(rule['regex'], name)
+
+    return list(filter(checkMatch, rules))
+
+
+def makeRules():
+    rules = []
+    for i in range(150):
+        rules.append({'prefix': 'p%s' % chr(ord('a') + i % 26) * (1 + i // 26), 'type': 'Prefixed%d' % i})
+    for i in range(50):
+        rules.append({'regex': 'tbl%d_?[Rr]ow$' % i, 'type': 'TableRow%d' % i})
+    rules.append({'prefix': '_', 'tags': ['@private']})
+    return rules
+
+
+NAMES = ['paWidget', 'pbbCount', 'pzzzName', '_privateThing', 'tbl7Row', 'tbl42_row', 'isReady', 'options', 'cb']
+
+
+def main(number=500):
+    rules = makeRules()
+    names = NAMES * 4
+
+    for name in names:
+        assert list(jsdocs.JsdocsNotationIndex(rules).match(name)) == referenceMatchingNotations(rules, name), name
+
+    index = jsdocs.JsdocsNotationIndex(rules)
+
+    def firstSight():
+        index.cache.clear()
+        return [index.match(name) for name in names]
+
+    before = timeit.timeit(lambda: [referenceMatchingNotations(rules, name) for name in names], number=number)
+    build = timeit.timeit(lambda: jsdocs.JsdocsNotationIndex(rules), number=number // 10) / (number // 10)
+    first = timeit.timeit(firstSight, number=number)
+    warm = timeit.timeit(lambda: [index.match(name) for name in names], number=number)
+
+    perLookup = 1e6 / number / len(names)
+    print('%d rules, %d lookups per run' % (len(rules), len(names)))
+    print('%-28s %10.2f us' % ('rule by rule, per lookup', before * perLookup))
+    print('%-28s %10.2f us' % ('index, first sight', first * perLookup))
+    print('%-28s %10.2f us' % ('index, memoized', warm * perLookup))
+    print('%-28s %10.2f ms (once per settings revision)' % ('building the index', build * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Measures what it costs to get hold of a parser for each keypress, comparing a freshly constructed parser (what
+`getParser` used to do on every Enter and Tab) against the per-settings-revision parser registry. The "cold" column
+empties the `re` module's own pattern cache first, which is what happens once enough other patterns have been used.
+
+    python benchmarks/bench_parser_setup.py
+"""
+import re
+import timeit
+
+import fake_sublime
+fake_sublime.install()
+
+import jsdocs
+
+PARSERS = (
+    jsdocs.JsdocsJavascript,
+    jsdocs.JsdocsPHP,
+    jsdocs.JsdocsCPP,
+    jsdocs.JsdocsCoffee,
+    jsdocs.JsdocsActionscript,
+    jsdocs.JsdocsObjC,
+    jsdocs.JsdocsJava,
+    jsdocs.JsdocsRust,
+    jsdocs.JsdocsTypescript,
+)
+
+
+def main(number=2000):
+    settings = jsdocs.JsdocsSettings(fake_sublime.Settings())
+    print('%-20s %12s %12s %12s %9s' % ('parser', 'cold (us)', 'new (us)', 'cached (us)', 'speedup'))
+    for parserClass in PARSERS:
+        cold = timeit.timeit(lambda: (re.purge(), parserClass(settings)), number=number // 10) / (number // 10) * 1e6
+        before = timeit.timeit(lambda: parserClass(settings), number=number) / number * 1e6
+        after = timeit.timeit(lambda: jsdocs.getParserInstance(parserClass, settings), number=number) / number * 1e6
+        print('%-20s %12.2f %12.2f %12.2f %8.0fx' % (parserClass.__name__, cold, before, after, before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Splits synthetic 1000-argument signatures with `argumentSpans` / `splitByCommas`, and with the character-by-character
+implementation they replaced, which is kept here as a reference.
+
+    python benchmarks/bench_split_args.py
+"""
+import timeit
+
+import fake_sublime
+fake_sublime.install()
+
+import jsdocs
+
+
+def referenceSplitByCommas(str):
+    out = []
+
+    if not str:
+        return out
+
+    current = ''
+    openQuotes = '"\'<({'
+    closeQuotes = '"\'>)}'
+
+    matchingQuote = ''
+    insideQuotes = False
+    nextIsLiteral = False
+
+    for char in str:
+        if nextIsLiteral:
+            current += char
+            nextIsLiteral = False
+        elif insideQuotes:
+            if char == '\\':
+                nextIsLiteral = True
+            else:
+                current += char
+                if char == matchingQuote:
+                    insideQuotes = False
+        else:
+            if char == ',':
+                out.append(current.strip())
+                current = ''
+            else:
+                current += char
+                quoteIndex = openQuotes.find(char)
+                if quoteIndex > -1:
+                    matchingQuote = closeQuotes[quoteIndex]
+                    insideQuotes = True
+
+    out.append(current.strip())
+    return out
+
+
+SIGNATURES = {
+    'plain': ', '.join('argument%d' % i for i in range(1000)),
+    'defaults': ', '.join('arg%d = "a, b, \\"c\\""' % i for i in range(1000)),
+    'generics': ', '.join('Map<String, List<Integer>> arg%d' % i for i in range(1000)),
+    'objects': ', '.join('arg%d = {a: {b: 1, c: [1, 2]}, d: fn(x, y)}' % i for i in range(1000)),
+}
+
+
+def main(number=20):
+    print('%-10s %8s %12s %12s %12s %9s' % ('signature', 'chars', 'args found', 'before (ms)', 'after (ms)', 'speedup'))
+    for name in sorted(SIGNATURES):
+        signature = SIGNATURES[name]
+        before = timeit.timeit(lambda: referenceSplitByCommas(signature), number=number) / number * 1e3
+        after = timeit.timeit(lambda: jsdocs.argumentSpans(signature), number=number) / number * 1e3
+        found = len(jsdocs.argumentSpans(signature))
+        assert found == 1000, '%s: found %d arguments' % (name, found)
+        if name == 'plain':
+            # the old implementation mishandles nesting and drops escapes, but agrees on flat signatures
+            assert referenceSplitByCommas(signature) == jsdocs.splitByCommas(signature), name
+        print('%-10s %8d %12d %12.2f %12.2f %8.1fx' % (
+            name, len(signature), found, before, after, before / after
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Measures the cost of starting DocBlockr, each in a fresh interpreter so that nothing is already imported or built:
+
+    import          importing jsdocs.py
+    plugin_loaded   the time for `plugin_loaded` to return (its warm-up is queued to run in the background)
+    warmUp          the background warm-up, building the parsers for the views open in the window
+    firstEnter      the first DocBlock in a view, with the warm-up not yet run (cold) and after it has run (warm)
+
+The median of several runs is reported for each, and the run fails if one goes over its budget:
+
+    python benchmarks/bench_startup.py [--runs 15]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import timeit
+
+clock = timeit.default_timer
+
+# the median (in milliseconds) which counts as too slow on any machine
+BUDGETS = {
+    'import': 100.0,
+    'plugin_loaded': 2.0,
+    'warmUp': 50.0,
+    'firstEnter (cold)': 20.0,
+    'firstEnter (warm)': 5.0,
+}
+
+MEASURES = ('import', 'plugin_loaded', 'warmUp', 'firstEnter (cold)', 'firstEnter (warm)')
+
+# a view open in the window for each language, with the definition to document in it
+VIEWS = (
+    ('source.js', 'function debounce(func, wait, immediate) {'),
+    ('source.php', 'public function __construct(ContainerInterface $container, array $options = []) {'),
+    ('source.java', 'protected Map<String, Integer> countWords(String text) throws IOException {'),
+    ('source.ts', 'public async resolve(route: ActivatedRouteSnapshot, state: RouterStateSnapshot): Promise<User> {'),
+    ('source.c++', 'std::vector<int> Solver::solve(const Graph &graph, int source, int target[])'),
+)
+
+
+def child(warm):
+    """
+    Time starting up in this interpreter, and print the results (in milliseconds) as JSON
+    """
+    import fake_sublime
+    fake_sublime.install()
+    import sublime
+
+    queued = []
+    sublime.set_timeout_async = lambda callback, delay=0: queued.append(callback)
+
+    results = {}
+    started = clock()
+    import jsdocs
+    results['import'] = clock() - started
+
+    views = []
+    for scope, definition in VIEWS:
+        view = fake_sublime.View('/**\n' + definition, scope)
+        view.sel().add(3)
+        views.append(view)
+    fake_sublime.activeWindow.viewList = views
+
+    started = clock()
+    jsdocs.plugin_loaded()
+    results['plugin_loaded'] = clock() - started
+
+    if warm:
+        started = clock()
+        for callback in queued:
+            callback()
+        results['warmUp'] = clock() - started
+
+    # the slowest of the first DocBlocks, since any of the views could be the one used first
+    firstEnter = 0
+    for view in views:
+        started = clock()
+        jsdocs.JsdocsCommand(view).run(None)
+        firstEnter = max(firstEnter, clock() - started)
+    results['firstEnter (warm)' if warm else 'firstEnter (cold)'] = firstEnter
+
+    print(json.dumps(dict((name, seconds * 1e3) for name, seconds in results.items())))
+
+
+def median(samples):
+    ordered = sorted(samples)
+    return ordered[len(ordered) // 2]
+
+
+def main():
+    argParser = argparse.ArgumentParser(description='Time starting up DocBlockr.')
+    argParser.add_argument('--runs', type=int, default=15, help='fresh interpreters for each measure (default: 15)')
+    argParser.add_argument('--child', choices=('cold', 'warm'), help=argparse.SUPPRESS)
+    args = argParser.parse_args()
+
+    if args.child:
+        return child(args.child == 'warm')
+
+    samples = dict((name, []) for name in MEASURES)
+    for index in range(args.runs):
+        for mode in ('cold', 'warm'):
+            output = subprocess.check_output(
+                [sys.executable, os.path.abspath(__file__), '--child', mode],
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+            for name, ms in json.loads(output.decode('utf-8')).items():
+                samples[name].append(ms)
+
+    print('%-20s %10s %10s' % ('measure', 'p50 (ms)', 'budget (ms)'))
+    failures = []
+    for name in MEASURES:
+        result = median(samples[name])
+        print('%-20s %10.2f %10.2f' % (name, result, BUDGETS[name]))
+        if result > BUDGETS[name]:
+            failures.append('%s %.2fms > %.2fms' % (name, result, BUDGETS[name]))
+
+    if failures:
+        print('')
+        print('FAILED: ' + '; '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Minimal stand-ins for the `sublime` and `sublime_plugin` modules, so that jsdocs.py can be imported and timed from a
+plain Python interpreter. Only the parts of the API which DocBlockr touches are provided.
+"""
+import os
+import sys
+import types
+
+
+class Region(object):
+    def __init__(self, a, b=None):
+        self.a = a
+        self.b = a if b is None else b
+
+    def begin(self):
+        return min(self.a, self.b)
+
+    def end(self):
+        return max(self.a, self.b)
+
+    def size(self):
+        return self.end() - self.begin()
+
+    def empty(self):
+        return self.a == self.b
+
+
+class Settings(object):
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.callbacks = {}
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        self.values[key] = value
+        for callback in list(self.callbacks.values()):
+            callback()
+
+    def add_on_change(self, tag, callback):
+        self.callbacks[tag] = callback
+
+    def clear_on_change(self, tag):
+        self.callbacks.pop(tag, None)
+
+
+class Selection(list):
+    def clear(self):
+        del self[:]
+
+    def add(self, region):
+        self.append(region if isinstance(region, Region) else Region(region))
+        self.sort(key=Region.begin)
+
+
+class View(object):
+    """
+    A buffer holding `text`, all of it in the one `scope` (eg: "source.js"). Snippets are inserted as they are,
+    without expanding their fields.
+    """
+    lastId = 0
+
+    def __init__(self, text='', scope='source.js', settings=None):
+        View.lastId += 1
+        self.viewId = View.lastId
+        self.text = text
+        self.scope = scope + ' '
+        self.viewSettings = Settings(settings)
+        self.selection = Selection()
+        self.changeCount = 0
+
+    def id(self):
+        return self.viewId
+
+    def settings(self):
+        return self.viewSettings
+
+    def sel(self):
+        return self.selection
+
+    def size(self):
+        return len(self.text)
+
+    def change_count(self):
+        return self.changeCount
+
+    def scope_name(self, point):
+        return self.scope
+
+    def substr(self, region):
+        if isinstance(region, Region):
+            return self.text[region.begin():region.end()]
+        return self.text[region:region + 1]
+
+    def line(self, region):
+        if isinstance(region, Region):
+            begin, end = region.begin(), region.end()
+        else:
+            begin = end = region
+        end = self.text.find('\n', end)
+        return Region(self.text.rfind('\n', 0, begin) + 1, len(self.text) if end < 0 else end)
+
+    def rowcol(self, point):
+        return self.text.count('\n', 0, point), point - self.text.rfind('\n', 0, point) - 1
+
+    def find_by_selector(self, selector):
+        return []
+
+    def replace(self, edit, region, text):
+        self.text = self.text[:region.begin()] + text + self.text[region.end():]
+        self.changeCount += 1
+
+    def insert(self, edit, point, text):
+        self.replace(edit, Region(point), text)
+        return len(text)
+
+    def erase(self, edit, region):
+        self.replace(edit, region, '')
+
+    def run_command(self, name, args=None):
+        if name == 'insert_snippet':
+            for region in reversed(self.selection):
+                self.replace(None, region, args['contents'])
+
+
+class Window(object):
+    def __init__(self, views=()):
+        self.viewList = list(views)
+
+    def views(self):
+        return list(self.viewList)
+
+    def active_view(self):
+        return self.viewList[0] if self.viewList else None
+
+
+# what `sublime.active_window()` returns
+activeWindow = Window()
+
+
+class _Command(object):
+    def __init__(self, target=None):
+        self.view = self.window = target
+
+
+def install():
+    """
+    Register the stand-in modules in sys.modules and put the package root on the path, so `import jsdocs` works.
+    """
+    if 'sublime' not in sys.modules:
+        sublime = types.ModuleType('sublime')
+        sublime.Region = Region
+        sublime.Settings = Settings
+        sublime.View = View
+        sublime.Window = Window
+        sublime.active_window = lambda: activeWindow
+        sublime.version = lambda: '3000'
+        sublime.status_message = lambda message: None
+        sublime.set_timeout = lambda callback, delay=0: callback()
+        sublime.set_timeout_async = lambda callback, delay=0: callback()
+        sys.modules['sublime'] = sublime
+
+        sublime_plugin = types.ModuleType('sublime_plugin')
+        sublime_plugin.TextCommand = type('TextCommand', (_Command, ), {})
+        sublime_plugin.WindowCommand = type('WindowCommand', (_Command, ), {})
+        sublime_plugin.EventListener = type('EventListener', (object, ), {})
+        sys.modules['sublime_plugin'] = sublime_plugin
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
@@ -9,1283 +9,486 @@ https://github.com/spadgos/sublime-jsdocs
 import sublime
 import sublime_plugin
 import re
-import datetime
 import time
-import imp
-from functools import reduce
+import threading
+from bisect import bisect_left, bisect_right
 
-def read_line(view, point):
-    if (point >= view.size()):
-        return
-
-    next_line = view.line(point)
-    return view.substr(next_line)
-
-
-def write(view, str):
-    view.run_command(
-        'insert_snippet', {
-            'contents': str
-        }
-    )
+try:
+    from .jsdocs_core.parsers import *
+    from .jsdocs_core.instrumentation import recorder, nullInvocation
+    from .jsdocs_core.wrapping import JsdocsWrapper
+except (ImportError, SystemError, ValueError):
+    # Sublime Text 2 loads plugins as top level modules
+    from jsdocs_core.parsers import *
+    from jsdocs_core.instrumentation import recorder, nullInvocation
+    from jsdocs_core.wrapping import JsdocsWrapper
 
 
-def counter():
-    count = 0
-    while True:
-        count += 1
-        yield(count)
-
-
-def escape(str):
-    return str.replace('$', '\$').replace('{', '\{').replace('}', '\}')
-
-
-def is_numeric(val):
-    try:
-        float(val)
-        return True
-    except ValueError:
-        return False
-
-
-def getParser(view):
-    scope = view.scope_name(view.sel()[0].end())
-    res = re.search('\\bsource\\.([a-z+\-]+)', scope)
-    sourceLang = res.group(1) if res else 'js'
-    viewSettings = view.settings()
-
-    if sourceLang == "php":
-        return JsdocsPHP(viewSettings)
-    elif sourceLang == "coffee":
-        return JsdocsCoffee(viewSettings)
-    elif sourceLang == "actionscript" or sourceLang == 'haxe':
-        return JsdocsActionscript(viewSettings)
-    elif sourceLang == "c++" or sourceLang == 'c' or sourceLang == 'cuda-c++':
-        return JsdocsCPP(viewSettings)
-    elif sourceLang == 'objc' or sourceLang == 'objc++':
-        return JsdocsObjC(viewSettings)
-    elif sourceLang == 'java' or sourceLang == 'groovy' or sourceLang == 'apex':
-        return JsdocsJava(viewSettings)
-    elif sourceLang == 'rust':
-        return JsdocsRust(viewSettings)
-    elif sourceLang == 'ts':
-        return JsdocsTypescript(viewSettings)
-    return JsdocsJavascript(viewSettings)
-
-
-def splitByCommas(str):
+def read_lines(view, point, windowSize=1024):
     """
-    Split a string by unenclosed commas: that is, commas which are not inside of quotes or brackets.
-    splitByCommas('foo, bar(baz, quux), fwip = "hey, hi"')
-     ==> ['foo', 'bar(baz, quux)', 'fwip = "hey, hi"']
+    Generate the lines of the view, starting with the line which begins at `point`. Rather than asking the view for
+    each line separately, the text is read in windows with a single `substr` call each, and a further (larger) window
+    is only read once the caller has consumed every line of the text read so far.
     """
-    out = []
-
-    if not str:
-        return out
-
-    # the current token
-    current = ''
-
-    # characters which open a section inside which commas are not separators between different arguments
-    openQuotes = '"\'<({'
-    # characters which close the section. The position of the character here should match the opening
-    # indicator in `openQuotes`
-    closeQuotes = '"\'>)}'
-
-    matchingQuote = ''
-    insideQuotes = False
-    nextIsLiteral = False
-
-    for char in str:
-        if nextIsLiteral:  # previous char was a \
-            current += char
-            nextIsLiteral = False
-        elif insideQuotes:
-            if char == '\\':
-                nextIsLiteral = True
-            else:
-                current += char
-                if char == matchingQuote:
-                    insideQuotes = False
+    size = view.size()
+    text = ''
+    textEnd = point
+    start = 0
+    while True:
+        newline = text.find('\n', start)
+        if newline > -1:
+            yield text[start:newline]
+            start = newline + 1
+        elif textEnd < size:
+            windowEnd = min(size, textEnd + windowSize)
+            text = text[start:] + view.substr(sublime.Region(textEnd, windowEnd))
+            textEnd = windowEnd
+            start = 0
+            windowSize *= 2
         else:
-            if char == ',':
-                out.append(current.strip())
-                current = ''
-            else:
-                current += char
-                quoteIndex = openQuotes.find(char)
-                if quoteIndex > -1:
-                    matchingQuote = closeQuotes[quoteIndex]
-                    insideQuotes = True
+            if start < len(text):
+                yield text[start:]
+            return
 
-    out.append(current.strip())
-    return out
 
+# view id => JsdocsSettings
+_settingsCache = {}
 
-def flatten(theList):
-    """
-    Flatten a shallow list. Only works when all items are lists.
-    [[(1,1)], [(2,2), (3, 3)]] --> [(1,1), (2,2), (3,3)]
-    """
-    return [item for sublist in theList for item in sublist]
 
-def getDocBlockRegion(view, point):
+def getSettings(view):
     """
-    Given a starting point inside a DocBlock, return a Region which encompasses the entire block.
-    This is similar to `run_command('expand_selection', { to: 'scope' })`, however it is resilient to bugs which occur
-    due to language files adding scopes inside the DocBlock (eg: to highlight tags)
+    Return the JsdocsSettings snapshot for a view. The snapshot is cached until any of the view's settings change.
     """
-    start = end = point
-    while start > 0 and view.scope_name(start - 1).find('comment.block') > -1:
-        start = start - 1
+    viewId = view.id()
+    snapshot = _settingsCache.get(viewId)
+    if snapshot is None:
+        viewSettings = view.settings()
+        snapshot = _settingsCache[viewId] = JsdocsSettings(viewSettings)
 
-    while end < view.size() and view.scope_name(end).find('comment.block') > -1:
-        end = end + 1
+        def invalidate():
+            _settingsCache.pop(viewId, None)
+            # the syntax is one of the settings, and changing it changes which regions are comments
+            _viewParserClassCache.pop(viewId, None)
+            _commentBlockCache.pop(viewId, None)
 
-    return sublime.Region(start, end)
+        viewSettings.clear_on_change('jsdocs')
+        viewSettings.add_on_change('jsdocs', invalidate)
+    return snapshot
 
-class JsdocsCommand(sublime_plugin.TextCommand):
-
-    def run(self, edit, inline=False):
 
-        self.initialize(self.view, inline)
-
-        if self.parser.isExistingComment(self.line):
-            write(self.view, "\n *" + self.indentSpaces)
-            return
-
-        # erase characters in the view (will be added to the output later)
-        self.view.erase(edit, self.trailingRgn)
-
-        # match against a function declaration.
-        out = self.parser.parse(self.line)
-
-        snippet = self.generateSnippet(out, inline)
-
-        write(self.view, snippet)
+class JsdocsCountingSettings(object):
+    """
+    Passes everything through to a view's settings, counting the calls to `get`
+    """
+    def __init__(self, settings, invocation):
+        self.viewSettings = settings
+        self.invocation = invocation
 
-    def initialize(self, v, inline=False):
-        point = v.sel()[0].end()
+    def __getattr__(self, name):
+        return getattr(self.viewSettings, name)
 
-        self.settings = v.settings()
+    def get(self, *args):
+        self.invocation.count('settings.get')
+        return self.viewSettings.get(*args)
 
-        # trailing characters are put inside the body of the comment
-        self.trailingRgn = sublime.Region(point, v.line(point).end())
-        self.trailingString = v.substr(self.trailingRgn).strip()
-        # drop trailing '*/'
-        self.trailingString = escape(re.sub('\\s*\\*\\/\\s*$', '', self.trailingString))
 
-        self.indentSpaces = " " * max(0, self.settings.get("jsdocs_indentation_spaces", 1))
-        self.prefix = "*"
+class JsdocsCountingView(object):
+    """
+    Passes everything through to a view, counting the calls to `scope_name`, `substr` and `settings().get`, each of
+    which is a round trip to the editor
+    """
+    def __init__(self, view, invocation):
+        self.view = view
+        self.invocation = invocation
 
-        settingsAlignTags = self.settings.get("jsdocs_align_tags", 'deep')
-        self.deepAlignTags = settingsAlignTags == 'deep'
-        self.shallowAlignTags = settingsAlignTags in ('shallow', True)
+    def __getattr__(self, name):
+        return getattr(self.view, name)
 
-        self.parser = parser = getParser(v)
-        parser.inline = inline
+    def scope_name(self, point):
+        self.invocation.count('scope_name')
+        return self.view.scope_name(point)
 
-        # use trailing string as a description of the function
-        if self.trailingString:
-            parser.setNameOverride(self.trailingString)
+    def substr(self, x):
+        self.invocation.count('substr')
+        return self.view.substr(x)
 
-        # read the next line
-        self.line = parser.getDefinition(v, v.line(point).end() + 1)
+    def settings(self):
+        return JsdocsCountingSettings(self.view.settings(), self.invocation)
 
-    def generateSnippet(self, out, inline=False):
-        # substitute any variables in the tags
 
-        if out:
-            out = self.substituteVariables(out)
+def instrument(view, name, settings):
+    """
+    In development mode, start recording a run of a command, returning (the view to use, the invocation) so that the
+    API calls through the view are counted. Otherwise the view is returned as it is, with an invocation which does
+    nothing.
+    """
+    if not settings.get('jsdocs_development_mode'):
+        return view, nullInvocation
+    invocation = recorder.begin(name)
+    return JsdocsCountingView(view, invocation), invocation
 
-        # align the tags
-        if out and (self.shallowAlignTags or self.deepAlignTags) and not inline:
-            out = self.alignTags(out)
 
-        # fix all the tab stops so they're consecutive
-        if out:
-            out = self.fixTabStops(out)
+def write(view, str):
+    view.run_command(
+        'insert_snippet', {
+            'contents': str
+        }
+    )
 
-        if inline:
-            if out:
-                return " " + out[0] + " */"
-            else:
-                return " $0 */"
-        else:
-            return self.createSnippet(out) + ('\n' if self.settings.get('jsdocs_newline_after_block') else '')
-
-    def alignTags(self, out):
-        def outputWidth(str):
-            # get the length of a string, after it is output as a snippet,
-            # "${1:foo}" --> 3
-            return len(re.sub("[$][{]\\d+:([^}]+)[}]", "\\1", str).replace('\$', '$'))
-
-        # count how many columns we have
-        maxCols = 0
-        # this is a 2d list of the widths per column per line
-        widths = []
-
-        # Grab the return tag if required.
-        if self.settings.get('jsdocs_per_section_indent'):
-            returnTag = self.settings.get('jsdocs_return_tag') or '@return'
-        else:
-            returnTag = False
 
-        for line in out:
-            if line.startswith('@'):
-                # Ignore the return tag if we're doing per-section indenting.
-                if returnTag and line.startswith(returnTag):
-                    continue
-                # ignore all the words after `@author`
-                columns = line.split(" ") if not line.startswith('@author') else ['@author']
-                widths.append(list(map(outputWidth, columns)))
-                maxCols = max(maxCols, len(widths[-1]))
-
-        #  initialise a list to 0
-        maxWidths = [0] * maxCols
-
-        if (self.shallowAlignTags):
-            maxCols = 1
-
-        for i in range(0, maxCols):
-            for width in widths:
-                if (i < len(width)):
-                    maxWidths[i] = max(maxWidths[i], width[i])
-
-        # Convert to a dict so we can use .get()
-        maxWidths = dict(enumerate(maxWidths))
-
-        # Minimum spaces between line columns
-        minColSpaces = self.settings.get('jsdocs_min_spaces_between_columns', 1)
-
-        for index, line in enumerate(out):
-            # format the spacing of columns, but ignore the author tag. (See #197)
-            if line.startswith('@') and not line.startswith('@author'):
-                newOut = []
-                for partIndex, part in enumerate(line.split(" ")):
-                    newOut.append(part)
-                    newOut.append(" " * minColSpaces + (" " * (maxWidths.get(partIndex, 0) - outputWidth(part))))
-                out[index] = "".join(newOut).strip()
-
-        return out
-
-    def substituteVariables(self, out):
-        def getVar(match):
-            varName = match.group(1)
-            if varName == 'datetime':
-                date = datetime.datetime.now().replace(microsecond=0)
-                offset = time.timezone / -3600.0
-                return "%s%s%02d%02d" % (
-                    date.isoformat(),
-                    '+' if offset >= 0 else "-",
-                    abs(offset),
-                    (offset % 1) * 60
-                )
-            elif varName == 'date':
-                return datetime.date.today().isoformat()
-            else:
-                return match.group(0)
+# view id => the parser class for every point in the view, or None if the view's syntax can embed other languages
+# (eg: PHP or Javascript in HTML), so the scope has to be looked up at each point. Dropped when the settings change,
+# since the syntax is one of them
+_viewParserClassCache = {}
 
-        def subLine(line):
-            return re.sub(r'\{\{([^}]+)\}\}', getVar, line)
 
-        return list(map(subLine, out))
+def getViewParserClass(view):
+    """
+    Return the parser class for a view whose syntax is a single programming language, or None for any other view. The
+    answer is cached, so this only asks the view for a scope once for each syntax it is given.
+    """
+    viewId = view.id()
+    if viewId not in _viewParserClassCache:
+        getSettings(view)  # makes sure that the cache is dropped when the syntax changes
+        baseScope = view.scope_name(0).split(' ')[0]
+        _viewParserClassCache[viewId] = getParserClass(baseScope) if baseScope.startswith('source.') else None
+    return _viewParserClassCache[viewId]
 
-    def fixTabStops(self, out):
-        tabIndex = counter()
 
-        def swapTabs(m):
-            return "%s%d%s" % (m.group(1), next(tabIndex), m.group(2))
-
-        for index, outputLine in enumerate(out):
-            out[index] = re.sub("(\\$\\{)\\d+(:[^}]+\\})", swapTabs, outputLine)
-
-        return out
-
-    def createSnippet(self, out):
-        snippet = ""
-        closer = self.parser.settings['commentCloser']
-        if out:
-            if self.settings.get('jsdocs_spacer_between_sections') == True:
-                lastTag = None
-                for idx, line in enumerate(out):
-                    res = re.match("^\\s*@([a-zA-Z]+)", line)
-                    if res and (lastTag != res.group(1)):
-                        if self.settings.get('jsdocs_function_description') == False:
-                            if lastTag != None:
-                                out.insert(idx, "")
-                        else:
-                            out.insert(idx, "")
-                        lastTag = res.group(1)
-            elif self.settings.get('jsdocs_spacer_between_sections') == 'after_description' and self.settings.get('jsdocs_function_description'):
-                lastLineIsTag = False
-                for idx, line in enumerate(out):
-                    res = re.match("^\\s*@([a-zA-Z]+)", line)
-                    if res:
-                        if not lastLineIsTag:
-                            out.insert(idx, "")
-                        lastLineIsTag = True
-            for line in out:
-                snippet += "\n " + self.prefix + (self.indentSpaces + line if line else "")
-        else:
-            snippet += "\n " + self.prefix + self.indentSpaces + "${0:" + self.trailingString + '}'
+def getParser(view, point=None):
+    settings = getSettings(view)
+    parserClass = getViewParserClass(view)
+    if parserClass is None:
+        parserClass = getParserClass(view.scope_name(view.sel()[0].end() if point is None else point))
+    return getParserInstance(parserClass, settings)
 
-        snippet += "\n" + closer
-        return snippet
 
+def getSourceParser(view, point, settings):
+    """
+    Return the parser for the language at a point, or None if the point isn't in source code
+    """
+    parserClass = getViewParserClass(view)
+    if parserClass is not None:
+        return getParserInstance(parserClass, settings)
+    scope = view.scope_name(point)
+    if 'source.' in scope:
+        return getParserInstance(getParserClass(scope), settings)
+    return None
 
-class JsdocsParser(object):
 
-    def __init__(self, viewSettings):
-        self.viewSettings = viewSettings
-        self.setupSettings()
-        self.nameOverride = None
+def warmUp(views):
+    """
+    Build the parsers for the languages of the given views ahead of time, so that the first DocBlock in each of them
+    doesn't wait for the parser's patterns to be compiled. Views which mix languages are left until they're used.
+    """
+    for view in views:
+        if view.settings().get('is_widget'):
+            continue
+        parserClass = getViewParserClass(view)
+        if parserClass is not None:
+            getParserInstance(parserClass, getSettings(view))
 
-    def isExistingComment(self, line):
-        return re.search('^\\s*\\*', line)
 
-    def setNameOverride(self, name):
-        """ overrides the description of the function - used instead of parsed description """
-        self.nameOverride = name
+def plugin_loaded():
+    """
+    Called by Sublime Text 3 once the API is ready: the parsers for the files already open in the window are built in
+    the background. Sublime Text 2 doesn't call this, and builds each parser on first use.
+    """
+    window = sublime.active_window()
+    if window is not None and hasattr(sublime, 'set_timeout_async'):
+        views = window.views()
+        sublime.set_timeout_async(lambda: warmUp(views), 0)
 
-    def getNameOverride(self):
-        return self.nameOverride
 
-    def parse(self, line):
-        if self.viewSettings.get('jsdocs_simple_mode'):
-            return None
+# how many milliseconds after the last change a view's definition index is brought up to date
+indexUpdateDelay = 300
 
-        try:
-            out = self.parseFunction(line)  # (name, args, retval, options)
-            if (out):
-                return self.formatFunction(*out)
-
-            out = self.parseVar(line)
-            if out:
-                return self.formatVar(*out)
-        except:
-            # TODO show exception if dev\debug mode
-            return None
+# view id => (settings snapshot, JsdocsDefinitionIndex). Indexes are updated from the listener's thread, so they are
+# only used while holding the lock
+_definitionIndexCache = {}
+_definitionIndexLock = threading.Lock()
 
-        return None
 
-    def formatVar(self, name, val, valType=None):
-        out = []
-        if not valType:
-            if not val or val == '':  # quick short circuit
-                valType = "[type]"
-            else:
-                valType = self.guessTypeFromValue(val) or self.guessTypeFromName(name) or "[type]"
-        if self.inline:
-            out.append("@%s %s${1:%s}%s ${1:[description]}" % (
-                self.settings['typeTag'],
-                "{" if self.settings['curlyTypes'] else "",
-                valType,
-                "}" if self.settings['curlyTypes'] else ""
-            ))
-        else:
-            out.append("${1:[%s description]}" % (escape(name)))
-            out.append("@%s %s${1:%s}%s" % (
-                self.settings['typeTag'],
-                "{" if self.settings['curlyTypes'] else "",
-                valType,
-                "}" if self.settings['curlyTypes'] else ""
-            ))
-
-        return out
-
-    def getTypeInfo(self, argType, argName):
-        typeInfo = ''
-        if self.settings['typeInfo']:
-            typeInfo = '%s${1:%s}%s ' % (
-                "{" if self.settings['curlyTypes'] else "",
-                escape(argType or self.guessTypeFromName(argName) or "[type]"),
-                "}" if self.settings['curlyTypes'] else "",
+def getDefinitionIndex(view):
+    """
+    Return the definition index for a view, brought up to date with its text. Only the lines around whatever has
+    changed since the last update are parsed again. The index is rebuilt from scratch when the view's settings change.
+    """
+    with _definitionIndexLock:
+        settings = getSettings(view)
+        cached = _definitionIndexCache.get(view.id())
+        if cached is None or cached[0] is not settings:
+            cached = _definitionIndexCache[view.id()] = (settings, JsdocsDefinitionIndex())
+        index = cached[1]
+        changeCount = view.change_count()
+        if index.version != changeCount:
+            index.update(
+                view.substr(sublime.Region(0, view.size())),
+                lambda point: getSourceParser(view, point, settings),
+                changeCount
             )
+        return index
 
-        return typeInfo
-
-    def formatFunction(self, name, args, retval, options={}):
-        out = []
-        if 'as_setter' in options:
-            out.append('@private')
-            return out
-
-        extraTagAfter = self.viewSettings.get("jsdocs_extra_tags_go_after") or False
-
-        description = self.getNameOverride() or ('[%s%sdescription]' % (escape(name), ' ' if name else ''))
-        if self.viewSettings.get('jsdocs_function_description'):
-            out.append("${1:%s}" % description)
-
-        if (self.viewSettings.get("jsdocs_autoadd_method_tag") is True):
-            out.append("@%s %s" % (
-                "method",
-                escape(name)
-            ))
-
-        if not extraTagAfter:
-            self.addExtraTags(out)
-
-        # if there are arguments, add a @param for each
-        if (args):
-            # remove comments inside the argument list.
-            args = re.sub(r'/\*.*?\*/', '', args)
-            for argType, argName in self.parseArgs(args):
-                typeInfo = self.getTypeInfo(argType, argName)
-
-                format_str = "@param %s%s"
-                if (self.viewSettings.get('jsdocs_param_description')):
-                    format_str += " ${1:[description]}"
-
-                out.append(format_str % (
-                    typeInfo,
-                    escape(argName) if self.viewSettings.get('jsdocs_param_name') else ''
-                ))
-
-        # return value type might be already available in some languages but
-        # even then ask language specific parser if it wants it listed
-        retType = self.getFunctionReturnType(name, retval)
-        if retType is not None:
-            typeInfo = ''
-            if self.settings['typeInfo']:
-                typeInfo = ' %s${1:%s}%s' % (
-                    "{" if self.settings['curlyTypes'] else "",
-                    retType or "[type]",
-                    "}" if self.settings['curlyTypes'] else ""
-                )
-            format_args = [
-                self.viewSettings.get('jsdocs_return_tag') or '@return',
-                typeInfo
-            ]
-
-            if (self.viewSettings.get('jsdocs_return_description')):
-                format_str = "%s%s %s${1:[description]}"
-                third_arg = ""
-
-                # the extra space here is so that the description will align with the param description
-                if args and self.viewSettings.get('jsdocs_align_tags') == 'deep':
-                    if not self.viewSettings.get('jsdocs_per_section_indent'):
-                        third_arg = " "
-
-                format_args.append(third_arg)
-            else:
-                format_str = "%s%s"
-
-            out.append(format_str % tuple(format_args))
-
-        for notation in self.getMatchingNotations(name):
-            if 'tags' in notation:
-                out.extend(notation['tags'])
-
-        if extraTagAfter:
-            self.addExtraTags(out)
-
-        return out
-
-    def getFunctionReturnType(self, name, retval):
-        """ returns None for no return type. False meaning unknown, or a string """
-
-        if re.match("[A-Z]", name):
-            # no return, but should add a class
-            return None
-
-        if re.match('[$_]?(?:set|add)($|[A-Z_])', name):
-            # setter/mutator, no return
-            return None
-
-        if re.match('[$_]?(?:is|has)($|[A-Z_])', name):  # functions starting with 'is' or 'has'
-            return self.settings['bool']
-
-        return self.guessTypeFromName(name) or False
-
-    def parseArgs(self, args):
-        """
-        a list of tuples, the first being the best guess at the type, the second being the name
-        """
-        blocks = splitByCommas(args)
-        out = []
-        for arg in blocks:
-            out.append(self.getArgInfo(arg))
-
-        return flatten(out)
-
-    def getArgInfo(self, arg):
-        """
-        Return a list of tuples, one for each argument derived from the arg param.
-        """
-        return [(self.getArgType(arg), self.getArgName(arg))]
-
-    def getArgType(self, arg):
-        return None
-
-    def getArgName(self, arg):
-        return arg
-
-    def addExtraTags(self, out):
-        extraTags = self.viewSettings.get('jsdocs_extra_tags', [])
-        if (len(extraTags) > 0):
-            out.extend(extraTags)
-
-    def guessTypeFromName(self, name):
-        matches = self.getMatchingNotations(name)
-        if len(matches):
-            rule = matches[0]
-            if ('type' in rule):
-                return self.settings[rule['type']] if rule['type'] in self.settings else rule['type']
-
-        if (re.match("(?:is|has)[A-Z_]", name)):
-            return self.settings['bool']
-
-        if (re.match("^(?:cb|callback|done|next|fn)$", name)):
-            return self.settings['function']
-
-        return False
-
-    def getMatchingNotations(self, name):
-        def checkMatch(rule):
-            if 'prefix' in rule:
-                regex = re.escape(rule['prefix'])
-                if re.match('.*[a-z]', rule['prefix']):
-                    regex += '(?:[A-Z_]|$)'
-                return re.match(regex, name)
-            elif 'regex' in rule:
-                return re.search(rule['regex'], name)
-
-        return list(filter(checkMatch, self.viewSettings.get('jsdocs_notation_map', [])))
-
-    def getDefinition(self, view, pos):
-        """
-        get a relevant definition starting at the given point
-        returns string
-        """
-        maxLines = 25  # don't go further than this
-        openBrackets = 0
-
-        definition = ''
-
-        # count the number of open parentheses
-        def countBrackets(total, bracket):
-            return total + (1 if bracket == '(' else -1)
-
-        for i in range(0, maxLines):
-            line = read_line(view, pos)
-            if line is None:
-                break
-
-            pos += len(line) + 1
-            # strip comments
-            line = re.sub(r"//.*",     "", line)
-            line = re.sub(r"/\*.*\*/", "", line)
-
-            searchForBrackets = line
-
-            # on the first line, only start looking from *after* the actual function starts. This is
-            # needed for cases like this:
-            # (function (foo, bar) { ... })
-            if definition == '':
-                opener = re.search(self.settings['fnOpener'], line) if self.settings['fnOpener'] else False
-                if opener:
-                    # ignore everything before the function opener
-                    searchForBrackets = line[opener.start():]
-
-            openBrackets = reduce(countBrackets, re.findall('[()]', searchForBrackets), openBrackets)
-
-            definition += line
-            if openBrackets == 0:
-                break
-        return definition
-
-
-class JsdocsJavascript(JsdocsParser):
-    def setupSettings(self):
-        identifier = '[a-zA-Z_$][a-zA-Z_$0-9]*'
-        self.settings = {
-            # curly brackets around the type information
-            "curlyTypes": True,
-            'typeInfo': True,
-            "typeTag": self.viewSettings.get('jsdocs_override_js_var') or "type",
-            # technically, they can contain all sorts of unicode, but w/e
-            "varIdentifier": identifier,
-            "fnIdentifier":  identifier,
-            "fnOpener": '(?:'
-                    + r'function[\s*]*(?:' + identifier + r')?\s*\('
-                    + '|'
-                    + '(?:' + identifier + r'|\(.*\)\s*=>)'
-                    + '|'
-                    + '(?:' + identifier + r'\s*\(.*\)\s*\{)'
-                    + ')',
-            "commentCloser": " */",
-            "bool": "Boolean",
-            "function": "Function"
-        }
-
-    def parseFunction(self, line):
-        res = re.search(
-            # Normal functions...
-            #   fnName = function,  fnName : function
-            r'(?:(?P<name1>' + self.settings['varIdentifier'] + r')\s*[:=]\s*)?'
-            + 'function'
-            # function fnName, function* fnName
-            + r'(?P<generator>[\s*]+)?(?P<name2>' + self.settings['fnIdentifier'] + ')?'
-            # (arg1, arg2)
-            + r'\s*\(\s*(?P<args>.*)\)',
-            line
-        ) or re.search(
-            # ES6 arrow functions
-            # () => y,  x => y,  (x, y) => y,  (x = 4) => y
-            r'(?:(?P<args>' + self.settings['varIdentifier'] + r')|\(\s*(?P<args2>.*)\))\s*=>',
-            line
-        ) or re.search(
-            # ES6 method initializer shorthand
-            # var person = { getName() { return this.name; } }
-            r'(?P<name1>' + self.settings['varIdentifier'] + ')\s*\((?P<args>.*)\)\s*\{',
-            line
-        )
-        if not res:
-            return None
-
-        groups = {
-            'name1': '',
-            'name2': '',
-            'generator': '',
-            'args': '',
-            'args2': ''
-        }
-        groups.update(res.groupdict())
-        # grab the name out of "name1 = function name2(foo)" preferring name1
-        generatorSymbol = '*' if (groups['generator'] or '').find('*') > -1 else ''
-        name = generatorSymbol + (groups['name1'] or groups['name2'] or '')
-        args = groups['args'] or groups['args2'] or ''
-
-        return (name, args, None)
-
-    def parseVar(self, line):
-        res = re.search(
-            #   var foo = blah,
-            #       foo = blah;
-            #   baz.foo = blah;
-            #   baz = {
-            #        foo : blah
-            #   }
-
-            '(?P<name>' + self.settings['varIdentifier'] + ')\s*[=:]\s*(?P<val>.*?)(?:[;,]|$)',
-            line
-        )
-        if not res:
-            return None
-
-        return (res.group('name'), res.group('val').strip())
-
-    def getArgInfo(self, arg):
-        if (re.search('^\{.*\}$', arg)):
-            subItems = splitByCommas(arg[1:-1])
-            prefix = 'options.'
-        else:
-            subItems = [arg]
-            prefix = ''
-
-        out = []
-        for subItem in subItems:
-            out.append((self.getArgType(subItem), prefix + self.getArgName(subItem)))
-
-        return out
-
-    def getArgType(self, arg):
-        parts = re.split(r'\s*=\s*', arg, 1)
-        # rest parameters
-        if parts[0].find('...') == 0:
-            return '...[type]'
-        elif len(parts) > 1:
-            return self.guessTypeFromValue(parts[1])
 
-    def getArgName(self, arg):
-        namePart = re.split(r'\s*=\s*', arg, 1)[0]
+def isIndexed(view):
+    """
+    Whether a view's definition index is kept up to date as it changes: only views in a single language which
+    DocBlockr has a parser for. Any other view is indexed when a command asks for it.
+    """
+    return not view.settings().get('is_widget') and getViewParserClass(view) is not None
 
-        # check for rest parameters, eg: function (foo, ...rest) {}
-        if namePart.find('...') == 0:
-            return namePart[3:]
-        return namePart
 
-    def getFunctionReturnType(self, name, retval):
-        if name and name[0] == '*':
-            return None
-        return super(JsdocsJavascript, self).getFunctionReturnType(name, retval)
-
-    def getMatchingNotations(self, name):
-        out = super(JsdocsJavascript, self).getMatchingNotations(name)
-        if name and name[0] == '*':
-            # if '@returns' is preferred, then also use '@yields'. Otherwise, '@return' and '@yield'
-            yieldTag = '@yield' + ('s' if self.viewSettings.get('jsdocs_return_tag', '_')[-1] == 's' else '')
-            description = ' ${1:[description]}' if self.viewSettings.get('jsdocs_return_description', True) else ''
-            out.append({ 'tags': [
-                '%s {${1:[type]}}%s' % (yieldTag, description)
-            ]})
-        return out
-
-    def guessTypeFromValue(self, val):
-        lowerPrimitives = self.viewSettings.get('jsdocs_lower_case_primitives') or False
-        shortPrimitives = self.viewSettings.get('jsdocs_short_primitives') or False
-        if is_numeric(val):
-            return "number" if lowerPrimitives else "Number"
-        if val[0] == '"' or val[0] == "'":
-            return "string" if lowerPrimitives else "String"
-        if val[0] == '[':
-            return "Array"
-        if val[0] == '{':
-            return "Object"
-        if val == 'true' or val == 'false':
-            returnVal = 'Bool' if shortPrimitives else 'Boolean'
-            return returnVal.lower() if lowerPrimitives else returnVal
-        if re.match('RegExp\\b|\\/[^\\/]', val):
-            return 'RegExp'
-        if val.find('=>') > -1:
-            return 'function' if lowerPrimitives else 'Function'
-        if val[:4] == 'new ':
-            res = re.search('new (' + self.settings['fnIdentifier'] + ')', val)
-            return res and res.group(1) or None
+def getIndexedDefinition(view, lineIndex):
+    """
+    Return the (start line, end line, parser, parsed definition, definition text) starting on a line of the view, if
+    its definition index is up to date. This never waits: None is returned if the index is stale or being updated.
+    """
+    if not _definitionIndexLock.acquire(False):
         return None
-
-
-class JsdocsPHP(JsdocsParser):
-    def setupSettings(self):
-        shortPrimitives = self.viewSettings.get('jsdocs_short_primitives') or False
-        nameToken = '[a-zA-Z_\\x7f-\\xff][a-zA-Z0-9_\\x7f-\\xff]*'
-        self.settings = {
-            # curly brackets around the type information
-            'curlyTypes': False,
-            'typeInfo': True,
-            'typeTag': "var",
-            'varIdentifier': '&?[$]' + nameToken + '(?:->' + nameToken + ')*',
-            'fnIdentifier': nameToken,
-            'typeIdentifier': '\\\\?' + nameToken + '(\\\\' + nameToken + ')*',
-            'fnOpener': 'function(?:\\s+' + nameToken + ')?\\s*\\(',
-            'commentCloser': ' */',
-            'bool': 'bool' if shortPrimitives else 'boolean',
-            'function': "function"
-        }
-
-    def parseFunction(self, line):
-        res = re.search(
-            'function\\s+&?\\s*'
-            + '(?P<name>' + self.settings['fnIdentifier'] + ')'
-            # function fnName
-            # (arg1, arg2)
-            + '\\s*\\(\\s*(?P<args>.*)\\)',
-            line
-        )
-        if not res:
+    try:
+        cached = _definitionIndexCache.get(view.id())
+        if cached is None or cached[1].version != view.change_count() or cached[0] is not getSettings(view):
             return None
+        return cached[1].definitionAt(lineIndex)
+    finally:
+        _definitionIndexLock.release()
 
-        return (res.group('name'), res.group('args'), None)
-
-    def getArgType(self, arg):
-
-        res = re.search(
-            '(?P<type>' + self.settings['typeIdentifier'] + ')?'
-            + '\\s*(?P<name>' + self.settings['varIdentifier'] + ')'
-            + '(\\s*=\\s*(?P<val>.*))?',
-            arg
-        );
-
-        if (res):
-
-            argType = res.group("type")
-            argName = res.group("name")
-            argVal = res.group("val")
-
-            # function fnc_name(type $name = val)
-            if (argType and argVal):
-
-                # function fnc_name(array $x = array())
-                # function fnc_name(array $x = [])
-                argValType = self.guessTypeFromValue(argVal)
-                if argType == argValType:
-                    return argType
-
-                # function fnc_name(type $name = null)
-                return argType + "|" + argValType
-
-            # function fnc_name(type $name)
-            if (argType):
-                return argType
-
-            # function fnc_name($name = value)
-            if (argVal):
-                guessedType = self.guessTypeFromValue(argVal)
-                return guessedType if guessedType != 'null' else None
-        # function fnc_name()
-        return None
-
-    def getArgName(self, arg):
-        return re.search("(" + self.settings['varIdentifier'] + ")(?:\\s*=.*)?$", arg).group(1)
-
-    def parseVar(self, line):
-        res = re.search(
-            #   var $foo = blah,
-            #       $foo = blah;
-            #   $baz->foo = blah;
-            #   $baz = array(
-            #        'foo' => blah
-            #   )
-
-            '(?P<name>' + self.settings['varIdentifier'] + ')\\s*=>?\\s*(?P<val>.*?)(?:[;,]|$)',
-            line
-        )
-        if res:
-            return (res.group('name'), res.group('val').strip())
-
-        res = re.search(
-            '\\b(?:var|public|private|protected|static)\\s+(?P<name>' + self.settings['varIdentifier'] + ')',
-            line
-        )
-        if res:
-            return (res.group('name'), None)
-
-        return None
 
-    def guessTypeFromValue(self, val):
-        shortPrimitives = self.viewSettings.get('jsdocs_short_primitives') or False
-        if is_numeric(val):
-            return "float" if '.' in val else 'int' if shortPrimitives else 'integer'
-        if val[0] == '"' or val[0] == "'":
-            return "string"
-        if val[:5] == 'array' or (val[0] == '[' and val[-1] == ']'):
-            return "array"
-        if val.lower() in ('true', 'false', 'filenotfound'):
-            return 'bool' if shortPrimitives else 'boolean'
-        if val[:4] == 'new ':
-            res = re.search('new (' + self.settings['fnIdentifier'] + ')', val)
-            return res and res.group(1) or None
-        if val.lower() in ('null'):
-            return 'null'
-        return None
+# view id => (change count, start points, [(start, end), ...]) of the comment blocks in the view
+_commentBlockCache = {}
 
-    def getFunctionReturnType(self, name, retval):
-        shortPrimitives = self.viewSettings.get('jsdocs_short_primitives') or False
-        if (name[:2] == '__'):
-            if name in ('__construct', '__destruct', '__set', '__unset', '__wakeup'):
-                return None
-            if name == '__sleep':
-                return 'array'
-            if name == '__toString':
-                return 'string'
-            if name == '__isset':
-                return 'bool' if shortPrimitives else 'boolean'
-        return JsdocsParser.getFunctionReturnType(self, name, retval)
-
-
-class JsdocsCPP(JsdocsParser):
-    def setupSettings(self):
-        nameToken = '[a-zA-Z_][a-zA-Z0-9_]*'
-        identifier = '(%s)(::%s)?' % (nameToken, nameToken)
-        self.settings = {
-            'typeInfo': False,
-            'curlyTypes': False,
-            'typeTag': 'param',
-            'commentCloser': ' */',
-            'fnIdentifier': identifier,
-            'varIdentifier': '(' + identifier + ')\\s*(?:\\[(?:' + identifier + r')?\]|\((?:(?:\s*,\s*)?[a-z]+)+\s*\))*',
-            'fnOpener': identifier + '\\s+' + identifier + '\\s*\\(',
-            'bool': 'bool',
-            'function': 'function'
-        }
-
-    def parseFunction(self, line):
-        res = re.search(
-            '(?P<retval>' + self.settings['varIdentifier'] + ')[&*\\s]+'
-            + '(?P<name>' + self.settings['varIdentifier'] + ');?'
-            # void fnName
-            # (arg1, arg2)
-            + '\\s*\\(\\s*(?P<args>.*)\)',
-            line
-        )
-        if not res:
-            return None
 
-        return (res.group('name'), res.group('args'), res.group('retval'))
+def getCommentBlocks(view):
+    """
+    Return the (start, end) extents of every `comment.block` in the view, in order, using a single selector query.
+    Language files can add scopes inside a DocBlock (eg: to highlight tags), which splits the block into several
+    regions, so touching regions are merged back together. The result is cached until the view is modified, or its
+    settings (such as the syntax) change.
+    """
+    # makes sure the cache is cleared when the settings change
+    getSettings(view)
+    viewId = view.id()
+    changeCount = view.change_count()
+    cached = _commentBlockCache.get(viewId)
+    if cached and cached[0] == changeCount:
+        return cached[1], cached[2]
+
+    blocks = []
+    for region in view.find_by_selector('comment.block'):
+        if blocks and region.begin() <= blocks[-1][1]:
+            blocks[-1] = (blocks[-1][0], max(blocks[-1][1], region.end()))
+        else:
+            blocks.append((region.begin(), region.end()))
 
-    def parseArgs(self, args):
-        if args.strip() == 'void':
-            return []
-        return super(JsdocsCPP, self).parseArgs(args)
+    starts = [start for start, end in blocks]
+    _commentBlockCache[viewId] = (changeCount, starts, blocks)
+    return starts, blocks
 
-    def getArgType(self, arg):
-        return None
 
-    def getArgName(self, arg):
-        return re.search(self.settings['varIdentifier'] + r"(?:\s*=.*)?$", arg).group(1)
+def getDocBlocks(view):
+    """
+    Return the text of the view, and the (start, end) extents of every DocBlock in it (the comment blocks which start
+    with `/**`), found with a single selector query and read with a single `substr` call
+    """
+    text = view.substr(sublime.Region(0, view.size()))
+    starts, blocks = getCommentBlocks(view)
+    return text, [
+        (start, end) for start, end in blocks if text.startswith('/**', start) and text[start + 3:start + 4] != '/'
+    ]
 
-    def parseVar(self, line):
-        return None
 
-    def guessTypeFromValue(self, val):
-        return None
+def getDocBlockRegion(view, point):
+    """
+    Given a starting point inside a DocBlock, return a Region which encompasses the entire block.
+    This is similar to `run_command('expand_selection', { to: 'scope' })`, however it is resilient to bugs which occur
+    due to language files adding scopes inside the DocBlock (eg: to highlight tags)
+    """
+    start = end = point
+    starts, blocks = getCommentBlocks(view)
+    index = bisect_right(starts, point) - 1
+    if index >= 0:
+        blockStart, blockEnd = blocks[index]
+        if blockStart < point <= blockEnd:
+            start = blockStart
+        if point < blockEnd:
+            end = blockEnd
 
-    def getFunctionReturnType(self, name, retval):
-        return retval if retval != 'void' else None
-
-
-class JsdocsCoffee(JsdocsParser):
-    def setupSettings(self):
-        identifier = '[a-zA-Z_$][a-zA-Z_$0-9]*'
-        self.settings = {
-            # curly brackets around the type information
-            'curlyTypes': True,
-            'typeTag': self.viewSettings.get('jsdocs_override_js_var') or "type",
-            'typeInfo': True,
-            # technically, they can contain all sorts of unicode, but w/e
-            'varIdentifier': identifier,
-            'fnIdentifier': identifier,
-            'fnOpener': None,  # no multi-line function definitions for you, hipsters!
-            'commentCloser': '###',
-            'bool': 'Boolean',
-            'function': 'Function'
-        }
+    return sublime.Region(start, end)
 
-    def parseFunction(self, line):
-        res = re.search(
-            #   fnName = function,  fnName : function
-            '(?:(?P<name>' + self.settings['varIdentifier'] + ')\s*[:=]\s*)?'
-            + '(?:\\((?P<args>[^()]*?)\\))?\\s*([=-]>)',
-            line
-        )
-        if not res:
-            return None
 
-        # grab the name out of "name1 = function name2(foo)" preferring name1
-        name = res.group('name') or ''
-        args = res.group('args')
+# definitions longer than this are parsed in the background, after a plain block has been inserted straight away
+asyncDefinitionLength = 2000
+# a background parse which finishes more than this many seconds after it started isn't swapped in, since the user has
+# moved on. This doesn't cut the parse itself short, it only drops a result which has gone stale
+asyncParseBudget = 1.0
 
-        return (name, args, None)
+# view id => the token of the background parse which is waiting to replace a block in the view. A new parse in the
+# same view replaces the token, which cancels the earlier one
+_pendingParses = {}
 
-    def parseVar(self, line):
-        res = re.search(
-            #   var foo = blah,
-            #       foo = blah;
-            #   baz.foo = blah;
-            #   baz = {
-            #        foo : blah
-            #   }
 
-            '(?P<name>' + self.settings['varIdentifier'] + ')\s*[=:]\s*(?P<val>.*?)(?:[;,]|$)',
-            line
-        )
-        if not res:
-            return None
+def parseInBackground(view, token, changeCount, parserClass, settings, line, request, trailingString, begin, end):
+    """
+    Parse a definition and generate its DocBlock, then swap it in for the placeholder block between `begin` and `end`,
+    as long as the parse hasn't been cancelled and the view hasn't changed since the placeholder went in.
+    """
+    def cancelled():
+        return _pendingParses.get(view.id()) is not token or view.change_count() != changeCount
 
-        return (res.group('name'), res.group('val').strip())
-
-    def guessTypeFromValue(self, val):
-        lowerPrimitives = self.viewSettings.get('jsdocs_lower_case_primitives') or False
-        if is_numeric(val):
-            return "number" if lowerPrimitives else "Number"
-        if val[0] == '"' or val[0] == "'":
-            return "string" if lowerPrimitives else "String"
-        if val[0] == '[':
-            return "Array"
-        if val[0] == '{':
-            return "Object"
-        if val == 'true' or val == 'false':
-            return "boolean" if lowerPrimitives else "Boolean"
-        if re.match('RegExp\\b|\\/[^\\/]', val):
-            return 'RegExp'
-        if val[:4] == 'new ':
-            res = re.search('new (' + self.settings['fnIdentifier'] + ')', val)
-            return res and res.group(1) or None
-        return None
+    started = time.time()
+    if cancelled():
+        return
 
+    parser = getParserInstance(parserClass, settings)
+    out = parser.parse(line, None, request)
+    if cancelled() or time.time() - started > asyncParseBudget:
+        return
 
-class JsdocsActionscript(JsdocsParser):
-
-    def setupSettings(self):
-        nameToken = '[a-zA-Z_][a-zA-Z0-9_]*'
-        self.settings = {
-            'typeInfo': False,
-            'curlyTypes': False,
-            'typeTag': '',
-            'commentCloser': ' */',
-            'fnIdentifier': nameToken,
-            'varIdentifier': '(%s)(?::%s)?' % (nameToken, nameToken),
-            'fnOpener': 'function(?:\\s+[gs]et)?(?:\\s+' + nameToken + ')?\\s*\\(',
-            'bool': 'bool',
-            'function': 'function'
-        }
+    builder = JsdocsSnippetBuilder(settings)
+    builder.parser = parser
+    builder.trailingString = trailingString
+    snippet = builder.generateSnippet(out, request.inline)
 
-    def parseFunction(self, line):
-        res = re.search(
-            #   fnName = function,  fnName : function
-            '(?:(?P<name1>' + self.settings['varIdentifier'] + ')\s*[:=]\s*)?'
-            + 'function(?:\s+(?P<getset>[gs]et))?'
-            # function fnName
-            + '(?:\s+(?P<name2>' + self.settings['fnIdentifier'] + '))?'
-            # (arg1, arg2)
-            + '\s*\(\s*(?P<args>.*)\)',
-            line
-        )
-        if not res:
-            return None
+    def swap():
+        if not cancelled():
+            del _pendingParses[view.id()]
+            view.run_command('jsdocs_replace_block', {'begin': begin, 'end': end, 'contents': snippet})
 
-        name = res.group('name1') and re.sub(self.settings['varIdentifier'], r'\1', res.group('name1')) \
-            or res.group('name2') \
-            or ''
+    sublime.set_timeout(swap, 0)
 
-        args = res.group('args')
-        options = {}
-        if res.group('getset') == 'set':
-            options['as_setter'] = True
 
-        return (name, args, None, options)
+class JsdocsCommand(sublime_plugin.TextCommand, JsdocsSnippetBuilder):
 
-    def parseVar(self, line):
-        return None
+    def run(self, edit, inline=False):
+        v = self.view
 
-    def getArgName(self, arg):
-        return re.sub(self.settings['varIdentifier'] + r'(\s*=.*)?', r'\1', arg)
+        self.initialize(v, inline)
+        v, invocation = instrument(v, 'jsdocs', self.settings)
+        try:
+            # work out the block for every cursor first: (region to erase, snippet)
+            blocks = []
+            for region in v.sel():
+                with invocation.stage('getDefinition'):
+                    self.initializeCursor(v, region.end())
+
+                if self.parser.isExistingComment(self.line):
+                    blocks.append((None, "\n *" + self.indentSpaces))
+                    continue
 
-    def getArgType(self, arg):
-        # could actually figure it out easily, but it's not important for the documentation
-        return None
+                if len(v.sel()) == 1 and self.deferParse(edit, region.end()):
+                    return
+
+                # match against a function declaration.
+                with invocation.stage('parse'):
+                    out = self.parser.parse(self.line, self.parsed, self.request)
+                invocation.recordParse(type(self.parser).__name__, self.line)
+
+                # characters after the cursor are erased from the view (they are added to the output)
+                with invocation.stage('generateSnippet'):
+                    blocks.append((self.trailingRgn, self.generateSnippet(out, inline)))
+
+            with invocation.stage('insert'):
+                snippets = set(snippet for unused, snippet in blocks)
+                if len(snippets) == 1:
+                    # the same snippet goes in at every cursor, so it can be inserted once, keeping its tab stops
+                    for trailingRgn, unused in reversed(blocks):
+                        if trailingRgn:
+                            v.erase(edit, trailingRgn)
+                    write(v, snippets.pop())
+                else:
+                    self.insertBlocks(edit, blocks)
+        finally:
+            invocation.finish()
 
+    def initialize(self, v, inline=False):
+        self.configure(getSettings(v))
+        self.inline = inline
 
-class JsdocsObjC(JsdocsParser):
-
-    def setupSettings(self):
-        identifier = '[a-zA-Z_$][a-zA-Z_$0-9]*'
-        self.settings = {
-            # curly brackets around the type information
-            "curlyTypes": True,
-            'typeInfo': True,
-            "typeTag": "type",
-            # technically, they can contain all sorts of unicode, but w/e
-            "varIdentifier": identifier,
-            "fnIdentifier":  identifier,
-            "fnOpener": '^\s*[-+]',
-            "commentCloser": " */",
-            "bool": "Boolean",
-            "function": "Function"
-        }
+    def initializeCursor(self, v, point):
+        # trailing characters are put inside the body of the comment
+        self.trailingRgn = sublime.Region(point, v.line(point).end())
+        self.trailingString = v.substr(self.trailingRgn).strip()
+        # drop trailing '*/'
+        self.trailingString = escape(re.sub('\\s*\\*\\/\\s*$', '', self.trailingString))
 
-    def getDefinition(self, view, pos):
-        maxLines = 25  # don't go further than this
-
-        definition = ''
-        for i in range(0, maxLines):
-            line = read_line(view, pos)
-            if line is None:
-                break
-
-            pos += len(line) + 1
-            # strip comments
-            line = re.sub("//.*", "", line)
-            if definition == '':
-                if not self.settings['fnOpener'] or not re.search(self.settings['fnOpener'], line):
-                    definition = line
-                    break
-            definition += line
-            if line.find(';') > -1 or line.find('{') > -1:
-                definition = re.sub(r'\s*[;{]\s*$', '', definition)
-                break
-        return definition
-
-    def parseFunction(self, line):
-        # this is terrible, don't judge me
-
-        typeRE = r'[a-zA-Z_$][a-zA-Z0-9_$]*\s*\**'
-        res = re.search(
-            '[-+]\s+\\(\\s*(?P<retval>' + typeRE + ')\\s*\\)\\s*'
-            + '(?P<name>[a-zA-Z_$][a-zA-Z0-9_$]*)'
-            # void fnName
-            # (arg1, arg2)
-            + '\\s*(?::(?P<args>.*))?',
-            line
-        )
-        if not res:
-            return
-        name = res.group('name')
-        argStr = res.group('args')
-        args = []
-        if argStr:
-            groups = re.split('\\s*:\\s*', argStr)
-            numGroups = len(groups)
-            for i in range(0, numGroups):
-                group = groups[i]
-                if i < numGroups - 1:
-                    result = re.search(r'\s+(\S*)$', group)
-                    name += ':' + result.group(1)
-                    group = group[:result.start()]
-
-                args.append(group)
-
-            if (numGroups):
-                name += ':'
-        return (name, '|||'.join(args), res.group('retval'))
-
-    def parseArgs(self, args):
-        out = []
-        for arg in args.split('|||'):  # lol
-            lastParen = arg.rfind(')')
-            out.append((arg[1:lastParen], arg[lastParen + 1:]))
-        return out
-
-    def getFunctionReturnType(self, name, retval):
-        return retval if retval != 'void' and retval != 'IBAction' else None
-
-    def parseVar(self, line):
-        return None
+        self.parser = parser = getParser(v, point)
 
+        # use trailing string as a description of the function
+        self.request = JsdocsParseRequest(self.inline, self.trailingString)
 
-class JsdocsJava(JsdocsParser):
-    def setupSettings(self):
-        identifier = '[a-zA-Z_$][a-zA-Z_$0-9]*'
-        self.settings = {
-            "curlyTypes": False,
-            'typeInfo': False,
-            "typeTag": "type",
-            "varIdentifier": identifier,
-            "fnIdentifier":  identifier,
-            "fnOpener": identifier + '(?:\\s+' + identifier + ')?\\s*\\(',
-            "commentCloser": " */",
-            "bool": "Boolean",
-            "function": "Function"
-        }
+        # read the next line, which has already been read and parsed if it's in the definition index
+        entry = getIndexedDefinition(v, v.rowcol(point)[0] + 1)
+        if entry and entry[2] is parser:
+            self.line, self.parsed = entry[4], entry[3]
+        else:
+            self.line = parser.readDefinition(read_lines(v, v.line(point).end() + 1))
+            self.parsed = None
 
-    def parseFunction(self, line):
-        line = line.strip()
-        res = re.search(
-            # Modifiers
-            r'(?:(public|protected|private|static|abstract|final|transient|synchronized|native|strictfp)\s+)*'
-            # Return value
-            + r'(?P<retval>[a-zA-Z_$][<>., a-zA-Z_$0-9]+(\[\])*)\s+'
-            # Method name
-            + r'(?P<name>' + self.settings['fnIdentifier'] + r')\s*'
-            # Params
-            + r'\((?P<args>.*)\)\s*'
-            # # Throws ,
-            + r'(?:throws){0,1}\s*(?P<throws>[a-zA-Z_$0-9\.,\s]*)',
-            line
+    def deferParse(self, edit, point):
+        """
+        For a definition which could take a while to parse (eg: a long minified line), insert the block which simple
+        mode would give straight away, and parse the definition in the background. Returns False if the definition
+        should just be parsed now.
+        """
+        v = self.view
+        if self.parsed or not asyncDefinitionLength < len(self.line) <= self.parser.maxDefinitionLength \
+                or self.settings.get('jsdocs_simple_mode') or not hasattr(sublime, 'set_timeout_async'):
+            return False
+
+        v.erase(edit, self.trailingRgn)
+        size = v.size()
+        write(v, self.generateSnippet(None, self.inline))
+        end = point + v.size() - size
+
+        token = _pendingParses[v.id()] = object()
+        args = (
+            v, token, v.change_count(), type(self.parser), self.settings, self.line, self.request,
+            self.trailingString, point, end
         )
+        sublime.set_timeout_async(lambda: parseInBackground(*args), 0)
+        return True
 
-        if not res:
-            return None
-        group_dict = res.groupdict()
-        name = group_dict["name"]
-        retval = group_dict["retval"]
-        full_args = group_dict["args"]
-        throws = group_dict["throws"] or ""
-
-        arg_list = []
-        for arg in splitByCommas(full_args):
-            arg_list.append(arg.strip().split(" ")[-1])
-        args = ",".join(arg_list)
-
-        throws_list = []
-        for arg in splitByCommas(throws):
-            throws_list.append(arg.strip().split(" ")[-1])
-        throws = ",".join(throws_list)
-
-        return (name, args, retval, throws)
-
-    def parseVar(self, line):
-        return None
-
-    def guessTypeFromValue(self, val):
-        return None
-
-    def formatFunction(self, name, args, retval, throws_args, options={}):
-        out = JsdocsParser.formatFunction(self, name, args, retval, options)
-
-        if throws_args != "":
-            for unused, exceptionName in self.parseArgs(throws_args):
-                typeInfo = self.getTypeInfo(unused, exceptionName)
-                out.append("@throws %s%s ${1:[description]}" % (
-                    typeInfo,
-                    escape(exceptionName)
-                ))
-
-        return out
-
-    def getFunctionReturnType(self, name, retval):
-        if retval == "void":
-            return None
-        return retval
-
-    def getDefinition(self, view, pos):
-        maxLines = 25  # don't go further than this
-
-        definition = ''
-        open_curly_annotation = False
-        open_paren_annotation = False
-        for i in range(0, maxLines):
-            line = read_line(view, pos)
-            if line is None:
-                break
-
-            pos += len(line) + 1
-            # Move past empty lines
-            if re.search("^\s*$", line):
-                continue
-            # strip comments
-            line = re.sub("//.*", "", line)
-            line = re.sub(r"/\*.*\*/", "", line)
-            if definition == '':
-                # Must check here for function opener on same line as annotation
-                if self.settings['fnOpener'] and re.search(self.settings['fnOpener'], line):
-                    pass
-                # Handle Annotations
-                elif re.search("^\s*@", line):
-                    if re.search("{", line) and not re.search("}", line):
-                        open_curly_annotation = True
-                    if re.search("\(", line) and not re.search("\)", line):
-                        open_paren_annotation = True
-                    continue
-                elif open_curly_annotation:
-                    if re.search("}", line):
-                        open_curly_annotation = False
-                    continue
-                elif open_paren_annotation:
-                    if re.search("\)", line):
-                        open_paren_annotation = False
-                elif re.search("^\s*$", line):
-                    continue
-                # Check for function
-                elif not self.settings['fnOpener'] or not re.search(self.settings['fnOpener'], line):
-                    definition = line
-                    break
-            definition += line
-            if line.find(';') > -1 or line.find('{') > -1:
-                definition = re.sub(r'\s*[;{]\s*$', '', definition)
-                break
-        return definition
-
-class JsdocsRust(JsdocsParser):
-    def setupSettings(self):
-        self.settings = {
-            "curlyTypes": False,
-            'typeInfo': False,
-            "typeTag": False,
-            "varIdentifier": ".*",
-            "fnIdentifier":  ".*",
-            "fnOpener": "^\s*fn",
-            "commentCloser": " */",
-            "bool": "Boolean",
-            "function": "Function"
-        }
+    def insertBlocks(self, edit, blocks):
+        """
+        Insert a different block at each cursor. One snippet can't hold different text for each cursor, so the blocks
+        are inserted as plain text from the last cursor back to the first, which keeps the earlier positions valid.
+        Each cursor is left selecting the first placeholder in its block, and the lines of each block are indented to
+        match the line its cursor is on, as inserting a snippet would.
+        """
+        v = self.view
+        points = [region.end() for region in v.sel()]
+        selections = []
+        for point, (trailingRgn, snippet) in reversed(list(zip(points, blocks))):
+            erased = 0
+            if trailingRgn:
+                erased = trailingRgn.size()
+                v.erase(edit, trailingRgn)
+            indentation = re.match(r'\s*', v.substr(sublime.Region(v.line(point).begin(), point))).group(0)
+            text, (start, end) = expandSnippet(snippet.replace('\n', '\n' + indentation))
+            v.insert(edit, point, text)
+
+            # move the selections already made in the blocks further down
+            shift = len(text) - erased
+            selections = [(point + start, point + end)] + [(a + shift, b + shift) for a, b in selections]
 
-    def parseFunction(self, line):
-        res = re.search('\s*fn\s+(?P<name>\S+)', line)
-        if not res:
-            return None
+        v.sel().clear()
+        for a, b in selections:
+            v.sel().add(sublime.Region(a, b))
 
-        name = res.group('name').join('')
 
-        return (name, [])
+############################################################33
 
-    def formatFunction(self, name, args):
-        return name
 
-############################################################33
+class JsdocsReplaceBlockCommand(sublime_plugin.TextCommand):
+    """
+    Replace the text between two points with a snippet, used to swap in a DocBlock which was parsed in the background
+    """
+    def run(self, edit, begin, end, contents):
+        v = self.view
+        v.erase(edit, sublime.Region(begin, end))
+        v.sel().clear()
+        v.sel().add(sublime.Region(begin))
+        write(v, contents)
 
 
 class JsdocsIndentCommand(sublime_plugin.TextCommand):
@@ -1295,12 +498,12 @@ class JsdocsIndentCommand(sublime_plugin.TextCommand):
         currPos = v.sel()[0].begin()
         currLineRegion = v.line(currPos)
         currCol = currPos - currLineRegion.begin()  # which column we're currently in
-        prevLine = v.substr(v.line(v.line(currPos).begin() - 1))
-        spaces = self.getIndentSpaces(prevLine)
-        if spaces:
-            toStar = len(re.search("^(\\s*\\*)", prevLine).group(1))
+        prevLine = v.substr(v.line(currLineRegion.begin() - 1))
+        columns = getIndentColumns(prevLine, getParser(v).settings['typeInfo'])
+        if columns and columns[1]:
+            toStar, spaces = columns
             toInsert = spaces - currCol + toStar
-            if spaces is None or toInsert <= 0:
+            if toInsert <= 0:
                 v.run_command(
                     'insert_snippet', {
                         'contents': "\t"
@@ -1312,17 +515,6 @@ class JsdocsIndentCommand(sublime_plugin.TextCommand):
         else:
             v.insert(edit, currPos, "\t")
 
-    def getIndentSpaces(self, line):
-        hasTypes = getParser(self.view).settings['typeInfo']
-        extraIndent = '\\s+\\S+' if hasTypes else ''
-        res = re.search("^\\s*\\*(?P<fromStar>\\s*@(?:param|property)%s\\s+\\S+\\s+)\\S" % extraIndent, line) \
-           or re.search("^\\s*\\*(?P<fromStar>\\s*@(?:returns?|define)%s\\s+\\S+\\s+)\\S" % extraIndent, line) \
-           or re.search("^\\s*\\*(?P<fromStar>\\s*@[a-z]+\\s+)\\S", line) \
-           or re.search("^\\s*\\*(?P<fromStar>\\s*)", line)
-        if res:
-            return len(res.group('fromStar'))
-        return None
-
 
 class JsdocsJoinCommand(sublime_plugin.TextCommand):
     def run(self, edit):
@@ -1402,6 +594,110 @@ class JsdocsReparse(sublime_plugin.TextCommand):
         write(v, text)
 
 
+class JsdocsReparseFile(sublime_plugin.TextCommand):
+    """
+    Reparse the DocBlock at the cursor, or else the next one in the file (see JsdocsReparse), so that its fields are
+    active again. Only one snippet's fields can be active, so the other blocks, and the code between them, are left
+    alone.
+    """
+    def run(self, edit):
+        v = self.view
+        text, blocks = getDocBlocks(v)
+        if not blocks:
+            sublime.status_message('DocBlockr: no DocBlocks to reparse')
+            return
+
+        # the first block which ends at or after the cursor, wrapping round to the top of the file
+        point = v.sel()[0].begin()
+        start, end = next((block for block in blocks if block[1] >= point), blocks[0])
+
+        tabIndex = counter()
+
+        def tabStop(m):
+            return "${%d:%s}" % (next(tabIndex), m.group(1))
+
+        # escape string, so variables starting with $ won't be removed
+        snippet = escape(text[start:end])
+        # strip out leading spaces, since inserting a snippet keeps the indentation
+        snippet = re.sub("\\n\\s+\\*", "\n *", snippet)
+        # replace [bracketed] [text] with a tabstop
+        snippet = re.sub("(\\[.+?\\])", tabStop, snippet)
+
+        v.run_command('clear_fields')
+        v.erase(edit, sublime.Region(start, end))
+        v.sel().clear()
+        v.sel().add(sublime.Region(start))
+        write(v, snippet)
+        v.show(start)
+
+        sublime.status_message('DocBlockr: reparsed the DocBlock on line %d' % (v.rowcol(start)[0] + 1))
+
+
+class JsdocsWrapFile(sublime_plugin.TextCommand):
+    """
+    Reformat every DocBlock in the file to wrap at the correct length (see JsdocsWrapLines), all in a single edit
+    """
+    def run(self, edit):
+        v = self.view
+        started = time.time()
+        wrapper = JsdocsWrapper(getSettings(v))
+        text, blocks = getDocBlocks(v)
+
+        replacements = []
+        for start, end in blocks:
+            block = text[start:end]
+            # the lines of the block are lined up with the line it starts on
+            lineStart = text.rfind('\n', 0, start) + 1
+            indentation = re.match(r'[ \t]*', text[lineStart:start]).group(0)
+            wrapped = wrapper.wrapBlock(block, indentation)
+            if wrapped is not None and wrapped != block:
+                replacements.append((start, end, wrapped))
+        elapsed = max(time.time() - started, 0.001)
+
+        # replace from the bottom up, so that the points further up stay valid
+        for start, end, wrapped in reversed(replacements):
+            v.replace(edit, sublime.Region(start, end), wrapped)
+
+        sublime.status_message('DocBlockr: reformatted %d of %d DocBlocks in %.2fs (%d blocks/s)' % (
+            len(replacements), len(blocks), elapsed, len(blocks) / elapsed
+        ))
+
+
+class JsdocsDocumentFileCommand(JsdocsCommand):
+    """
+    Add a DocBlock above every function in the file which doesn't already have one, all in a single edit
+    """
+    def run(self, edit):
+        v = self.view
+        started = time.time()
+
+        self.initialize(v)
+        self.trailingString = ''
+        v, invocation = instrument(v, 'jsdocs_document_file', self.settings)
+
+        try:
+            with invocation.stage('getDefinitions'):
+                starts, commentBlocks = getCommentBlocks(v)
+                undocumented, found = getDefinitionIndex(v).undocumented(starts, commentBlocks)
+            with invocation.stage('generateSnippet'):
+                blocks = [
+                    (point, self.createBlock(parser, parsed, indentation, definition))
+                    for point, unused, indentation, parser, parsed, definition in undocumented
+                ]
+            elapsed = max(time.time() - started, 0.001)
+
+            # insert from the bottom up, so that the points further up stay valid
+            with invocation.stage('insert'):
+                for point, block in reversed(blocks):
+                    v.insert(edit, point, block)
+        finally:
+            invocation.finish()
+
+        sublime.status_message('DocBlockr: documented %d of %d functions in %.2fs (%d definitions/s)' % (
+            len(blocks), found, elapsed, found / elapsed
+        ))
+
+
 class JsdocsTrimAutoWhitespace(sublime_plugin.TextCommand):
     """
     Trim the automatic whitespace added when creating a new line in a docblock.
@@ -1410,7 +706,7 @@ class JsdocsTrimAutoWhitespace(sublime_plugin.TextCommand):
         v = self.view
         lineRegion = v.line(v.sel()[0])
         line = v.substr(lineRegion)
-        spaces = max(0, v.settings().get("jsdocs_indentation_spaces", 1))
+        spaces = max(0, getSettings(v).get("jsdocs_indentation_spaces", 1))
         v.replace(edit, lineRegion, re.sub("^(\\s*\\*)\\s*$", "\\1\n\\1" + (" " * spaces), line))
 
 
@@ -1418,190 +714,110 @@ class JsdocsWrapLines(sublime_plugin.TextCommand):
     """
     Reformat description text inside a comment block to wrap at the correct length.
     Wrap column is set by the first ruler (set in Default.sublime-settings), or 80 by default.
+    With `paragraph`, only the paragraph under the cursor is reformatted.
     Shortcut Key: alt+q
     """
 
-    def run(self, edit):
+    def run(self, edit, paragraph=False):
         v = self.view
-        settings = v.settings()
-        rulers = settings.get('rulers')
-        tabSize = settings.get('tab_size')
+        wrapper = JsdocsWrapper(getSettings(v))
 
-        wrapLength = rulers[0] if (len(rulers) > 0) else 80
-        numIndentSpaces = max(0, settings.get("jsdocs_indentation_spaces", 1))
-        indentSpaces = " " * numIndentSpaces
-        indentSpacesSamePara = " " * max(0, settings.get("jsdocs_indentation_spaces_same_para", numIndentSpaces))
-        spacerBetweenSections = settings.get("jsdocs_spacer_between_sections") == True
-        spacerBetweenDescriptionAndTags = settings.get("jsdocs_spacer_between_sections") == "after_description"
-
-        dbRegion = getDocBlockRegion(v, v.sel()[0].begin())
+        cursor = v.sel()[0].begin()
+        dbRegion = getDocBlockRegion(v, cursor)
 
         # find the first word
         startPoint = v.find(r"\n\s*\* ", dbRegion.begin()).begin()
         # find the first tag, or the end of the comment
         endPoint = v.find(r"\s*\n\s*\*(/)", dbRegion.begin()).begin()
 
+        # get the description text, which starts with the line break before its first line
+        text = v.substr(sublime.Region(startPoint, endPoint))
+
+        if paragraph:
+            wrapped = wrapper.wrapParagraphAt(text, v.rowcol(cursor)[0] - v.rowcol(startPoint)[0])
+            if not wrapped:
+                return
+            start, end, text = wrapped
+            startPoint, endPoint = startPoint + start, startPoint + end
+        else:
+            text = wrapper.wrapDescription(text)
+
         # replace the selection with this ^ new selection
         v.sel().clear()
         v.sel().add(sublime.Region(startPoint, endPoint))
-        # get the description text
-        text = v.substr(v.sel()[0])
-
-        # find the indentation level
-        indentation = len(re.sub('\t', ' ' * tabSize, re.search("\n(\\s*\\*)", text).group(1)))
-        wrapLength -= indentation - tabSize
-
-        # join all the lines, collapsing "empty" lines
-        text = re.sub("\n(\\s*\\*\\s*\n)+", "\n\n", text)
-
-        def wrapPara(para):
-            para = re.sub("(\n|^)\\s*\\*\\s*", " ", para)
-
-            # split the paragraph into words
-            words = para.strip().split(' ')
-            text = '\n'
-            line = ' *' + indentSpaces
-            lineTagged = False  # indicates if the line contains a doc tag
-            paraTagged = False  # indicates if this paragraph contains a doc tag
-            lineIsNew = True
-            tag = ''
-
-            # join all words to create lines, no longer than wrapLength
-            for i, word in enumerate(words):
-                if not word and not lineTagged:
-                    continue
+        write(v, escape(text))
 
-                if lineIsNew and word[0] == '@':
-                    lineTagged = True
-                    paraTagged = True
-                    tag = word
-
-                if len(line) + len(word) >= wrapLength - 1:
-                    # appending the word to the current line would exceed its
-                    # length requirements
-                    text += line.rstrip() + '\n'
-                    line = ' *' + indentSpacesSamePara + word + ' '
-                    lineTagged = False
-                    lineIsNew = True
-                else:
-                    line += word + ' '
-
-                lineIsNew = False
-
-            text += line.rstrip()
-            return {'text':       text,
-                    'lineTagged': lineTagged,
-                    'tagged':     paraTagged,
-                    'tag':        tag}
-
-        # split the text into paragraphs, where each paragraph is eighter
-        # defined by an empty line or the start of a doc parameter
-        paragraphs = re.split('\n{2,}|\n\\s*\\*\\s*(?=@)', text)
-        wrappedParas = []
-        text = ''
-        for p, para in enumerate(paragraphs):
-            # wrap the lines in the current paragraph
-            wrappedParas.append(wrapPara(para))
-
-        # combine all the paragraphs into a single piece of text
-        for i in range(0, len(wrappedParas)):
-            para = wrappedParas[i]
-            last = i == len(wrappedParas) - 1
-
-            nextIsTagged = not last and wrappedParas[i + 1]['tagged']
-            nextIsSameTag = nextIsTagged and para['tag'] == wrappedParas[i + 1]['tag']
-
-            if last or (para['lineTagged'] or nextIsTagged) and \
-                    not (spacerBetweenSections and not nextIsSameTag) and \
-                    not (not para['lineTagged'] and nextIsTagged and spacerBetweenDescriptionAndTags):
-                text += para['text']
-            else:
-                text += para['text'] + '\n *'
-
-        text = escape(text)
-        write(v, text)
 
+class JsdocsNextUndocumentedCommand(sublime_plugin.TextCommand):
+    """
+    Move the cursor to the next (or previous) function which has no DocBlock, wrapping around the end of the file
+    """
+    def run(self, edit, backwards=False):
+        v = self.view
+        starts, commentBlocks = getCommentBlocks(v)
+        undocumented, found = getDefinitionIndex(v).undocumented(starts, commentBlocks)
+        if not undocumented:
+            sublime.status_message('DocBlockr: all %d functions are documented' % found)
+            return
+
+        points = [point + len(indentation) for point, unused, indentation, unused, unused, unused in undocumented]
+        cursor = v.sel()[0].begin()
+        if backwards:
+            index = bisect_left(points, cursor) - 1
+        else:
+            index = bisect_right(points, cursor) % len(points)
+        point = points[index]
 
-class JsdocsTypescript(JsdocsParser):
-
-    def setupSettings(self):
-        identifier = '[a-zA-Z_$][a-zA-Z_$0-9]*'
-        base_type_identifier = r'%s(\.%s)*(\[\])?' % ((identifier, ) * 2)
-        parametric_type_identifier = r'%s(\s*<\s*%s(\s*,\s*%s\s*)*>)?' % ((base_type_identifier, ) * 3)
-        self.settings = {
-            # curly brackets around the type information
-            "curlyTypes": True,
-            'typeInfo': True,
-            "typeTag": "type",
-            # technically, they can contain all sorts of unicode, but w/e
-            "varIdentifier": identifier,
-            "fnIdentifier": identifier,
-            "fnOpener": 'function(?:\\s+' + identifier + ')?\\s*\\(',
-            "commentCloser": " */",
-            "bool": "Boolean",
-            "function": "Function",
-            "functionRE":
-                # Modifiers
-                r'(?:public|private|static)?\s*'
-                # Method name
-                + r'(?P<name>' + identifier + r')\s*'
-                # Params
-                + r'\((?P<args>.*)\)\s*'
-                # Return value
-                + r'(:\s*(?P<retval>' + parametric_type_identifier + r'))?',
-            "varRE":
-                r'((public|private|static|var)\s+)?(?P<name>' + identifier
-                + r')\s*(:\s*(?P<type>' + parametric_type_identifier
-                + r'))?(\s*=\s*(?P<val>.*?))?([;,]|$)'
-        }
-        self.functionRE = re.compile(self.settings['functionRE'])
-        self.varRE = re.compile(self.settings['varRE'])
+        v.sel().clear()
+        v.sel().add(sublime.Region(point))
+        v.show_at_center(point)
+        sublime.status_message('DocBlockr: %d of %d functions are undocumented' % (len(points), found))
 
-    def parseFunction(self, line):
-        line = line.strip()
-        res = self.functionRE.search(line)
 
-        if not res:
-            return None
-        group_dict = res.groupdict()
-        return (group_dict["name"], group_dict["args"], group_dict["retval"])
+class JsdocsShowDiagnosticsCommand(sublime_plugin.TextCommand):
+    """
+    Open a new tab with what development mode has recorded: the timings of recent commands, the slowest parses and the
+    exceptions which the parsers swallowed
+    """
+    def run(self, edit):
+        report = recorder.report() + '\nParse cache: %d definitions, %d hits, %d misses (%.0f%% hit rate)\n' % (
+            len(parseCache), parseCache.hits, parseCache.misses, parseCache.hitRate() * 100
+        )
+        if not getSettings(self.view).get('jsdocs_development_mode'):
+            report = 'Set "jsdocs_development_mode" to true to record the commands as they run.\n\n' + report
 
-    def getArgType(self, arg):
-        if ':' in arg:
-            return arg.split(':')[-1].strip()
-        return None
+        output = self.view.window().new_file()
+        output.set_name('DocBlockr diagnostics')
+        output.set_scratch(True)
+        output.run_command('append', {'characters': report})
 
-    def getArgName(self, arg):
-        if ':' in arg:
-            arg = arg.split(':')[0]
-        return arg.strip('[ \?]')
 
-    def parseVar(self, line):
-        res = self.varRE.search(line)
-        if not res:
-            return None
-        val = res.group('val')
-        if val: val = val.strip()
-        return (res.group('name'), val, res.group('type'))
-
-    def getFunctionReturnType(self, name, retval):
-        return retval if retval != 'void' else None
-
-    def guessTypeFromValue(self, val):
-        lowerPrimitives = self.viewSettings.get('jsdocs_lower_case_primitives') or False
-        if is_numeric(val):
-            return "number" if lowerPrimitives else "Number"
-        if val[0] == '"' or val[0] == "'":
-            return "string" if lowerPrimitives else "String"
-        if val[0] == '[':
-            return "Array"
-        if val[0] == '{':
-            return "Object"
-        if val == 'true' or val == 'false':
-            return "boolean" if lowerPrimitives else "Boolean"
-        if re.match('RegExp\\b|\\/[^\\/]', val):
-            return 'RegExp'
-        if val[:4] == 'new ':
-            res = re.search('new (' + self.settings['fnIdentifier'] + ')', val)
-            return res and res.group(1) or None
-        return None
+class JsdocsCacheListener(sublime_plugin.EventListener):
+    """
+    Keeps each view's definition index up to date as it is edited, and drops everything cached for a view once it
+    is closed.
+    """
+    def on_activated_async(self, view):
+        if isIndexed(view):
+            getDefinitionIndex(view)
+
+    def on_modified_async(self, view):
+        if isIndexed(view):
+            # the whole text is read for each update, so wait until the typing stops rather than doing it every key
+            changeCount = view.change_count()
+            sublime.set_timeout_async(
+                lambda: view.change_count() == changeCount and getDefinitionIndex(view), indexUpdateDelay
+            )
+
+    def on_post_save(self, view):
+        # saving with a new extension can change the syntax
+        _viewParserClassCache.pop(view.id(), None)
+
+    def on_close(self, view):
+        viewId = view.id()
+        _settingsCache.pop(viewId, None)
+        _viewParserClassCache.pop(viewId, None)
+        _commentBlockCache.pop(viewId, None)
+        _pendingParses.pop(viewId, None)
+        with _definitionIndexLock:
+            _definitionIndexCache.pop(viewId, None)
@@ -0,0 +1,4 @@
+"""
+DocBlockr's parsers and DocBlock generation, without any dependency on the editor. `jsdocs.py` builds its commands on
+top of this, and `python -m jsdocs_core` runs it over files from the command line.
+"""
@@ -0,0 +1,118 @@
+"""
+Audit or generate DocBlocks across a source tree from the command line:
+
+    python -m jsdocs_core audit src/            # list the functions without a DocBlock; exits with 1 if there are any
+    python -m jsdocs_core generate src/ lib/a.js  # add the missing DocBlocks, rewriting the files in place
+
+Files are spread across a pool of worker processes (`--jobs`, one per core by default).
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import time
+
+from .files import getParserClassForPath, loadSettings, documentText
+
+
+# directories which are never descended into
+skippedDirectories = frozenset(['node_modules', 'bower_components', 'vendor'])
+
+
+def findSourceFiles(paths):
+    """
+    Generate the files DocBlockr can parse, from a list of files and directories. Files which were named explicitly
+    are always included (so that a pre-commit hook can pass the staged files along); directories are searched for
+    files with a known extension, skipping hidden directories and installed dependencies.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            if getParserClassForPath(path):
+                yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(name for name in dirs if not name.startswith('.') and name not in skippedDirectories)
+            for name in sorted(files):
+                if getParserClassForPath(name):
+                    yield os.path.join(root, name)
+
+
+# the settings used by each worker process, set up once by `initWorker`
+_workerSettings = {}
+
+
+def initWorker(settingsPaths, write):
+    _workerSettings['settings'] = loadSettings(settingsPaths)
+    _workerSettings['write'] = write
+
+
+def processFile(path):
+    """
+    Document one file. Returns (path, [(line number, name), ...] of the undocumented definitions, definitions found,
+    error message or None)
+    """
+    try:
+        with io.open(path, encoding='utf-8', newline='') as sourceFile:
+            text = sourceFile.read()
+        write = _workerSettings['write']
+        output, missing, found = documentText(text, getParserClassForPath(path), _workerSettings['settings'], write)
+        if missing and write:
+            with io.open(path, 'w', encoding='utf-8', newline='') as sourceFile:
+                sourceFile.write(output)
+        return path, missing, found, None
+    except (IOError, OSError, UnicodeDecodeError) as e:
+        return path, [], 0, str(e)
+
+
+def main(argv=None):
+    argParser = argparse.ArgumentParser(prog='jsdocs_core', description='Audit or generate DocBlocks for source files.')
+    argParser.add_argument('action', choices=('audit', 'generate'),
+                           help='audit: list the functions without a DocBlock; generate: add them to the files')
+    argParser.add_argument('paths', nargs='+', metavar='path', help='files or directories to process')
+    argParser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+                           help='number of worker processes (default: one per core)')
+    argParser.add_argument('-s', '--settings', action='append', default=[], metavar='FILE',
+                           help='a .sublime-settings file to override the defaults with (may be repeated)')
+    argParser.add_argument('-q', '--quiet', action='store_true', help="don't print the summary")
+    args = argParser.parse_args(argv)
+
+    started = time.time()
+    write = args.action == 'generate'
+    paths = list(findSourceFiles(args.paths))
+    initArgs = (args.settings, write)
+
+    if args.jobs > 1 and len(paths) > 1:
+        pool = multiprocessing.Pool(min(args.jobs, len(paths)), initWorker, initArgs)
+        results = pool.imap_unordered(processFile, paths, chunksize=max(1, min(64, len(paths) // (args.jobs * 8))))
+    else:
+        pool = None
+        initWorker(*initArgs)
+        results = (processFile(path) for path in paths)
+
+    totalMissing = totalFound = errors = 0
+    try:
+        for path, missing, found, error in results:
+            if error:
+                errors += 1
+                sys.stderr.write('%s: %s\n' % (path, error))
+                continue
+            totalMissing += len(missing)
+            totalFound += found
+            for line, name in missing:
+                sys.stdout.write('%s:%d: %s %s\n' % (path, line, 'documented' if write else 'undocumented', name))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    if not args.quiet:
+        elapsed = max(time.time() - started, 0.001)
+        sys.stderr.write('%d files, %d definitions, %d %s in %.2fs (%d files/s, %d definitions/s)\n' % (
+            len(paths), totalFound, totalMissing, 'documented' if write else 'undocumented', elapsed,
+            len(paths) / elapsed, totalFound / elapsed
+        ))
+
+    if errors:
+        return 2
+    return 1 if totalMissing and not write else 0
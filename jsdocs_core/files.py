@@ -0,0 +1,135 @@
+"""
+Documenting source files outside the editor: choosing a parser from the file extension, finding the block comments
+without the help of a syntax definition, and reading the settings from the package's settings files.
+"""
+import json
+import os
+import re
+
+from .parsers import (
+    JsdocsSettings, JsdocsSnippetBuilder, findUndocumented, getParserInstance,
+    JsdocsJavascript, JsdocsPHP, JsdocsCoffee, JsdocsActionscript, JsdocsCPP, JsdocsObjC, JsdocsJava, JsdocsRust,
+    JsdocsTypescript
+)
+
+
+# file extension => parser class, matching the languages `getParserClass` picks from a scope name
+parserClassesByExtension = {
+    '.js': JsdocsJavascript,
+    '.mjs': JsdocsJavascript,
+    '.jsx': JsdocsJavascript,
+    '.php': JsdocsPHP,
+    '.coffee': JsdocsCoffee,
+    '.as': JsdocsActionscript,
+    '.hx': JsdocsActionscript,
+    '.c': JsdocsCPP,
+    '.h': JsdocsCPP,
+    '.cc': JsdocsCPP,
+    '.cpp': JsdocsCPP,
+    '.hpp': JsdocsCPP,
+    '.cu': JsdocsCPP,
+    '.m': JsdocsObjC,
+    '.mm': JsdocsObjC,
+    '.java': JsdocsJava,
+    '.groovy': JsdocsJava,
+    '.cls': JsdocsJava,
+    '.rs': JsdocsRust,
+    '.ts': JsdocsTypescript,
+    '.tsx': JsdocsTypescript,
+}
+
+
+def getParserClassForPath(path):
+    """
+    Return the parser class for a file, or None if DocBlockr doesn't know the language
+    """
+    return parserClassesByExtension.get(os.path.splitext(path)[1].lower())
+
+
+# the strings and comments of a C-like language. Only the block comments are kept, but the strings and line comments
+# have to be matched too, so that a "/*" inside one of them doesn't start a comment
+cLikeCommentRE = re.compile(
+    r'"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r'|`(?:[^`\\]|\\.)*`'
+    r'|//[^\n]*'
+    r'|(/\*.*?(?:\*/|$))',
+    re.DOTALL
+)
+phpCommentRE = re.compile(cLikeCommentRE.pattern + r'|#(?!\[)[^\n]*', re.DOTALL)
+coffeeCommentRE = re.compile(
+    r'"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r'|(###(?!#).*?(?:###|$))'
+    r'|#[^\n]*',
+    re.DOTALL
+)
+
+
+def findCommentBlocks(text, parserClass):
+    """
+    Return the start points and the (start, end) extents of the block comments in some source text, in the same form
+    as `getCommentBlocks` gives for a view. This is a textual scan rather than a syntax definition, so it can be
+    confused by things which only a real tokenizer would understand, such as a quote inside a regex literal.
+    """
+    if parserClass is JsdocsCoffee:
+        commentRE = coffeeCommentRE
+    elif parserClass is JsdocsPHP:
+        commentRE = phpCommentRE
+    else:
+        commentRE = cLikeCommentRE
+
+    blocks = [match.span(1) for match in commentRE.finditer(text) if match.group(1)]
+    return [start for start, end in blocks], blocks
+
+
+# where the default settings live, relative to this package
+baseSettingsPath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Base File.sublime-settings')
+
+
+def readSettingsFile(path):
+    """
+    Read a .sublime-settings file, which is JSON with comments and trailing commas allowed
+    """
+    with open(path) as settingsFile:
+        text = settingsFile.read()
+    # drop the comments (but not a "//" inside a string) and any commas before a closing bracket
+    text = re.sub(r'("(?:[^"\\]|\\.)*")|//[^\n]*|/\*.*?\*/', lambda m: m.group(1) or '', text, flags=re.DOTALL)
+    text = re.sub(r'("(?:[^"\\]|\\.)*")|,(\s*[}\]])', lambda m: m.group(1) or m.group(2), text)
+    return json.loads(text)
+
+
+def loadSettings(paths=()):
+    """
+    Build a settings snapshot from the package defaults, overridden by each of the given settings files in turn
+    """
+    values = {'tab_size': 4, 'rulers': []}
+    values.update(readSettingsFile(baseSettingsPath))
+    for path in paths:
+        values.update(readSettingsFile(path))
+    return JsdocsSettings(values)
+
+
+def documentText(text, parserClass, settings, generate=True):
+    """
+    Find the functions without a DocBlock in some source text. Returns the text with a DocBlock added above each of
+    them (or the text as it was, if `generate` is off), a list of the (line number, definition name) of each one, and
+    the number of definitions found.
+    """
+    parser = getParserInstance(parserClass, settings)
+    starts, blocks = findCommentBlocks(text, parserClass)
+    undocumented, found = findUndocumented(text, lambda point: parser, starts, blocks)
+    missing = [(entry[1] + 1, entry[4].name.strip()) for entry in undocumented]
+    if not generate or not undocumented:
+        return text, missing, found
+
+    builder = JsdocsSnippetBuilder(settings)
+    newline = '\r\n' if '\r\n' in text else '\n'
+    parts = []
+    last = 0
+    for point, unused, indentation, unused, parsed, definition in undocumented:
+        parts.append(text[last:point])
+        parts.append(builder.createBlock(parser, parsed, indentation, definition).replace('\n', newline))
+        last = point
+    parts.append(text[last:])
+    return ''.join(parts), missing, found
@@ -0,0 +1,175 @@
+"""
+What DocBlockr records about itself when `jsdocs_development_mode` is on: how long each stage of recent commands took
+and how many editor API calls they made, the slowest parses, and the exceptions which the parsers would otherwise
+swallow. Everything is kept in bounded buffers, so it can be left on.
+"""
+import heapq
+import time
+import traceback
+from collections import deque
+
+try:
+    # monotonic, so that timings aren't thrown by the clock being changed
+    clock = time.perf_counter
+except AttributeError:
+    clock = time.time
+
+
+def excerpt(text, length=80):
+    text = ' '.join(text.split())
+    return text if len(text) <= length else text[:length - 3] + '...'
+
+
+class JsdocsStage(object):
+    """
+    Times a `with` block, adding it to the stages of an invocation.
+    """
+    __slots__ = ('invocation', 'name', 'started')
+
+    def __init__(self, invocation, name):
+        self.invocation = invocation
+        self.name = name
+
+    def __enter__(self):
+        self.started = clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.invocation.stages.append((self.name, (clock() - self.started) * 1e3))
+        return False
+
+
+class JsdocsInvocation(object):
+    """
+    One run of a command: its stages, in the order they ran, and the number of each API call it made.
+    """
+    def __init__(self, name, recorder):
+        self.name = name
+        self.recorder = recorder
+        self.started = time.time()
+        self.begun = clock()
+        self.total = None
+        self.stages = []
+        self.calls = {}
+
+    def stage(self, name):
+        return JsdocsStage(self, name)
+
+    def count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def recordParse(self, parserName, definition):
+        """
+        Record the parse which was timed by the last stage, so that the slowest ones are kept
+        """
+        self.recorder.recordParse(self.stages[-1][1], parserName, definition)
+
+    def finish(self):
+        self.total = (clock() - self.begun) * 1e3
+
+    def stageTotals(self):
+        """
+        The time spent in each stage, adding together the stages which ran more than once (eg: for each cursor)
+        """
+        totals = []
+        seen = {}
+        for name, ms in self.stages:
+            if name in seen:
+                totals[seen[name]][1] += ms
+            else:
+                seen[name] = len(totals)
+                totals.append([name, ms])
+        return totals
+
+
+class JsdocsNullStage(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class JsdocsNullInvocation(object):
+    """
+    Stands in for an invocation when development mode is off, so that the commands don't need to check
+    """
+    __slots__ = ()
+    nullStage = JsdocsNullStage()
+
+    def stage(self, name):
+        return self.nullStage
+
+    def count(self, name):
+        pass
+
+    def recordParse(self, parserName, definition):
+        pass
+
+    def finish(self):
+        pass
+
+
+nullInvocation = JsdocsNullInvocation()
+
+
+class JsdocsInstrumentation(object):
+
+    def __init__(self, invocations=50, slowest=10, errors=20):
+        self.invocations = deque(maxlen=invocations)
+        self.maxSlowest = slowest
+        # a min-heap of (ms, sequence number, parser name, definition), so the fastest of them is the one dropped
+        self.slowestParses = []
+        self.parses = 0
+        self.errors = deque(maxlen=errors)
+
+    def begin(self, name):
+        invocation = JsdocsInvocation(name, self)
+        self.invocations.append(invocation)
+        return invocation
+
+    def recordParse(self, ms, parserName, definition):
+        self.parses += 1
+        entry = (ms, self.parses, parserName, excerpt(definition))
+        if len(self.slowestParses) < self.maxSlowest:
+            heapq.heappush(self.slowestParses, entry)
+        elif ms > self.slowestParses[0][0]:
+            heapq.heapreplace(self.slowestParses, entry)
+
+    def recordException(self, parserName, definition):
+        """
+        Record the exception being handled, along with the definition which caused it
+        """
+        self.errors.append((time.time(), parserName, excerpt(definition), traceback.format_exc()))
+
+    def report(self):
+        out = ['DocBlockr development mode', '']
+
+        out.append('Recent commands (newest first):')
+        for invocation in reversed(self.invocations):
+            stages = '  '.join('%s %.2fms' % (name, ms) for name, ms in invocation.stageTotals())
+            calls = ', '.join('%s %d' % item for item in sorted(invocation.calls.items()))
+            out.append('  %s  %-16s %8s  %s' % (
+                time.strftime('%H:%M:%S', time.localtime(invocation.started)), invocation.name,
+                '%.2fms' % invocation.total if invocation.total is not None else 'running', stages
+            ))
+            if calls:
+                out.append('      calls: ' + calls)
+        out.append('')
+
+        out.append('Slowest parses (of %d):' % self.parses)
+        for ms, unused, parserName, definition in sorted(self.slowestParses, reverse=True):
+            out.append('  %8.2fms  %-20s %s' % (ms, parserName, definition))
+        out.append('')
+
+        out.append('Exceptions while parsing (newest first):')
+        for started, parserName, definition, trace in reversed(self.errors):
+            out.append('  %s  %s  %s' % (time.strftime('%H:%M:%S', time.localtime(started)), parserName, definition))
+            out.extend('      ' + line for line in trace.rstrip().split('\n'))
+        return '\n'.join(out) + '\n'
+
+
+# everything recorded in this session
+recorder = JsdocsInstrumentation()
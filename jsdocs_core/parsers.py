@@ -0,0 +1,2092 @@
+"""
+The parts of DocBlockr which don't need the editor: the settings snapshot, the language parsers, and turning what they
+parse into DocBlocks. Everything here works on plain strings, so it can be used by the commands in jsdocs.py, or on
+files from the command line (see cli.py).
+"""
+import re
+import datetime
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from itertools import count, islice
+
+from .instrumentation import recorder
+
+
+# The settings which are read into a JsdocsSettings snapshot, with the type each value is coerced to (None leaves the
+# value as it is, for settings which accept several types, eg: `jsdocs_align_tags`)
+SNAPSHOT_KEYS = (
+    ('jsdocs_align_tags', None),
+    ('jsdocs_autoadd_method_tag', bool),
+    ('jsdocs_decorate', bool),
+    ('jsdocs_deep_indent', bool),
+    ('jsdocs_development_mode', bool),
+    ('jsdocs_extend_double_slash', bool),
+    ('jsdocs_extra_tags', tuple),
+    ('jsdocs_extra_tags_go_after', bool),
+    ('jsdocs_function_description', bool),
+    ('jsdocs_indentation_spaces', int),
+    ('jsdocs_indentation_spaces_same_para', int),
+    ('jsdocs_lower_case_primitives', bool),
+    ('jsdocs_min_spaces_between_columns', int),
+    ('jsdocs_newline_after_block', bool),
+    ('jsdocs_notation_map', tuple),
+    ('jsdocs_override_js_var', None),
+    ('jsdocs_param_description', bool),
+    ('jsdocs_param_name', bool),
+    ('jsdocs_per_section_indent', bool),
+    ('jsdocs_quick_open_inline', bool),
+    ('jsdocs_return_description', bool),
+    ('jsdocs_return_tag', None),
+    ('jsdocs_short_primitives', bool),
+    ('jsdocs_simple_mode', bool),
+    ('jsdocs_spacer_between_sections', None),
+    ('jsdocs_wrap_optimal', bool),
+    ('rulers', tuple),
+    ('tab_size', int),
+)
+
+# snapshots with identical values share a revision number, so anything derived from the settings can be reused
+# between views which are configured the same way. Snapshots are taken on the async thread too, so the revisions are
+# handed out under a lock
+_settingsRevisions = {}
+_settingsRevisionCounter = count(1)
+_settingsRevisionsLock = threading.Lock()
+
+
+class JsdocsSettings(object):
+    """
+    An immutable snapshot of the settings DocBlockr uses, read from a view's settings in one go. Each call to
+    `Settings.get()` goes across to the plugin host, so the commands and parsers read from one of these instead.
+    """
+    __slots__ = ('_values', 'revision')
+
+    def __init__(self, viewSettings):
+        values = {}
+        for key, coerce in SNAPSHOT_KEYS:
+            value = viewSettings.get(key)
+            if value is not None and coerce is not None:
+                value = coerce(value)
+            values[key] = value
+        object.__setattr__(self, '_values', values)
+        key = repr(sorted(values.items()))
+        with _settingsRevisionsLock:
+            revision = _settingsRevisions.get(key)
+            if revision is None:
+                revision = _settingsRevisions[key] = next(_settingsRevisionCounter)
+        object.__setattr__(self, 'revision', revision)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('JsdocsSettings is read-only')
+
+    def get(self, key, default=None):
+        value = self._values.get(key)
+        return default if value is None else value
+
+
+# an escaped character, a tab stop with a placeholder (eg: "${1:foo}") or a bare tab stop (eg: "$0")
+snippetTokenRE = re.compile(r'\\([${}])|\$\{(\d+):((?:[^\\}]|\\.)*)\}|\$(\d+)')
+
+
+def expandSnippet(snippet):
+    """
+    Return the plain text which a snippet would insert, and the (start, end) offsets of its first tab stop in that
+    text. Without any tab stops, the offsets are both the end of the text.
+    """
+    parts = []
+    length = 0
+    last = 0
+    fields = {}
+    for match in snippetTokenRE.finditer(snippet):
+        literal = snippet[last:match.start()]
+        escaped, number, value, bareNumber = match.groups()
+        if escaped is not None:
+            text = escaped
+        else:
+            text = re.sub(r'\\([${}])', r'\1', value) if number else ''
+            fields.setdefault(int(number or bareNumber), (length + len(literal), length + len(literal) + len(text)))
+        parts.append(literal)
+        parts.append(text)
+        length += len(literal) + len(text)
+        last = match.end()
+    parts.append(snippet[last:])
+    text = ''.join(parts)
+
+    # tab stop 0 is the last one, and the others are visited in order
+    numbers = sorted(fields, key=lambda number: (number == 0, number))
+    return text, fields[numbers[0]] if numbers else (len(text), len(text))
+
+
+def counter():
+    count = 0
+    while True:
+        count += 1
+        yield(count)
+
+
+def escape(str):
+    return str.replace('$', '\$').replace('{', '\{').replace('}', '\}')
+
+
+def is_numeric(val):
+    try:
+        float(val)
+        return True
+    except ValueError:
+        return False
+
+
+# (parser class, settings revision) => parser instance
+_parserCache = {}
+
+
+# the language named by the first `source.*` scope in a scope name, eg: "c++" for "source.c++ meta.function.c++"
+sourceLanguageRE = re.compile(r'\bsource\.([a-z+\-]+)')
+
+
+def getParserClass(scope):
+    """
+    Return the parser class for the language of a scope name, falling back to Javascript.
+    """
+    res = sourceLanguageRE.search(scope)
+    return parserClassesByLanguage.get(res.group(1) if res else 'js', JsdocsJavascript)
+
+
+class JsdocsParseCache(object):
+    """
+    A bounded cache of the tags generated for each definition. Entries are kept in two generations: whenever the
+    newer one fills up, it becomes the older one and the previous older one is dropped, along with every entry which
+    wasn't used while it was the newer one. Entries used from the older generation are moved into the newer one.
+    """
+    def __init__(self, size=512):
+        self.size = size
+        self.clear()
+
+    def clear(self):
+        self.recent = {}
+        self.older = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        # each generation is only read with a single dict operation, so a parse on another thread turning the
+        # generations over can't make a lookup fail (at worst, an entry is parsed again)
+        value = self.recent.get(key, notCached)
+        if value is notCached:
+            value = self.older.pop(key, notCached)
+            if value is notCached:
+                self.misses += 1
+                return default
+            self.put(key, value)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if len(self.recent) >= self.size // 2:
+            self.older = self.recent
+            self.recent = {}
+        self.recent[key] = value
+
+    def __len__(self):
+        return len(self.recent) + len(self.older)
+
+    def hitRate(self):
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+
+class JsdocsParseRequest(tuple):
+    """
+    What a definition is being parsed for: whether the DocBlock will be inline (`/** ... */` on one line), and the
+    text after the cursor, which is used as the description instead of the one made from the definition. It is passed
+    to each parse rather than kept on the parser, so one parser can be used by any number of commands at once.
+    """
+    __slots__ = ()
+
+    def __new__(cls, inline=False, nameOverride=None):
+        return tuple.__new__(cls, (bool(inline), nameOverride or None))
+
+    @property
+    def inline(self):
+        return self[0]
+
+    @property
+    def nameOverride(self):
+        return self[1]
+
+
+defaultRequest = JsdocsParseRequest()
+
+# (parser class, settings revision, definition, request) => the tags for it
+parseCache = JsdocsParseCache()
+notCached = object()
+
+
+def getParserInstance(parserClass, settings):
+    """
+    Return a parser of the given class for a settings snapshot. Setting up a parser builds and compiles all of its
+    patterns, so each one is only created once per settings revision and then reused.
+    """
+    key = (parserClass, settings.revision)
+    parser = _parserCache.get(key)
+    if parser is None:
+        parser = _parserCache[key] = parserClass(settings)
+    return parser
+
+
+# settings revision => JsdocsNotationIndex
+_notationIndexCache = {}
+
+
+def getNotationIndex(settings):
+    """
+    Return the compiled jsdocs_notation_map for a settings snapshot, building it the first time the revision is seen.
+    """
+    index = _notationIndexCache.get(settings.revision)
+    if index is None:
+        index = _notationIndexCache[settings.revision] = JsdocsNotationIndex(settings.get('jsdocs_notation_map', ()))
+    return index
+
+
+class JsdocsNotationIndex(object):
+    """
+    A notation map compiled for repeated lookups. Prefix rules are stored in a trie which is walked once per name, and
+    regex rules are only tested one at a time once a combined alternation of them has matched. The rules which match
+    each name are remembered.
+    """
+    maxCachedNames = 1024
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        # each trie node is [children by character, [(rule index, must be followed by [A-Z_] or the end)]]
+        self.trie = [{}, []]
+        # regex rules which can share one alternation, and those which can't (eg: they use backreferences)
+        combinable = []
+        self.regexRules = []
+        self.separateRegexRules = []
+        self.cache = {}
+
+        for index, rule in enumerate(self.rules):
+            if 'prefix' in rule:
+                prefix = rule['prefix']
+                node = self.trie
+                for char in prefix:
+                    node = node[0].setdefault(char, [{}, []])
+                node[1].append((index, re.match('.*[a-z]', prefix) is not None))
+            elif 'regex' in rule:
+                regex = re.compile(rule['regex'])
+                if regex.groups:
+                    self.separateRegexRules.append((index, regex))
+                else:
+                    self.regexRules.append((index, regex))
+                    combinable.append('(?:%s)' % rule['regex'])
+
+        self.combinedRE = None
+        if combinable:
+            try:
+                self.combinedRE = re.compile('|'.join(combinable))
+            except re.error:
+                # eg: a rule which sets global flags part way through; test each of these rules on its own instead
+                self.separateRegexRules = sorted(self.separateRegexRules + self.regexRules)
+                self.regexRules = []
+
+    def match(self, name):
+        """
+        Return a tuple of the rules which match the name, in the order they were defined.
+        """
+        if not self.rules:
+            return ()
+
+        matched = self.cache.get(name)
+        if matched is not None:
+            return matched
+
+        indices = []
+        node = self.trie
+        length = len(name)
+        position = 0
+        while node:
+            for index, needsBoundary in node[1]:
+                if not needsBoundary or position == length or name[position] == '_' or 'A' <= name[position] <= 'Z':
+                    indices.append(index)
+            if position == length:
+                break
+            node = node[0].get(name[position])
+            position += 1
+
+        if self.combinedRE and self.combinedRE.search(name):
+            indices.extend(index for index, regex in self.regexRules if regex.search(name))
+        indices.extend(index for index, regex in self.separateRegexRules if regex.search(name))
+
+        matched = tuple(self.rules[index] for index in sorted(indices))
+        if len(self.cache) >= self.maxCachedNames:
+            self.cache.clear()
+        self.cache[name] = matched
+        return matched
+
+
+# a whole (possibly unterminated) quoted string, a bracketed group which holds no quotes or brackets, or a single
+# comma or bracket
+argumentTokenRE = re.compile(
+    '"(?:[^"\\\\]+|\\\\.)*"?'
+    + "|'(?:[^'\\\\]+|\\\\.)*'?"
+    + '|`(?:[^`\\\\]+|\\\\.)*`?'
+    + '|\\([^"\'`(){}\\[\\]<>]*\\)'
+    + '|\\{[^"\'`(){}\\[\\]<>]*\\}'
+    + '|\\[[^"\'`(){}\\[\\]<>]*\\]'
+    + '|<[^"\'`(){}\\[\\]<>]*>'
+    + '|[,(){}\\[\\]<>]'
+)
+
+# opening brackets, and the character which closes each of them
+argumentBrackets = {'(': ')', '{': '}', '[': ']', '<': '>'}
+
+
+def argumentSpans(str):
+    """
+    Find the arguments in a string separated by unenclosed commas: that is, commas which are not inside of quotes or
+    (nested) brackets. Returns a list of (start, end) slices of the string, with surrounding whitespace excluded.
+    argumentSpans('foo, bar(baz, quux)') ==> [(0, 3), (5, 19)]
+    """
+    spans = []
+
+    if not str:
+        return spans
+
+    # the closing characters of the brackets which are currently open, innermost last
+    closers = []
+    start = 0
+
+    for match in argumentTokenRE.finditer(str):
+        char = match.group(0)
+        if char == ',':
+            if not closers:
+                index = match.start()
+                spans.append(trimSpan(str, start, index))
+                start = index + 1
+        elif char in argumentBrackets:
+            closers.append(argumentBrackets[char])
+        elif char in closers:
+            # close the matching bracket, along with any which were left open inside it (eg: `a < b` isn't a bracket)
+            while closers.pop() != char:
+                pass
+
+    spans.append(trimSpan(str, start, len(str)))
+    return spans
+
+
+def trimSpan(str, start, end):
+    """
+    Shrink a (start, end) slice of a string so that it excludes any leading and trailing whitespace.
+    """
+    while start < end and str[start].isspace():
+        start += 1
+    while end > start and str[end - 1].isspace():
+        end -= 1
+    return (start, end)
+
+
+# the characters which change what a scanner is in the middle of: comment markers, quotes, escaped characters and
+# round brackets
+scannerTokenRE = re.compile(r'//|/\*|\*/|\\.|[\'"`()]')
+
+
+class JsdocsBracketScanner(object):
+    """
+    Reads code a line at a time, keeping count of the round brackets which are open. Brackets in strings and comments
+    aren't counted, and a block comment or template string (`...`) which is still open at the end of a line carries
+    on into the next one, so a definition can be read one line after another, in a single pass.
+    """
+    __slots__ = ('quotes', 'depth', 'quote', 'inComment')
+
+    def __init__(self, quotes='\'"`'):
+        # the characters which start and end a string in the language
+        self.quotes = quotes
+        self.depth = 0
+        self.quote = None
+        self.inComment = False
+
+    def feed(self, line, countFrom=0):
+        """
+        Read the next line, and return it with its comments taken out. Brackets before `countFrom` are skipped over
+        without being counted.
+        """
+        if not self.quote and not self.inComment and '/' not in line and not any(q in line for q in self.quotes):
+            self.depth += line.count('(', countFrom) - line.count(')', countFrom)
+            return line
+
+        out = []
+        # the start of the code which hasn't been put into `out` yet, or None while in a comment
+        codeStart = None if self.inComment else 0
+        for match in scannerTokenRE.finditer(line):
+            token = match.group(0)
+            if self.inComment:
+                if token == '*/':
+                    self.inComment = False
+                    codeStart = match.end()
+            elif self.quote:
+                if token == self.quote:
+                    self.quote = None
+            elif token == '//':
+                out.append(line[codeStart:match.start()])
+                codeStart = None
+                break
+            elif token == '/*':
+                out.append(line[codeStart:match.start()])
+                self.inComment = True
+                codeStart = None
+            elif token in self.quotes:
+                self.quote = token
+            elif token in '()' and match.start() >= countFrom:
+                self.depth += 1 if token == '(' else -1
+
+        if codeStart is not None:
+            out.append(line[codeStart:])
+        # only template strings can carry on past the end of a line
+        if self.quote != '`':
+            self.quote = None
+        return ''.join(out)
+
+
+def splitByCommas(str):
+    """
+    Split a string by unenclosed commas: that is, commas which are not inside of quotes or brackets.
+    splitByCommas('foo, bar(baz, quux), fwip = "hey, hi"')
+     ==> ['foo', 'bar(baz, quux)', 'fwip = "hey, hi"']
+    """
+    return [str[start:end] for start, end in argumentSpans(str)]
+
+
+def flatten(theList):
+    """
+    Flatten a shallow list. Only works when all items are lists.
+    [[(1,1)], [(2,2), (3, 3)]] --> [(1,1), (2,2), (3,3)]
+    """
+    return [item for sublist in theList for item in sublist]
+
+# goes in front of a pattern which starts with an identifier, so that searching a long line doesn't try to match it
+# from every character of every word, which takes quadratic time (eg: on a line of minified code)
+notInWord = r'(?<![a-zA-Z_$0-9])'
+
+
+# a tab stop written into snippet text, eg: "${1:foo}"
+tabStopRE = re.compile('(\\$\\{)\\d+(:[^}]+\\})')
+
+# the name of the tag which a line of snippet text starts with, eg: "@param {Foo} bar" ==> "param"
+tagNameRE = re.compile('^\\s*@([a-zA-Z]+)')
+
+
+def snippetWidth(text):
+    """
+    The length of some snippet text once it has been inserted, ignoring the backslashes which escape '$', '{' and '}'
+    """
+    if '\\' not in text:
+        return len(text)
+    return len(text) - text.count('\\$') - text.count('\\{') - text.count('\\}')
+
+
+def makeIndentRules(extraIndent):
+    """
+    The patterns which find where the next line of a DocBlock should be indented to, tried in order: in line with the
+    description of a @param or a @return, after any other tag, or after the asterisk. `extraIndent` matches the type
+    of the tag, in languages which have them.
+    """
+    return (
+        re.compile("^\\s*\\*(?P<fromStar>\\s*@(?:param|property)%s\\s+\\S+\\s+)\\S" % extraIndent),
+        re.compile("^\\s*\\*(?P<fromStar>\\s*@(?:returns?|define)%s\\s+\\S+\\s+)\\S" % extraIndent),
+        re.compile("^\\s*\\*(?P<fromStar>\\s*@[a-z]+\\s+)\\S"),
+        re.compile("^\\s*\\*(?P<fromStar>\\s*)"),
+    )
+
+
+# whether a language puts types on its tags => its indent rules
+indentRules = {
+    True: makeIndentRules('\\s+\\S+'),
+    False: makeIndentRules(''),
+}
+
+# (whether the language has types, line) => what getIndentColumns returns for it
+_indentColumnsCache = {}
+
+
+def getIndentColumns(line, hasTypes):
+    """
+    Return (the column after the asterisk, how many columns after the asterisk to indent to) for the line which follows
+    `line` in a DocBlock, or None if `line` doesn't start with an asterisk. The answer for each line is cached, so
+    pressing tab over and over below the same line doesn't match it again.
+    """
+    key = (hasTypes, line)
+    if key in _indentColumnsCache:
+        return _indentColumnsCache[key]
+    columns = None
+    for rule in indentRules[hasTypes]:
+        res = rule.search(line)
+        if res:
+            columns = (res.start('fromStar'), len(res.group('fromStar')))
+            break
+    if len(_indentColumnsCache) >= 1000:
+        _indentColumnsCache.clear()
+    _indentColumnsCache[key] = columns
+    return columns
+
+
+class JsdocsField(object):
+    """
+    One column of a line in a DocBlock, such as the type or the name of a @param. If `placeholder` is set, the value
+    becomes a tab stop, with the prefix and suffix around it (eg: the curly braces around a type).
+    """
+    __slots__ = ('prefix', 'value', 'suffix', 'placeholder', 'width')
+
+    def __init__(self, value, placeholder=False, prefix='', suffix=''):
+        self.prefix = prefix
+        self.value = value
+        self.suffix = suffix
+        self.placeholder = placeholder
+        self.width = snippetWidth(prefix) + snippetWidth(value) + snippetWidth(suffix)
+
+    @classmethod
+    def fromText(cls, text):
+        """
+        A field holding snippet text as it was written (eg: in jsdocs_extra_tags), which may contain its own tab stops
+        """
+        field = cls(text)
+        if '${' in text:
+            field.width = snippetWidth(tabStopRE.sub(lambda m: m.group(2)[1:-1], text))
+        return field
+
+    def render(self, tabIndex):
+        if self.placeholder:
+            return '%s${%d:%s}%s' % (self.prefix, next(tabIndex), self.value, self.suffix)
+        return self.prefix + self.value + self.suffix
+
+
+class JsdocsTag(object):
+    """
+    One line of a DocBlock: a description, or a tag and its fields. Lines which were given as text (`raw`) keep their
+    own tab stops, which are renumbered when the line is rendered.
+    """
+    __slots__ = ('fields', 'name', 'raw')
+
+    def __init__(self, fields, raw=False, name=None):
+        self.fields = fields
+        self.raw = raw
+        if name is None and not fields[0].placeholder:
+            res = tagNameRE.match(fields[0].value)
+            name = res.group(1) if res else None
+        self.name = name
+
+    @classmethod
+    def fromText(cls, text):
+        res = tagNameRE.match(text)
+        if text.startswith('@'):
+            fields = [JsdocsField.fromText(part) for part in text.split(' ')]
+        else:
+            fields = [JsdocsField.fromText(text)]
+        return cls(fields, True, res.group(1) if res else None)
+
+    def startswith(self, text):
+        first = self.fields[0]
+        return not first.placeholder and (first.prefix + first.value).startswith(text)
+
+    def render(self, tabIndex, gaps=None):
+        """
+        Join the fields together, separated by single spaces or by the given number of spaces after each field.
+        """
+        if gaps is None:
+            line = ' '.join([field.render(tabIndex) for field in self.fields])
+        else:
+            line = ''.join([
+                field.render(tabIndex) + ' ' * gap for field, gap in zip(self.fields, gaps)
+            ]).strip()
+        if self.raw and '${' in line:
+            line = tabStopRE.sub(lambda m: '%s%d%s' % (m.group(1), next(tabIndex), m.group(2)), line)
+        return line
+
+
+class JsdocsSnippetBuilder(object):
+    """
+    Turns the tags which a parser generates into the text of a snippet, following the settings for alignment and
+    spacing. The DocBlockr commands are builders themselves; elsewhere, one can be created from a settings snapshot.
+    """
+    def __init__(self, settings):
+        self.configure(settings)
+        self.parser = None
+        self.trailingString = ''
+
+    def configure(self, settings):
+        self.settings = settings
+
+        self.indentSpaces = " " * max(0, self.settings.get("jsdocs_indentation_spaces", 1))
+        self.prefix = "*"
+
+        settingsAlignTags = self.settings.get("jsdocs_align_tags", 'deep')
+        self.deepAlignTags = settingsAlignTags == 'deep'
+        self.shallowAlignTags = settingsAlignTags in ('shallow', True)
+
+    def generateSnippet(self, out, inline=False):
+        if out:
+            out = [tag if isinstance(tag, JsdocsTag) else JsdocsTag.fromText(tag) for tag in out]
+
+            # substitute any variables in the tags
+            out = self.substituteVariables(out)
+
+        # align the tags
+        if out and (self.shallowAlignTags or self.deepAlignTags) and not inline:
+            gaps = self.alignTags(out)
+        else:
+            gaps = [None] * len(out or ())
+
+        # render each line, numbering the tab stops consecutively
+        tabIndex = counter()
+        lines = [tag.render(tabIndex, tagGaps) for tag, tagGaps in zip(out or (), gaps)]
+
+        if inline:
+            if lines:
+                return " " + lines[0] + " */"
+            else:
+                return " $0 */"
+        else:
+            return self.createSnippet(out, lines) + ('\n' if self.settings.get('jsdocs_newline_after_block') else '')
+
+    def alignTags(self, out):
+        """
+        Work out how many spaces should follow each field of each tag so that the columns line up. Returns a list of
+        the spaces after each field for every tag, or None for the lines which shouldn't be aligned.
+        """
+        # the widest field in each column
+        maxWidths = []
+
+        # Grab the return tag if required.
+        if self.settings.get('jsdocs_per_section_indent'):
+            returnTag = self.settings.get('jsdocs_return_tag') or '@return'
+        else:
+            returnTag = False
+
+        for tag in out:
+            if tag.startswith('@'):
+                # Ignore the return tag if we're doing per-section indenting.
+                if returnTag and tag.startswith(returnTag):
+                    continue
+                # ignore all the words after `@author`
+                if tag.startswith('@author'):
+                    widths = [len('@author')]
+                elif self.shallowAlignTags:
+                    widths = [tag.fields[0].width]
+                else:
+                    widths = [field.width for field in tag.fields]
+                for i, width in enumerate(widths):
+                    if i == len(maxWidths):
+                        maxWidths.append(width)
+                    elif width > maxWidths[i]:
+                        maxWidths[i] = width
+
+        # Minimum spaces between line columns
+        minColSpaces = max(0, self.settings.get('jsdocs_min_spaces_between_columns', 1))
+
+        gaps = []
+        for tag in out:
+            # format the spacing of columns, but ignore the author tag. (See #197)
+            if tag.startswith('@') and not tag.startswith('@author'):
+                gaps.append([
+                    minColSpaces + max(0, (maxWidths[i] if i < len(maxWidths) else 0) - field.width)
+                    for i, field in enumerate(tag.fields)
+                ])
+            else:
+                gaps.append(None)
+
+        return gaps
+
+    def substituteVariables(self, out):
+        def getVar(match):
+            varName = match.group(1)
+            if varName == 'datetime':
+                date = datetime.datetime.now().replace(microsecond=0)
+                offset = time.timezone / -3600.0
+                return "%s%s%02d%02d" % (
+                    date.isoformat(),
+                    '+' if offset >= 0 else "-",
+                    abs(offset),
+                    (offset % 1) * 60
+                )
+            elif varName == 'date':
+                return datetime.date.today().isoformat()
+            else:
+                return match.group(0)
+
+        def subField(field):
+            if '{{' in field.value:
+                return JsdocsField.fromText(re.sub(r'\{\{([^}]+)\}\}', getVar, field.value))
+            return field
+
+        # variables can only come from the text of tags given in the settings
+        return [JsdocsTag(list(map(subField, tag.fields)), True, tag.name) if tag.raw else tag for tag in out]
+
+    def createSnippet(self, out, lines):
+        closer = self.parser.settings['commentCloser']
+        if out:
+            linePrefix = "\n " + self.prefix
+            snippet = "".join([
+                linePrefix + (self.indentSpaces + line if line else "") for line in self.sectionLines(out, lines)
+            ])
+        else:
+            snippet = "\n " + self.prefix + self.indentSpaces + "${0:" + self.trailingString + '}'
+
+        return snippet + "\n" + closer
+
+    def sectionLines(self, out, lines):
+        """
+        Yield the rendered lines of a DocBlock in order, with empty lines between its sections as configured by
+        `jsdocs_spacer_between_sections`.
+        """
+        spacer = self.settings.get('jsdocs_spacer_between_sections')
+        if spacer == True:
+            # a new section starts whenever the tag changes, and with no description there's nothing before the first
+            noDescription = self.settings.get('jsdocs_function_description') == False
+            lastTag = None
+            for tag, line in zip(out, lines):
+                if tag.name and tag.name != lastTag:
+                    if lastTag is not None or not noDescription:
+                        yield ""
+                    lastTag = tag.name
+                yield line
+        elif spacer == 'after_description' and self.settings.get('jsdocs_function_description'):
+            # only the first tag is separated from what comes before it
+            seenTag = False
+            for tag, line in zip(out, lines):
+                if tag.name and not seenTag:
+                    yield ""
+                    seenTag = True
+                yield line
+        else:
+            for line in lines:
+                yield line
+
+    def createBlock(self, parser, parsed, indentation, definition=None):
+        """
+        Generate the text of a DocBlock for a parsed definition, indented to match it. Given the text of the definition
+        too, the tags can come from the parse cache.
+        """
+        self.parser = parser
+
+        out = None
+        if definition is not None:
+            out = parser.parse(definition, parsed)
+        elif not self.settings.get('jsdocs_simple_mode'):
+            out = parser.formatFunction(parsed)
+
+        text, unused = expandSnippet(parser.commentOpener + self.generateSnippet(out))
+        return '\n'.join([indentation + line if line else line for line in text.split('\n')]) + '\n'
+
+
+class JsdocsParam(object):
+    """
+    One argument of a function definition: its type, if the definition gives it or it can be guessed (eg: from a
+    default value), and its name.
+    """
+    __slots__ = ('type', 'name')
+
+    def __init__(self, type, name):
+        self.type = type
+        self.name = name
+
+
+class JsdocsSignature(object):
+    """
+    What a parser reads from a function definition: its name, its arguments (JsdocsParams), the return type written in
+    the definition, the exceptions it says it throws, and whether it is a setter.
+    """
+    __slots__ = ('name', 'params', 'retval', 'throws', 'isSetter')
+
+    def __init__(self, name, params=(), retval=None, throws=(), isSetter=False):
+        self.name = name
+        self.params = params
+        self.retval = retval
+        self.throws = throws
+        self.isSetter = isSetter
+
+
+class JsdocsParser(object):
+
+    existingCommentRE = re.compile('^\\s*\\*')
+    inlineCommentRE = re.compile(r'/\*.*?\*/')
+    lineCommentRE = re.compile(r"//.*")
+    blockCommentRE = re.compile(r"/\*.*\*/")
+    classNameRE = re.compile("[A-Z]")
+    setterNameRE = re.compile('[$_]?(?:set|add)($|[A-Z_])')
+    boolFunctionNameRE = re.compile('[$_]?(?:is|has)($|[A-Z_])')
+    boolNameRE = re.compile("(?:is|has)[A-Z_]")
+    callbackNameRE = re.compile("^(?:cb|callback|done|next|fn)$")
+    regexpValueRE = re.compile('RegExp\\b|\\/[^\\/]')
+    # lines above a definition which belong to it (eg: annotations or decorators), if the language has them
+    annotationRE = None
+    # what a DocBlock starts with, when one is written without the user having typed it
+    commentOpener = '/**'
+    # the characters which start and end a string
+    quoteCharacters = '\'"`'
+    # how many lines a definition is read from, at most
+    maxDefinitionLines = 25
+    # definitions longer than this (eg: a line of minified code) aren't parsed, and get the same block as simple mode.
+    # Some of the patterns take quadratic time on the worst lines, and this keeps each parse within a few milliseconds
+    maxDefinitionLength = 4000
+
+    def __init__(self, viewSettings):
+        self.viewSettings = viewSettings
+        self.setupSettings()
+        self.fnOpenerRE = re.compile(self.settings['fnOpener']) if self.settings['fnOpener'] else None
+        self.newRE = re.compile('new (' + self.settings['fnIdentifier'] + ')')
+        self.notations = getNotationIndex(viewSettings)
+
+    def isExistingComment(self, line):
+        return self.existingCommentRE.search(line)
+
+    def parse(self, line, parsed=None, request=defaultRequest):
+        """
+        `parsed` is the JsdocsSignature for the line, when it is already known (eg: from a definition index).
+        The tags are kept in `parseCache`, so the same definition isn't parsed again while it's still in there. They
+        are returned as a tuple, since the same one is given to everyone who asks for that definition.
+        """
+        if self.viewSettings.get('jsdocs_simple_mode') or len(line) > self.maxDefinitionLength:
+            return None
+
+        # only the indentation is left out of the key: anything else, even spaces in a default value, can end up in
+        # the tags
+        key = (type(self), self.viewSettings.revision, line.lstrip(), request)
+        out = parseCache.get(key, notCached)
+        if out is notCached:
+            try:
+                out = self.formatDefinition(line, parsed, request)
+            except Exception:
+                if self.viewSettings.get('jsdocs_development_mode'):
+                    recorder.recordException(type(self).__name__, line)
+                return None
+            out = tuple(out) if out else None
+            parseCache.put(key, out)
+
+        return out
+
+    def formatDefinition(self, line, parsed=None, request=defaultRequest):
+        signature = parsed or self.parseFunction(line)
+        if signature:
+            return self.formatFunction(signature, request)
+
+        out = self.parseVar(line)
+        if out:
+            return self.formatVar(*out, request=request)
+
+        return None
+
+    def formatVar(self, name, val, valType=None, request=defaultRequest):
+        out = []
+        if not valType:
+            if not val or val == '':  # quick short circuit
+                valType = "[type]"
+            else:
+                valType = self.guessTypeFromValue(val) or self.guessTypeFromName(name) or "[type]"
+        typeTag = JsdocsField("@%s" % self.settings['typeTag'])
+        if request.inline:
+            out.append(JsdocsTag([typeTag, self.typeField(valType), JsdocsField('[description]', True)]))
+        else:
+            out.append(JsdocsTag([JsdocsField("[%s description]" % escape(name), True)]))
+            out.append(JsdocsTag([typeTag, self.typeField(valType)]))
+
+        return out
+
+    def typeField(self, typeName):
+        """ a placeholder for a type, wrapped in curly braces if the language uses them """
+        if self.settings['curlyTypes']:
+            return JsdocsField(typeName, True, '{', '}')
+        return JsdocsField(typeName, True)
+
+    def getTypeInfo(self, argType, argName):
+        """ the type field for an argument, or None if the language doesn't document types """
+        if self.settings['typeInfo']:
+            return self.typeField(escape(argType or self.guessTypeFromName(argName) or "[type]"))
+
+        return None
+
+    def formatFunction(self, signature, request=defaultRequest):
+        out = []
+        if signature.isSetter:
+            out.append(JsdocsTag([JsdocsField('@private')]))
+            return out
+
+        name = signature.name
+        extraTagAfter = self.viewSettings.get("jsdocs_extra_tags_go_after") or False
+
+        description = request.nameOverride or ('[%s%sdescription]' % (escape(name), ' ' if name else ''))
+        if self.viewSettings.get('jsdocs_function_description'):
+            out.append(JsdocsTag([JsdocsField(description, True)]))
+
+        if (self.viewSettings.get("jsdocs_autoadd_method_tag") is True):
+            out.append(JsdocsTag([JsdocsField('@method'), JsdocsField(escape(name))]))
+
+        if not extraTagAfter:
+            self.addExtraTags(out)
+
+        # add a @param for each argument
+        paramName = self.viewSettings.get('jsdocs_param_name')
+        paramDescription = self.viewSettings.get('jsdocs_param_description')
+        for param in signature.params:
+            fields = [JsdocsField('@param')]
+            typeInfo = self.getTypeInfo(param.type, param.name)
+            if typeInfo:
+                fields.append(typeInfo)
+            fields.append(JsdocsField(escape(param.name) if paramName else ''))
+            if paramDescription:
+                fields.append(JsdocsField('[description]', True))
+
+            out.append(JsdocsTag(fields))
+
+        # return value type might be already available in some languages but
+        # even then ask language specific parser if it wants it listed
+        retType = self.getFunctionReturnType(name, signature.retval)
+        if retType is not None:
+            fields = [JsdocsField(self.viewSettings.get('jsdocs_return_tag') or '@return')]
+            if self.settings['typeInfo']:
+                fields.append(self.typeField(retType or "[type]"))
+
+            if (self.viewSettings.get('jsdocs_return_description')):
+                # the empty column here is so that the description will align with the param description
+                if signature.params and self.viewSettings.get('jsdocs_align_tags') == 'deep':
+                    if not self.viewSettings.get('jsdocs_per_section_indent'):
+                        fields.append(JsdocsField(''))
+
+                fields.append(JsdocsField('[description]', True))
+
+            out.append(JsdocsTag(fields))
+
+        for notation in self.getMatchingNotations(name):
+            if 'tags' in notation:
+                out.extend(JsdocsTag.fromText(tag) for tag in notation['tags'])
+
+        if extraTagAfter:
+            self.addExtraTags(out)
+
+        return out
+
+    def getFunctionReturnType(self, name, retval):
+        """ returns None for no return type. False meaning unknown, or a string """
+
+        if self.classNameRE.match(name):
+            # no return, but should add a class
+            return None
+
+        if self.setterNameRE.match(name):
+            # setter/mutator, no return
+            return None
+
+        if self.boolFunctionNameRE.match(name):  # functions starting with 'is' or 'has'
+            return self.settings['bool']
+
+        return self.guessTypeFromName(name) or False
+
+    def parseArgs(self, args):
+        """
+        The JsdocsParams for the text between the brackets of a function definition
+        """
+        if not args:
+            return []
+        # remove comments inside the argument list
+        args = self.inlineCommentRE.sub('', args)
+        return flatten([self.getArgInfo(arg) for arg in splitByCommas(args)])
+
+    def getArgInfo(self, arg):
+        """
+        Return a list of JsdocsParams, one for each argument derived from the arg param.
+        """
+        return [JsdocsParam(self.getArgType(arg), self.getArgName(arg))]
+
+    def getArgType(self, arg):
+        return None
+
+    def getArgName(self, arg):
+        return arg
+
+    def addExtraTags(self, out):
+        extraTags = self.viewSettings.get('jsdocs_extra_tags', [])
+        if (len(extraTags) > 0):
+            out.extend(JsdocsTag.fromText(tag) for tag in extraTags)
+
+    def guessTypeFromName(self, name):
+        matches = self.getMatchingNotations(name)
+        if len(matches):
+            rule = matches[0]
+            if ('type' in rule):
+                return self.settings[rule['type']] if rule['type'] in self.settings else rule['type']
+
+        if (self.boolNameRE.match(name)):
+            return self.settings['bool']
+
+        if (self.callbackNameRE.match(name)):
+            return self.settings['function']
+
+        return False
+
+    def getMatchingNotations(self, name):
+        return list(self.notations.match(name))
+
+    def definitionLines(self, lines):
+        """
+        The lines a definition is read from: at most `maxDefinitionLines` of them, and only until there are more
+        characters than `maxDefinitionLength`, since a definition that long isn't parsed. This keeps reading (and
+        searching) a long line of minified code as quick as reading a short one.
+        """
+        budget = self.maxDefinitionLength + 1
+        for line in islice(lines, self.maxDefinitionLines):
+            yield line[:budget]
+            budget -= len(line)
+            if budget <= 0:
+                return
+
+    def readDefinition(self, lines):
+        """
+        get a relevant definition from the start of an iterable of lines
+        returns string
+        """
+        scanner = JsdocsBracketScanner(self.quoteCharacters)
+        definition = ''
+        for line in self.definitionLines(lines):
+            countFrom = 0
+
+            # on the first line, only start counting brackets from *after* the actual function starts. This is
+            # needed for cases like this:
+            # (function (foo, bar) { ... })
+            if definition == '':
+                opener = self.fnOpenerRE.search(line) if self.fnOpenerRE else None
+                if opener:
+                    countFrom = opener.start()
+
+            # comments are left out of the definition
+            definition += scanner.feed(line, countFrom)
+            if scanner.depth == 0:
+                break
+        return definition
+
+
+class JsdocsJavascript(JsdocsParser):
+
+    annotationRE = re.compile('^\\s*@')
+    destructuringRE = re.compile('^\{.*\}$')
+    defaultValueRE = re.compile(r'\s*=\s*')
+
+    def setupSettings(self):
+        identifier = '[a-zA-Z_$][a-zA-Z_$0-9]*'
+        self.settings = {
+            # curly brackets around the type information
+            "curlyTypes": True,
+            'typeInfo': True,
+            "typeTag": self.viewSettings.get('jsdocs_override_js_var') or "type",
+            # technically, they can contain all sorts of unicode, but w/e
+            "varIdentifier": identifier,
+            "fnIdentifier":  identifier,
+            "fnOpener": '(?:'
+                    + r'function[\s*]*(?:' + identifier + r')?\s*\('
+                    + '|'
+                    # the brackets are only matched two deep, so a line of them can't be searched in quadratic time
+                    + '(?:' + identifier + r'|\((?:[^()]*\([^()]*\))*[^()]*\)\s*=>)'
+                    + '|'
+                    + '(?:' + identifier + r'\s*\([^()]*\)\s*\{)'
+                    + ')',
+            "commentCloser": " */",
+            "bool": "Boolean",
+            "function": "Function"
+        }
+        self.functionRE = re.compile(
+            # Normal functions...
+            #   fnName = function,  fnName : function
+            r'(?:' + notInWord + '(?P<name1>' + self.settings['varIdentifier'] + r')\s*[:=]\s*)?'
+            + 'function'
+            # function fnName, function* fnName
+            + r'(?P<generator>[\s*]+)?(?P<name2>' + self.settings['fnIdentifier'] + ')?'
+            # (arg1, arg2)
+            + r'\s*\(\s*(?P<args>.*)\)'
+        )
+        self.arrowFunctionRE = re.compile(
+            # ES6 arrow functions
+            # () => y,  x => y,  (x, y) => y,  (x = 4) => y
+            r'(?:' + notInWord + '(?P<args>' + self.settings['varIdentifier'] + r')|\(\s*(?P<args2>.*)\))\s*=>'
+        )
+        self.methodRE = re.compile(
+            # ES6 method initializer shorthand
+            # var person = { getName() { return this.name; } }
+            notInWord + r'(?P<name1>' + self.settings['varIdentifier'] + ')\s*\((?P<args>.*)\)\s*\{'
+        )
+        self.varRE = re.compile(
+            #   var foo = blah,
+            #       foo = blah;
+            #   baz.foo = blah;
+            #   baz = {
+            #        foo : blah
+            #   }
+
+            notInWord + '(?P<name>' + self.settings['varIdentifier'] + ')\s*[=:]\s*(?P<val>.*?)(?:[;,]|$)'
+        )
+
+    def parseFunction(self, line):
+        # each pattern needs some literal text, and checking for it first saves searching a long line for nothing
+        res = ('function' in line and self.functionRE.search(line)) \
+            or ('=>' in line and self.arrowFunctionRE.search(line)) \
+            or ('{' in line and self.methodRE.search(line))
+        if not res:
+            return None
+
+        groups = {
+            'name1': '',
+            'name2': '',
+            'generator': '',
+            'args': '',
+            'args2': ''
+        }
+        groups.update(res.groupdict())
+        # grab the name out of "name1 = function name2(foo)" preferring name1
+        generatorSymbol = '*' if (groups['generator'] or '').find('*') > -1 else ''
+        name = generatorSymbol + (groups['name1'] or groups['name2'] or '')
+        args = groups['args'] or groups['args2'] or ''
+
+        return JsdocsSignature(name, self.parseArgs(args))
+
+    def parseVar(self, line):
+        res = self.varRE.search(line)
+        if not res:
+            return None
+
+        return (res.group('name'), res.group('val').strip())
+
+    def getArgInfo(self, arg):
+        if (self.destructuringRE.search(arg)):
+            subItems = splitByCommas(arg[1:-1])
+            prefix = 'options.'
+        else:
+            subItems = [arg]
+            prefix = ''
+
+        return [JsdocsParam(self.getArgType(subItem), prefix + self.getArgName(subItem)) for subItem in subItems]
+
+    def getArgType(self, arg):
+        parts = self.defaultValueRE.split(arg, 1)
+        # rest parameters
+        if parts[0].find('...') == 0:
+            return '...[type]'
+        elif len(parts) > 1:
+            return self.guessTypeFromValue(parts[1])
+
+    def getArgName(self, arg):
+        namePart = self.defaultValueRE.split(arg, 1)[0]
+
+        # check for rest parameters, eg: function (foo, ...rest) {}
+        if namePart.find('...') == 0:
+            return namePart[3:]
+        return namePart
+
+    def getFunctionReturnType(self, name, retval):
+        if name and name[0] == '*':
+            return None
+        return super(JsdocsJavascript, self).getFunctionReturnType(name, retval)
+
+    def getMatchingNotations(self, name):
+        out = super(JsdocsJavascript, self).getMatchingNotations(name)
+        if name and name[0] == '*':
+            # if '@returns' is preferred, then also use '@yields'. Otherwise, '@return' and '@yield'
+            yieldTag = '@yield' + ('s' if self.viewSettings.get('jsdocs_return_tag', '_')[-1] == 's' else '')
+            description = ' ${1:[description]}' if self.viewSettings.get('jsdocs_return_description', True) else ''
+            out.append({ 'tags': [
+                '%s {${1:[type]}}%s' % (yieldTag, description)
+            ]})
+        return out
+
+    def guessTypeFromValue(self, val):
+        lowerPrimitives = self.viewSettings.get('jsdocs_lower_case_primitives') or False
+        shortPrimitives = self.viewSettings.get('jsdocs_short_primitives') or False
+        if is_numeric(val):
+            return "number" if lowerPrimitives else "Number"
+        if val[0] == '"' or val[0] == "'":
+            return "string" if lowerPrimitives else "String"
+        if val[0] == '[':
+            return "Array"
+        if val[0] == '{':
+            return "Object"
+        if val == 'true' or val == 'false':
+            returnVal = 'Bool' if shortPrimitives else 'Boolean'
+            return returnVal.lower() if lowerPrimitives else returnVal
+        if self.regexpValueRE.match(val):
+            return 'RegExp'
+        if val.find('=>') > -1:
+            return 'function' if lowerPrimitives else 'Function'
+        if val[:4] == 'new ':
+            res = self.newRE.search(val)
+            return res and res.group(1) or None
+        return None
+
+
+class JsdocsPHP(JsdocsParser):
+
+    annotationRE = re.compile('^\\s*#\\[')
+
+    def setupSettings(self):
+        shortPrimitives = self.viewSettings.get('jsdocs_short_primitives') or False
+        nameToken = '[a-zA-Z_\\x7f-\\xff][a-zA-Z0-9_\\x7f-\\xff]*'
+        self.settings = {
+            # curly brackets around the type information
+            'curlyTypes': False,
+            'typeInfo': True,
+            'typeTag': "var",
+            'varIdentifier': '&?[$]' + nameToken + '(?:->' + nameToken + ')*',
+            'fnIdentifier': nameToken,
+            'typeIdentifier': '\\\\?' + nameToken + '(\\\\' + nameToken + ')*',
+            'fnOpener': 'function(?:\\s+' + nameToken + ')?\\s*\\(',
+            'commentCloser': ' */',
+            'bool': 'bool' if shortPrimitives else 'boolean',
+            'function': "function"
+        }
+        self.functionRE = re.compile(
+            'function\\s+&?\\s*'
+            + '(?P<name>' + self.settings['fnIdentifier'] + ')'
+            # function fnName
+            # (arg1, arg2)
+            + '\\s*\\(\\s*(?P<args>.*)\\)'
+        )
+        self.argRE = re.compile(
+            '(?P<type>' + self.settings['typeIdentifier'] + ')?'
+            + '\\s*(?P<name>' + self.settings['varIdentifier'] + ')'
+            + '(\\s*=\\s*(?P<val>.*))?'
+        )
+        self.argNameRE = re.compile("(" + self.settings['varIdentifier'] + ")(?:\\s*=.*)?$")
+        self.varRE = re.compile(
+            #   var $foo = blah,
+            #       $foo = blah;
+            #   $baz->foo = blah;
+            #   $baz = array(
+            #        'foo' => blah
+            #   )
+
+            '(?P<name>' + self.settings['varIdentifier'] + ')\\s*=>?\\s*(?P<val>.*?)(?:[;,]|$)'
+        )
+        self.propertyRE = re.compile(
+            '\\b(?:var|public|private|protected|static)\\s+(?P<name>' + self.settings['varIdentifier'] + ')'
+        )
+
+    def parseFunction(self, line):
+        res = self.functionRE.search(line)
+        if not res:
+            return None
+
+        return JsdocsSignature(res.group('name'), self.parseArgs(res.group('args')))
+
+    def getArgType(self, arg):
+
+        res = self.argRE.search(arg)
+
+        if (res):
+
+            argType = res.group("type")
+            argName = res.group("name")
+            argVal = res.group("val")
+
+            # function fnc_name(type $name = val)
+            if (argType and argVal):
+
+                # function fnc_name(array $x = array())
+                # function fnc_name(array $x = [])
+                argValType = self.guessTypeFromValue(argVal)
+                if argType == argValType:
+                    return argType
+
+                # function fnc_name(type $name = null)
+                return argType + "|" + argValType
+
+            # function fnc_name(type $name)
+            if (argType):
+                return argType
+
+            # function fnc_name($name = value)
+            if (argVal):
+                guessedType = self.guessTypeFromValue(argVal)
+                return guessedType if guessedType != 'null' else None
+        # function fnc_name()
+        return None
+
+    def getArgName(self, arg):
+        return self.argNameRE.search(arg).group(1)
+
+    def parseVar(self, line):
+        res = self.varRE.search(line)
+        if res:
+            return (res.group('name'), res.group('val').strip())
+
+        res = self.propertyRE.search(line)
+        if res:
+            return (res.group('name'), None)
+
+        return None
+
+    def guessTypeFromValue(self, val):
+        shortPrimitives = self.viewSettings.get('jsdocs_short_primitives') or False
+        if is_numeric(val):
+            return "float" if '.' in val else 'int' if shortPrimitives else 'integer'
+        if val[0] == '"' or val[0] == "'":
+            return "string"
+        if val[:5] == 'array' or (val[0] == '[' and val[-1] == ']'):
+            return "array"
+        if val.lower() in ('true', 'false', 'filenotfound'):
+            return 'bool' if shortPrimitives else 'boolean'
+        if val[:4] == 'new ':
+            res = self.newRE.search(val)
+            return res and res.group(1) or None
+        if val.lower() in ('null'):
+            return 'null'
+        return None
+
+    def getFunctionReturnType(self, name, retval):
+        shortPrimitives = self.viewSettings.get('jsdocs_short_primitives') or False
+        if (name[:2] == '__'):
+            if name in ('__construct', '__destruct', '__set', '__unset', '__wakeup'):
+                return None
+            if name == '__sleep':
+                return 'array'
+            if name == '__toString':
+                return 'string'
+            if name == '__isset':
+                return 'bool' if shortPrimitives else 'boolean'
+        return JsdocsParser.getFunctionReturnType(self, name, retval)
+
+
+class JsdocsCPP(JsdocsParser):
+    def setupSettings(self):
+        nameToken = '[a-zA-Z_][a-zA-Z0-9_]*'
+        identifier = '(%s)(::%s)?' % (nameToken, nameToken)
+        self.settings = {
+            'typeInfo': False,
+            'curlyTypes': False,
+            'typeTag': 'param',
+            'commentCloser': ' */',
+            'fnIdentifier': identifier,
+            # any spaces are only taken before brackets, or they could be split with those before the name in more
+            # ways than a search can try on a long line
+            'varIdentifier': '(' + identifier + r')(?:\s*\[(?:' + identifier + r')?\]'
+                + r'|\s*\((?:\s*,\s*)?[a-z]+(?:\s*,\s*[a-z]+)*\s*\))*',
+            'fnOpener': notInWord + identifier + '\\s+' + identifier + '\\s*\\(',
+            'bool': 'bool',
+            'function': 'function'
+        }
+        self.functionRE = re.compile(
+            notInWord + '(?P<retval>' + self.settings['varIdentifier'] + ')[&*\\s]+'
+            + '(?P<name>' + self.settings['varIdentifier'] + ');?'
+            # void fnName
+            # (arg1, arg2)
+            + '\\s*\\(\\s*(?P<args>.*)\)'
+        )
+        self.argNameRE = re.compile(notInWord + self.settings['varIdentifier'] + r"(?:\s*=.*)?$")
+
+    def parseFunction(self, line):
+        res = self.functionRE.search(line)
+        if not res:
+            return None
+
+        return JsdocsSignature(res.group('name'), self.parseArgs(res.group('args')), res.group('retval'))
+
+    def getArgInfo(self, arg):
+        # `(void)` is an empty argument list
+        if arg.strip() == 'void':
+            return []
+        return super(JsdocsCPP, self).getArgInfo(arg)
+
+    def getArgType(self, arg):
+        return None
+
+    def getArgName(self, arg):
+        return self.argNameRE.search(arg).group(1)
+
+    def parseVar(self, line):
+        return None
+
+    def guessTypeFromValue(self, val):
+        return None
+
+    def getFunctionReturnType(self, name, retval):
+        return retval if retval != 'void' else None
+
+
+class JsdocsCoffee(JsdocsParser):
+
+    commentOpener = '###*'
+
+    def setupSettings(self):
+        identifier = '[a-zA-Z_$][a-zA-Z_$0-9]*'
+        self.settings = {
+            # curly brackets around the type information
+            'curlyTypes': True,
+            'typeTag': self.viewSettings.get('jsdocs_override_js_var') or "type",
+            'typeInfo': True,
+            # technically, they can contain all sorts of unicode, but w/e
+            'varIdentifier': identifier,
+            'fnIdentifier': identifier,
+            'fnOpener': None,  # no multi-line function definitions for you, hipsters!
+            'commentCloser': '###',
+            'bool': 'Boolean',
+            'function': 'Function'
+        }
+        self.functionRE = re.compile(
+            #   fnName = function,  fnName : function
+            '(?:' + notInWord + '(?P<name>' + self.settings['varIdentifier'] + ')\s*[:=]\s*)?'
+            + '(?:\\((?P<args>[^()]*?)\\)\\s*)?([=-]>)'
+        )
+        self.varRE = re.compile(
+            #   var foo = blah,
+            #       foo = blah;
+            #   baz.foo = blah;
+            #   baz = {
+            #        foo : blah
+            #   }
+
+            notInWord + '(?P<name>' + self.settings['varIdentifier'] + ')\s*[=:]\s*(?P<val>.*?)(?:[;,]|$)'
+        )
+
+    def parseFunction(self, line):
+        res = self.functionRE.search(line)
+        if not res:
+            return None
+
+        # grab the name out of "name1 = function name2(foo)" preferring name1
+        name = res.group('name') or ''
+
+        return JsdocsSignature(name, self.parseArgs(res.group('args')))
+
+    def parseVar(self, line):
+        res = self.varRE.search(line)
+        if not res:
+            return None
+
+        return (res.group('name'), res.group('val').strip())
+
+    def guessTypeFromValue(self, val):
+        lowerPrimitives = self.viewSettings.get('jsdocs_lower_case_primitives') or False
+        if is_numeric(val):
+            return "number" if lowerPrimitives else "Number"
+        if val[0] == '"' or val[0] == "'":
+            return "string" if lowerPrimitives else "String"
+        if val[0] == '[':
+            return "Array"
+        if val[0] == '{':
+            return "Object"
+        if val == 'true' or val == 'false':
+            return "boolean" if lowerPrimitives else "Boolean"
+        if self.regexpValueRE.match(val):
+            return 'RegExp'
+        if val[:4] == 'new ':
+            res = self.newRE.search(val)
+            return res and res.group(1) or None
+        return None
+
+
+class JsdocsActionscript(JsdocsParser):
+
+    def setupSettings(self):
+        nameToken = '[a-zA-Z_][a-zA-Z0-9_]*'
+        self.settings = {
+            'typeInfo': False,
+            'curlyTypes': False,
+            'typeTag': '',
+            'commentCloser': ' */',
+            'fnIdentifier': nameToken,
+            'varIdentifier': '(%s)(?::%s)?' % (nameToken, nameToken),
+            'fnOpener': 'function(?:\\s+[gs]et)?(?:\\s+' + nameToken + ')?\\s*\\(',
+            'bool': 'bool',
+            'function': 'function'
+        }
+        self.functionRE = re.compile(
+            #   fnName = function,  fnName : function
+            '(?:' + notInWord + '(?P<name1>' + self.settings['varIdentifier'] + ')\s*[:=]\s*)?'
+            + 'function(?:\s+(?P<getset>[gs]et))?'
+            # function fnName
+            + '(?:\s+(?P<name2>' + self.settings['fnIdentifier'] + '))?'
+            # (arg1, arg2)
+            + '\s*\(\s*(?P<args>.*)\)'
+        )
+        self.varIdentifierRE = re.compile(self.settings['varIdentifier'])
+        self.argNameRE = re.compile(self.settings['varIdentifier'] + r'(\s*=.*)?')
+
+    def parseFunction(self, line):
+        res = self.functionRE.search(line)
+        if not res:
+            return None
+
+        name = res.group('name1') and self.varIdentifierRE.sub(r'\1', res.group('name1')) \
+            or res.group('name2') \
+            or ''
+
+        return JsdocsSignature(name, self.parseArgs(res.group('args')), isSetter=res.group('getset') == 'set')
+
+    def parseVar(self, line):
+        return None
+
+    def getArgName(self, arg):
+        return self.argNameRE.sub(r'\1', arg)
+
+    def getArgType(self, arg):
+        # could actually figure it out easily, but it's not important for the documentation
+        return None
+
+
+class JsdocsObjC(JsdocsParser):
+
+    definitionEndRE = re.compile(r'\s*[;{]\s*$')
+    argSeparatorRE = re.compile('\\s*:\\s*')
+    lastWordRE = re.compile(r'\s+(\S*)$')
+
+    def setupSettings(self):
+        identifier = '[a-zA-Z_$][a-zA-Z_$0-9]*'
+        self.settings = {
+            # curly brackets around the type information
+            "curlyTypes": True,
+            'typeInfo': True,
+            "typeTag": "type",
+            # technically, they can contain all sorts of unicode, but w/e
+            "varIdentifier": identifier,
+            "fnIdentifier":  identifier,
+            "fnOpener": '^\s*[-+]',
+            "commentCloser": " */",
+            "bool": "Boolean",
+            "function": "Function"
+        }
+        typeRE = r'[a-zA-Z_$][a-zA-Z0-9_$]*\s*\**'
+        self.functionRE = re.compile(
+            '[-+]\s+\\(\\s*(?P<retval>' + typeRE + ')\\s*\\)\\s*'
+            + '(?P<name>[a-zA-Z_$][a-zA-Z0-9_$]*)'
+            # void fnName
+            # (arg1, arg2)
+            + '\\s*(?::(?P<args>.*))?'
+        )
+
+    def readDefinition(self, lines):
+
+        definition = ''
+        for line in self.definitionLines(lines):
+            # strip comments
+            if '/' in line:
+                line = self.lineCommentRE.sub("", line)
+            if definition == '':
+                if not self.fnOpenerRE or not self.fnOpenerRE.search(line):
+                    definition = line
+                    break
+            definition += line
+            if line.find(';') > -1 or line.find('{') > -1:
+                definition = self.definitionEndRE.sub('', definition)
+                break
+        return definition
+
+    def parseFunction(self, line):
+        # this is terrible, don't judge me
+        res = self.functionRE.search(line)
+        if not res:
+            return
+        name = res.group('name')
+        argStr = res.group('args')
+        params = []
+        if argStr:
+            groups = self.argSeparatorRE.split(argStr)
+            numGroups = len(groups)
+            for i in range(0, numGroups):
+                group = groups[i]
+                if i < numGroups - 1:
+                    result = self.lastWordRE.search(group)
+                    name += ':' + result.group(1)
+                    group = group[:result.start()]
+
+                # each argument is its type in brackets, then its name: "(NSString *)name"
+                group = self.inlineCommentRE.sub('', group)
+                lastParen = group.rfind(')')
+                params.append(JsdocsParam(group[1:lastParen], group[lastParen + 1:]))
+
+            if (numGroups):
+                name += ':'
+        return JsdocsSignature(name, params, res.group('retval'))
+
+    def getFunctionReturnType(self, name, retval):
+        return retval if retval != 'void' and retval != 'IBAction' else None
+
+    def parseVar(self, line):
+        return None
+
+
+class JsdocsJava(JsdocsParser):
+
+    blankLineRE = re.compile("^\s*$")
+    annotationRE = re.compile("^\s*@")
+    definitionEndRE = re.compile(r'\s*[;{]\s*$')
+
+    def setupSettings(self):
+        identifier = '[a-zA-Z_$][a-zA-Z_$0-9]*'
+        self.settings = {
+            "curlyTypes": False,
+            'typeInfo': False,
+            "typeTag": "type",
+            "varIdentifier": identifier,
+            "fnIdentifier":  identifier,
+            "fnOpener": notInWord + identifier + '(?:\\s+' + identifier + ')?\\s*\\(',
+            "commentCloser": " */",
+            "bool": "Boolean",
+            "function": "Function"
+        }
+        self.functionRE = re.compile(
+            # Modifiers. Like `notInWord`, but the search doesn't start from a later part of a qualified name or inside
+            # a type argument either
+            r'(?<![a-zA-Z_$0-9.<])'
+            + r'(?:(public|protected|private|static|abstract|final|transient|synchronized|native|strictfp)\s+)*'
+            # Return value, which only has spaces inside its type arguments (eg: Map<String, Integer>), so that it can't
+            # end at more than one place in a line of words
+            + r'(?P<retval>[a-zA-Z_$][a-zA-Z_$0-9.]*(?:\s*<[<>., a-zA-Z_$0-9]*>)?(\[\])*)\s+'
+            # Method name
+            + r'(?P<name>' + self.settings['fnIdentifier'] + r')\s*'
+            # Params
+            + r'\((?P<args>.*)\)\s*'
+            # # Throws ,
+            + r'(?:throws){0,1}\s*(?P<throws>[a-zA-Z_$0-9\.,\s]*)'
+        )
+
+    def parseFunction(self, line):
+        line = line.strip()
+        res = self.functionRE.search(line)
+
+        if not res:
+            return None
+        group_dict = res.groupdict()
+        name = group_dict["name"]
+        retval = group_dict["retval"]
+        full_args = group_dict["args"]
+        throws = group_dict["throws"] or ""
+
+        params = [JsdocsParam(None, argName) for argName in self.lastWords(full_args)]
+        return JsdocsSignature(name, params, retval, self.lastWords(throws))
+
+    def lastWords(self, text):
+        """
+        The last word of each part of a comma separated list (eg: the names of arguments, after their types)
+        """
+        words = [part.strip().split(" ")[-1] for part in splitByCommas(text)]
+        # a list of nothing but spaces is empty
+        return [] if words == [''] else words
+
+    def parseVar(self, line):
+        return None
+
+    def guessTypeFromValue(self, val):
+        return None
+
+    def formatFunction(self, signature, request=defaultRequest):
+        out = JsdocsParser.formatFunction(self, signature, request)
+
+        for exceptionName in signature.throws:
+            fields = [JsdocsField('@throws')]
+            typeInfo = self.getTypeInfo(None, exceptionName)
+            if typeInfo:
+                fields.append(typeInfo)
+            fields.append(JsdocsField(escape(exceptionName)))
+            fields.append(JsdocsField('[description]', True))
+            out.append(JsdocsTag(fields))
+
+        return out
+
+    def getFunctionReturnType(self, name, retval):
+        if retval == "void":
+            return None
+        return retval
+
+    def readDefinition(self, lines):
+
+        definition = ''
+        open_curly_annotation = False
+        open_paren_annotation = False
+        for line in self.definitionLines(lines):
+            # Move past empty lines
+            if self.blankLineRE.search(line):
+                continue
+            # strip comments
+            if '/' in line:
+                line = self.lineCommentRE.sub("", line)
+                line = self.blockCommentRE.sub("", line)
+            if definition == '':
+                # Must check here for function opener on same line as annotation
+                if self.fnOpenerRE and self.fnOpenerRE.search(line):
+                    pass
+                # Handle Annotations
+                elif self.annotationRE.search(line):
+                    if "{" in line and "}" not in line:
+                        open_curly_annotation = True
+                    if "(" in line and ")" not in line:
+                        open_paren_annotation = True
+                    continue
+                elif open_curly_annotation:
+                    if "}" in line:
+                        open_curly_annotation = False
+                    continue
+                elif open_paren_annotation:
+                    if ")" in line:
+                        open_paren_annotation = False
+                elif self.blankLineRE.search(line):
+                    continue
+                # Check for function
+                elif not self.fnOpenerRE or not self.fnOpenerRE.search(line):
+                    definition = line
+                    break
+            definition += line
+            if line.find(';') > -1 or line.find('{') > -1:
+                definition = self.definitionEndRE.sub('', definition)
+                break
+        return definition
+
+class JsdocsRust(JsdocsParser):
+
+    # a single quote starts a lifetime (eg: 'a) as often as a character
+    quoteCharacters = '"'
+
+    def setupSettings(self):
+        self.settings = {
+            "curlyTypes": False,
+            'typeInfo': False,
+            "typeTag": False,
+            "varIdentifier": ".*",
+            "fnIdentifier":  ".*",
+            "fnOpener": "^\s*fn",
+            "commentCloser": " */",
+            "bool": "Boolean",
+            "function": "Function"
+        }
+        self.functionRE = re.compile('fn\s+(?P<name>[a-zA-Z_][a-zA-Z_0-9]*)')
+
+    def parseFunction(self, line):
+        res = self.functionRE.search(line)
+        if not res:
+            return None
+
+        return JsdocsSignature(res.group('name'))
+
+    def formatFunction(self, signature, request=defaultRequest):
+        # Rust functions get an empty DocBlock
+        return []
+
+class JsdocsTypescript(JsdocsParser):
+
+    annotationRE = re.compile('^\\s*@')
+
+    def setupSettings(self):
+        identifier = '[a-zA-Z_$][a-zA-Z_$0-9]*'
+        base_type_identifier = r'%s(\.%s)*(\[\])?' % ((identifier, ) * 2)
+        parametric_type_identifier = r'%s(\s*<\s*%s(\s*,\s*%s\s*)*>)?' % ((base_type_identifier, ) * 3)
+        self.settings = {
+            # curly brackets around the type information
+            "curlyTypes": True,
+            'typeInfo': True,
+            "typeTag": "type",
+            # technically, they can contain all sorts of unicode, but w/e
+            "varIdentifier": identifier,
+            "fnIdentifier": identifier,
+            "fnOpener": 'function(?:\\s+' + identifier + ')?\\s*\\(',
+            "commentCloser": " */",
+            "bool": "Boolean",
+            "function": "Function",
+            "functionRE":
+                # Modifiers
+                notInWord + r'(?:(?:public|private|static)\s+)?'
+                # Method name
+                + r'(?P<name>' + identifier + r')\s*'
+                # Params
+                + r'\((?P<args>.*)\)\s*'
+                # Return value
+                + r'(:\s*(?P<retval>' + parametric_type_identifier + r'))?',
+            "varRE":
+                notInWord + r'((public|private|static|var)\s+)?(?P<name>' + identifier
+                + r')(\s*:\s*(?P<type>' + parametric_type_identifier
+                + r'))?(\s*=\s*(?P<val>.*?))?\s*([;,]|$)'
+        }
+        self.functionRE = re.compile(self.settings['functionRE'])
+        self.varRE = re.compile(self.settings['varRE'])
+
+    def parseFunction(self, line):
+        line = line.strip()
+        res = self.functionRE.search(line)
+
+        if not res:
+            return None
+        group_dict = res.groupdict()
+        return JsdocsSignature(group_dict["name"], self.parseArgs(group_dict["args"]), group_dict["retval"])
+
+    def getArgType(self, arg):
+        if ':' in arg:
+            return arg.split(':')[-1].strip()
+        return None
+
+    def getArgName(self, arg):
+        if ':' in arg:
+            arg = arg.split(':')[0]
+        return arg.strip('[ \?]')
+
+    def parseVar(self, line):
+        res = self.varRE.search(line)
+        if not res:
+            return None
+        val = res.group('val')
+        if val: val = val.strip()
+        return (res.group('name'), val, res.group('type'))
+
+    def getFunctionReturnType(self, name, retval):
+        return retval if retval != 'void' else None
+
+    def guessTypeFromValue(self, val):
+        lowerPrimitives = self.viewSettings.get('jsdocs_lower_case_primitives') or False
+        if is_numeric(val):
+            return "number" if lowerPrimitives else "Number"
+        if val[0] == '"' or val[0] == "'":
+            return "string" if lowerPrimitives else "String"
+        if val[0] == '[':
+            return "Array"
+        if val[0] == '{':
+            return "Object"
+        if val == 'true' or val == 'false':
+            return "boolean" if lowerPrimitives else "Boolean"
+        if self.regexpValueRE.match(val):
+            return 'RegExp'
+        if val[:4] == 'new ':
+            res = self.newRE.search(val)
+            return res and res.group(1) or None
+        return None
+
+
+# the language of a `source.*` scope => the parser class for it. Anything else is parsed as Javascript
+parserClassesByLanguage = {
+    'php': JsdocsPHP,
+    'coffee': JsdocsCoffee,
+    'actionscript': JsdocsActionscript,
+    'haxe': JsdocsActionscript,
+    'c++': JsdocsCPP,
+    'c': JsdocsCPP,
+    'cuda-c++': JsdocsCPP,
+    'objc': JsdocsObjC,
+    'objc++': JsdocsObjC,
+    'java': JsdocsJava,
+    'groovy': JsdocsJava,
+    'apex': JsdocsJava,
+    'rust': JsdocsRust,
+    'ts': JsdocsTypescript,
+}
+
+
+# names which the function patterns also pick up from control statements and expressions, eg: `if (x) {`
+notDefinitionNames = frozenset([
+    'if', 'else', 'elseif', 'for', 'foreach', 'while', 'do', 'switch', 'case', 'catch', 'try', 'with', 'function',
+    'return', 'new', 'delete', 'throw', 'typeof', 'sizeof', 'await', 'yield'
+])
+
+
+def parseDefinition(parser, definition, firstLine):
+    """
+    Parse a function definition, returning None for anything which only looks like one (eg: `if (x) {`), or which
+    doesn't start on the first line (eg: unbalanced brackets made the parser read on into a later function)
+    """
+    if len(definition) > parser.maxDefinitionLength:
+        return None
+    try:
+        parsed = parser.parseFunction(definition)
+    except Exception:
+        if parser.viewSettings.get('jsdocs_development_mode'):
+            recorder.recordException(type(parser).__name__, definition)
+        return None
+    if not parsed or not parsed.name or parsed.name.strip() in notDefinitionNames:
+        return None
+    if parsed.name.strip().split(':')[0] not in firstLine:
+        return None
+    if parsed.retval in notDefinitionNames:
+        return None
+    return parsed
+
+
+def commonPrefixLength(a, b, chunkSize=4096):
+    """
+    The length of the longest string which both `a` and `b` start with. Whole chunks are compared at a time, so the
+    strings are compared at C speed rather than a character at a time.
+    """
+    limit = min(len(a), len(b))
+    length = 0
+    while length + chunkSize <= limit and a[length:length + chunkSize] == b[length:length + chunkSize]:
+        length += chunkSize
+    while length < limit and a[length] == b[length]:
+        length += 1
+    return length
+
+
+def commonSuffixLength(a, b, limit, chunkSize=4096):
+    """
+    The length of the longest string (up to `limit`) which both `a` and `b` end with
+    """
+    lenA = len(a)
+    lenB = len(b)
+    length = 0
+    while length + chunkSize <= limit and \
+            a[lenA - length - chunkSize:lenA - length] == b[lenB - length - chunkSize:lenB - length]:
+        length += chunkSize
+    while length < limit and a[lenA - length - 1] == b[lenB - length - 1]:
+        length += 1
+    return length
+
+
+class JsdocsDefinitionIndex(object):
+    """
+    The function definitions in some text, by the line they start on. When the index is updated with a new version of
+    the text, only the lines around the part which changed are parsed again, and the rest of the definitions are
+    shifted along. Each line is read independently of the others, so a definition only depends on the lines from its
+    start to the end of its signature (at most `JsdocsParser.maxDefinitionLines`).
+    """
+    def __init__(self):
+        # whatever identifies the text this was last updated to (eg: a view's change count)
+        self.version = None
+        self.text = ''
+        self.lines = ['']
+        self.lineStarts = [0]
+        # the start lines of the definitions, and (start line, end line, parser, parsed definition, definition text)
+        self.starts = []
+        self.entries = []
+
+    def update(self, text, getParserAt, version=None):
+        """
+        Bring the index up to date with the text. `getParserAt(point)` returns the parser for the language at a point,
+        or None to skip the line.
+        """
+        old = self.text
+        if text != old:
+            prefix = commonPrefixLength(old, text)
+            suffix = commonSuffixLength(old, text, min(len(old), len(text)) - prefix)
+            lineStarts = self.lineStarts
+
+            # the lines which changed: from the first changed character to the end of the last changed line
+            first = bisect_right(lineStarts, prefix) - 1
+            oldLast = bisect_right(lineStarts, len(old) - suffix) - 1
+            delta = len(text) - len(old)
+            middleStart = lineStarts[first]
+            middleEnd = (lineStarts[oldLast + 1] - 1 if oldLast + 1 < len(lineStarts) else len(old)) + delta
+            middle = text[middleStart:middleEnd].split('\n')
+            middleStarts = []
+            point = middleStart
+            for line in middle:
+                middleStarts.append(point)
+                point += len(line) + 1
+
+            newLast = first + len(middle) - 1
+            lineDelta = newLast - oldLast
+            self.lines = self.lines[:first] + middle + self.lines[oldLast + 1:]
+            self.lineStarts = lineStarts[:first] + middleStarts + [start + delta for start in lineStarts[oldLast + 1:]]
+            self.text = text
+
+            # definitions starting far enough above the change can't have read any of it, and ones below only read
+            # lines which are unchanged, so only the lines in between need reading again
+            rescanFrom = max(0, first - JsdocsParser.maxDefinitionLines + 1)
+            before = bisect_left(self.starts, rescanFrom)
+            after = bisect_right(self.starts, oldLast)
+            entries = self.entries[:before]
+            for index in range(rescanFrom, newLast + 1):
+                entry = self.scanLine(index, getParserAt)
+                if entry:
+                    entries.append(entry)
+            for start, end, parser, parsed, definition in self.entries[after:]:
+                entries.append((start + lineDelta, end + lineDelta, parser, parsed, definition))
+            self.entries = entries
+            self.starts = [entry[0] for entry in entries]
+        self.version = version
+
+    def scanLine(self, index, getParserAt):
+        """
+        Read and parse the definition starting on a line, if there is one
+        """
+        line = self.lines[index]
+        # every language's function definitions contain one of these, so most lines are skipped straight away
+        if '(' not in line and '->' not in line and '=>' not in line:
+            return None
+        indent = len(line) - len(line.lstrip())
+        if indent == len(line):
+            return None
+        parser = getParserAt(self.lineStarts[index] + indent)
+        if not parser or (parser.annotationRE and parser.annotationRE.search(line)):
+            return None
+
+        lastRead = [index]
+
+        def linesFrom(start):
+            for lineIndex in range(start, len(self.lines)):
+                lastRead[0] = lineIndex
+                yield self.lines[lineIndex]
+
+        definition = parser.readDefinition(linesFrom(index))
+        parsed = parseDefinition(parser, definition, line)
+        if not parsed:
+            return None
+        return (index, lastRead[0], parser, parsed, definition)
+
+    def definitionAt(self, lineIndex):
+        """
+        Return the (start line, end line, parser, parsed definition, definition text) starting on a line, or None
+        """
+        index = bisect_left(self.starts, lineIndex)
+        if index < len(self.starts) and self.starts[index] == lineIndex:
+            return self.entries[index]
+        return None
+
+    def undocumented(self, starts, blocks):
+        """
+        Find the definitions which have no DocBlock above them (a plain block comment doesn't count). `starts` and
+        `blocks` are the sorted (start, end) ranges of the block comments in the text, along with their start points,
+        and definitions inside a comment are skipped. Returns a list of (point, line number, indentation, parser,
+        parsed definition, definition), and the number of definitions found.
+        """
+        text = self.text
+        lines = self.lines
+        lineStarts = self.lineStarts
+
+        def inComment(point):
+            index = bisect_right(starts, point) - 1
+            return index >= 0 and point < blocks[index][1]
+
+        def isDocumented(index, opener):
+            # whether the last non-blank line above ends inside a DocBlock: a block comment which starts with the
+            # parser's opener (but isn't an empty `/**/`)
+            index -= 1
+            while index >= 0 and not lines[index].strip():
+                index -= 1
+            if index < 0:
+                return False
+            point = lineStarts[index] + len(lines[index].rstrip()) - 1
+            comment = bisect_right(starts, point) - 1
+            if comment < 0 or point >= blocks[comment][1]:
+                return False
+            start = blocks[comment][0]
+            return text.startswith(opener, start) and text[start + len(opener):start + len(opener) + 1] != '/'
+
+        undocumented = []
+        found = 0
+        nextIndex = 0
+        for index, end, parser, parsed, definition in self.entries:
+            line = lines[index]
+            # skip the lines of a signature which spans several, as when the whole file was read in one pass
+            if index < nextIndex or inComment(lineStarts[index] + len(line) - len(line.lstrip())):
+                continue
+            found += 1
+            nextIndex = end + 1
+
+            # the DocBlock goes above any annotations or decorators
+            insertAt = index
+            while insertAt > 0 and parser.annotationRE and parser.annotationRE.search(lines[insertAt - 1]):
+                insertAt -= 1
+
+            if not isDocumented(insertAt, parser.commentOpener):
+                insertLine = lines[insertAt]
+                indentation = insertLine[:len(insertLine) - len(insertLine.lstrip())]
+                undocumented.append((lineStarts[insertAt], insertAt, indentation, parser, parsed, definition))
+
+        return undocumented, found
+
+
+def findUndocumented(text, getParserAt, starts, blocks):
+    """
+    Make one pass over some source text, finding the function definitions which have no DocBlock above them.
+    See `JsdocsDefinitionIndex.undocumented` for the arguments and what is returned.
+    """
+    index = JsdocsDefinitionIndex()
+    index.update(text, getParserAt)
+    return index.undocumented(starts, blocks)
@@ -0,0 +1,227 @@
+"""
+Reformatting the text of a DocBlock to fit within a line length. Each line of the DocBlock is read once, to split the
+text into paragraphs of words, and each paragraph is broken into lines either greedily (as many words as fit on each
+line) or optimally (with the lines as even in length as possible).
+"""
+import re
+
+# the indentation and asterisk at the start of a line in a DocBlock
+starPrefixRE = re.compile(r'\s*\*\s*')
+
+
+class JsdocsParagraph(object):
+    """
+    A paragraph of a DocBlock: the lines it was read from (`start` up to `end`) and its words. Runs of spaces give
+    empty words, which are kept on the first line of a paragraph that starts with a tag, so that aligned columns stay
+    lined up.
+    """
+    def __init__(self, start, end, contents):
+        self.start = start
+        self.end = end
+        self.words = ' '.join(contents).strip().split(' ')
+        self.tagged = self.words[0][:1] == '@'
+        self.tag = self.words[0] if self.tagged else ''
+
+
+def splitParagraphs(lines):
+    """
+    Split the lines of a DocBlock into paragraphs. A paragraph ends at an empty line, or at a line starting with a tag.
+    """
+    paragraphs = []
+    start = None
+    contents = []
+    for index, line in enumerate(lines):
+        match = starPrefixRE.match(line)
+        content = line[match.end():] if match else line.lstrip()
+        if start is not None and (not content.strip() or content[0] == '@'):
+            paragraphs.append(JsdocsParagraph(start, index, contents))
+            start = None
+        if content.strip():
+            if start is None:
+                start = index
+                contents = []
+            contents.append(content)
+    if start is not None:
+        paragraphs.append(JsdocsParagraph(start, len(lines), contents))
+    return paragraphs
+
+
+def breakGreedy(words, tagged, firstIndent, indent, width):
+    """
+    Break words into lines, putting as many on each line as will fit. Returns the lists of words on each line.
+    """
+    lines = []
+    line = []
+    length = firstIndent - 1
+    keepEmpty = tagged
+    for word in words:
+        if not word and not keepEmpty:
+            continue
+        if line and length + 1 + len(word) > width:
+            lines.append(line)
+            line = [word]
+            length = indent + len(word)
+            keepEmpty = False
+        else:
+            line.append(word)
+            length += 1 + len(word)
+    lines.append(line)
+    return lines
+
+
+def breakOptimal(words, tagged, firstIndent, indent, width):
+    """
+    Break words into lines with as little raggedness as possible: the sum of the squares of the space left at the end
+    of every line but the last is kept to a minimum. Returns the lists of words on each line.
+    """
+    # the spaces which make up the empty words of a tag's first line are kept with the word which follows them, and
+    # dropped if that word has to start a new line
+    tokens = []
+    spaces = ''
+    for word in words:
+        if not word:
+            if tagged:
+                spaces += ' '
+            continue
+        tokens.append(spaces + word)
+        spaces = ''
+    if not tokens:
+        return [[]]
+
+    count = len(tokens)
+    # ends[i] is the length of tokens[:i], counting a space before each token
+    ends = [0]
+    for token in tokens:
+        ends.append(ends[-1] + 1 + len(token))
+
+    # costs[i] is the least cost of laying out tokens[i:], with the line starting at token i ending before breaks[i]
+    costs = [0] * (count + 1)
+    breaks = [count] * (count + 1)
+    for start in range(count - 1, -1, -1):
+        lead = len(tokens[start]) - len(tokens[start].lstrip(' ')) if start else 0
+        base = (firstIndent if start == 0 else indent) - 1 - ends[start] - lead
+        best = None
+        for end in range(start + 1, count + 1):
+            slack = width - base - ends[end]
+            if slack < 0 and end > start + 1:
+                break
+            cost = costs[end] if end == count else costs[end] + (slack * slack if slack > 0 else 0)
+            if best is None or cost < best:
+                best = cost
+                breaks[start] = end
+        costs[start] = best
+
+    lines = []
+    start = 0
+    while start < count:
+        end = breaks[start]
+        line = tokens[start:end]
+        if start:
+            line[0] = line[0].lstrip(' ')
+        lines.append(line)
+        start = end
+    return lines
+
+
+def wrapParagraph(paragraph, wrapLength, indentSpaces, indentSpacesSamePara, optimal=False):
+    """
+    Return the lines of a paragraph wrapped to fit within `wrapLength`, along with whether it is a tag which fits on a
+    single line (eg: a short `@return`)
+    """
+    firstPrefix = ' *' + indentSpaces
+    prefix = ' *' + indentSpacesSamePara
+    breakLines = breakOptimal if optimal else breakGreedy
+    # lines are kept shorter than `wrapLength - 1`
+    lines = breakLines(paragraph.words, paragraph.tagged, len(firstPrefix), len(prefix), wrapLength - 2)
+    wrapped = [(firstPrefix if index == 0 else prefix) + ' '.join(words) for index, words in enumerate(lines)]
+    return [line.rstrip() for line in wrapped], paragraph.tagged and len(lines) == 1
+
+
+def wrapText(text, wrapLength, indentSpaces, indentSpacesSamePara, spacerBetweenSections=False,
+             spacerBetweenDescriptionAndTags=False, optimal=False):
+    """
+    Wrap the lines of a DocBlock (between its opening and closing lines) to fit within `wrapLength`. Paragraphs are
+    separated by an empty line, except for tags which follow each other, unless a spacer is wanted between them.
+    """
+    paragraphs = splitParagraphs(text.split('\n'))
+    if not paragraphs:
+        return ' *'
+
+    out = []
+    for index, paragraph in enumerate(paragraphs):
+        lines, lineTagged = wrapParagraph(paragraph, wrapLength, indentSpaces, indentSpacesSamePara, optimal)
+        out.extend(lines)
+
+        if index == len(paragraphs) - 1:
+            continue
+        nextIsTagged = paragraphs[index + 1].tagged
+        nextIsSameTag = nextIsTagged and paragraph.tag == paragraphs[index + 1].tag
+        if not ((lineTagged or nextIsTagged) and
+                not (spacerBetweenSections and not nextIsSameTag) and
+                not (not lineTagged and nextIsTagged and spacerBetweenDescriptionAndTags)):
+            out.append(' *')
+    return '\n'.join(out)
+
+
+class JsdocsWrapper(object):
+    """
+    Wraps the text of DocBlocks, following the settings for the line length and indentation
+    """
+    def __init__(self, settings):
+        rulers = settings.get('rulers')
+        numIndentSpaces = max(0, settings.get("jsdocs_indentation_spaces", 1))
+
+        self.tabSize = settings.get('tab_size', 4)
+        self.wrapLength = rulers[0] if rulers else 80
+        self.indentSpaces = " " * numIndentSpaces
+        self.indentSpacesSamePara = " " * max(0, settings.get("jsdocs_indentation_spaces_same_para", numIndentSpaces))
+        self.spacerBetweenSections = settings.get("jsdocs_spacer_between_sections") == True
+        self.spacerBetweenDescriptionAndTags = settings.get("jsdocs_spacer_between_sections") == "after_description"
+        self.optimal = settings.get("jsdocs_wrap_optimal")
+
+    def lineLength(self, text):
+        """
+        The length to wrap the lines of a DocBlock's text to, allowing for the indentation of its first line
+        """
+        indentation = len(re.search(r'\n(\s*\*)', text).group(1).replace('\t', ' ' * self.tabSize))
+        return self.wrapLength - (indentation - self.tabSize)
+
+    def wrapDescription(self, text):
+        """
+        Wrap the text of a DocBlock, starting from the line break before its first line, and return it without the
+        indentation in front of the asterisks
+        """
+        return '\n' + wrapText(
+            text, self.lineLength(text), self.indentSpaces, self.indentSpacesSamePara,
+            self.spacerBetweenSections, self.spacerBetweenDescriptionAndTags, self.optimal
+        )
+
+    def wrapParagraphAt(self, text, row):
+        """
+        Wrap just the paragraph on a row of the text of a DocBlock (counting from the line break before its first line
+        as row 0). Returns the (start, end) offsets of the text to replace, and the text to replace it with, or None if
+        there isn't a paragraph on that row.
+        """
+        lines = text.split('\n')
+        for paragraph in splitParagraphs(lines):
+            if paragraph.start <= row < paragraph.end:
+                wrapped, unused = wrapParagraph(
+                    paragraph, self.lineLength(text), self.indentSpaces, self.indentSpacesSamePara, self.optimal
+                )
+                # from the line break before the paragraph to the end of its last line
+                start = len('\n'.join(lines[:paragraph.start]))
+                end = len('\n'.join(lines[:paragraph.end]))
+                return start, end, '\n' + '\n'.join(wrapped)
+        return None
+
+    def wrapBlock(self, block, indentation=''):
+        """
+        Wrap a whole DocBlock, from its opening `/**` to its closing `*/`, with each line after the first indented by
+        `indentation`. Returns None if the block has nothing to wrap.
+        """
+        start = re.search(r'\n\s*\* ', block)
+        end = re.search(r'\s*\n\s*\*(/)', block)
+        if not start or not end or end.start() <= start.start():
+            return None
+        wrapped = self.wrapDescription(block[start.start():end.start()]).replace('\n', '\n' + indentation)
+        return block[:start.start()] + wrapped + block[end.start():]
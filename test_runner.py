@@ -2,6 +2,17 @@ import sublime
 import sublime_plugin
 import unittest
 
+try:
+    from .jsdocs_core.parsers import JsdocsSettings, JsdocsJavascript, JsdocsRust, parseCache
+    from .jsdocs_core.files import documentText
+    from .jsdocs_core.instrumentation import recorder
+    from .jsdocs import getCommentBlocks
+except (ImportError, SystemError, ValueError):
+    from jsdocs_core.parsers import JsdocsSettings, JsdocsJavascript, JsdocsRust, parseCache
+    from jsdocs_core.files import documentText
+    from jsdocs_core.instrumentation import recorder
+    from jsdocs import getCommentBlocks
+
 class __docblockr_test_replace_cursor_position(sublime_plugin.TextCommand):
     def run(self, edit):
         cursor_placeholder = self.view.find('\|', 0)
@@ -112,6 +123,18 @@ class TestJavaScript(ViewTestCase):
             'function foo (bar, baz) {'
         ])
 
+    def test_arrow_function_with_brackets_in_its_parameters_is_read_from_the_start(self):
+        self.set_view_content([
+            '/**|',
+            '(a = foo()) => {',
+            '    return xs.map((x) => x * 2);',
+            '}'
+        ])
+        self.run_doc_blockr()
+        content = self.get_view_content()
+        self.assertIn(' * @param  {[type]}', content)
+        self.assertNotIn('{Function}', content)
+
     def test_parameters_are_added_to_function_template_with_description_disabled(self):
         self.set_view_content('/**|\nfunction foo (bar, baz) {')
         self.view.settings().set('jsdocs_function_description', False)
@@ -177,6 +200,407 @@ class TestJavaScript(ViewTestCase):
             '             ) {'
         ])
 
+    def test_commas_in_nested_default_values_do_not_split_params(self):
+        self.set_view_content('/**|\nfunction foo(a = {b: {c: 1, d: 2}, e: 3}, f) {')
+        self.run_doc_blockr()
+        self.assertDocBlockrResult([
+            '/**',
+            ' * |SELECTION_BEGIN|[foo description]|SELECTION_END|',
+            ' * @param  {Object} a [description]',
+            ' * @param  {[type]} f [description]',
+            ' * @return {[type]}   [description]',
+            ' */',
+            'function foo(a = {b: {c: 1, d: 2}, e: 3}, f) {'
+        ])
+
+    def test_brackets_in_strings_and_comments_do_not_run_the_definition_on(self):
+        self.set_view_content([
+            '/**|',
+            'function foo(a = "(", // b (',
+            '             b) {',
+            '  return bar(a);',
+            '}'
+        ])
+        self.run_doc_blockr()
+        self.assertDocBlockrResult([
+            '/**',
+            ' * |SELECTION_BEGIN|[foo description]|SELECTION_END|',
+            ' * @param  {String} a [description]',
+            ' * @param  {[type]} b [description]',
+            ' * @return {[type]}   [description]',
+            ' */',
+            'function foo(a = "(", // b (',
+            '             b) {',
+            '  return bar(a);',
+            '}'
+        ])
+
+    def test_definitions_too_long_to_parse_get_a_plain_doc_block(self):
+        line = 'function foo(' + ', '.join(['a'] * 3000) + ') {'
+        self.set_view_content(['/**|', line])
+        self.run_doc_blockr()
+        self.assertDocBlockrResult(['/**', ' * ', ' */', line])
+
+    def test_development_mode_records_the_stages_of_each_run(self):
+        self.view.settings().set('jsdocs_development_mode', True)
+        self.set_view_content('/**|\nfunction foo (bar) {')
+        self.run_doc_blockr()
+        invocation = recorder.invocations[-1]
+        self.assertEqual(invocation.name, 'jsdocs')
+        self.assertEqual([name for name, ms in invocation.stages], ['getDefinition', 'parse', 'generateSnippet', 'insert'])
+        self.assertIn('function foo (bar) {', recorder.report())
+
+    def test_wrap_lines_can_reformat_only_the_paragraph_under_the_cursor(self):
+        self.view.settings().set('rulers', [40])
+        self.view.settings().set('tab_size', 4)
+        self.set_view_content([
+            '/**',
+            ' * One two three four five six seven eight nine ten|',
+            ' *',
+            ' * Untouched line which is much longer than the forty columns of the ruler',
+            ' */'
+        ])
+        self.view.run_command('jsdocs_wrap_lines', {'paragraph': True})
+        self.assertDocBlockrResult([
+            '/**',
+            ' * One two three four five six seven',
+            ' * eight nine ten',
+            ' *',
+            ' * Untouched line which is much longer than the forty columns of the ruler',
+            ' */'
+        ])
+
+    def test_wrap_file_reformats_every_doc_block(self):
+        self.view.settings().set('rulers', [40])
+        self.view.settings().set('tab_size', 4)
+        block = [
+            '    /**',
+            '     * One two three four five six seven eight nine ten',
+            '     */',
+            '    /* one two three four five six seven eight nine ten */'
+        ]
+        self.set_view_content(block + block)
+        self.view.run_command('jsdocs_wrap_file')
+        block = [
+            '    /**',
+            '     * One two three four five six seven',
+            '     * eight nine ten',
+            '     */',
+            '    /* one two three four five six seven eight nine ten */'
+        ]
+        self.assertDocBlockrResult(block + block)
+
+    def test_reparse_file_keeps_the_text_between_doc_blocks(self):
+        content = [
+            '/**',
+            ' * @param {[type]} $a [description]',
+            ' */',
+            'function foo($a) { return "\\\\n"; }',
+            '/**',
+            ' * @return {[type]} [description]',
+            ' */'
+        ]
+        self.set_view_content(content)
+        self.view.run_command('jsdocs_reparse_file')
+        self.assertDocBlockrResult(content)
+
+    def test_optimal_wrapping_evens_out_the_lines(self):
+        self.view.settings().set('rulers', [20])
+        self.view.settings().set('tab_size', 4)
+        self.view.settings().set('jsdocs_wrap_optimal', True)
+        self.set_view_content([
+            '/**',
+            ' * aaa bbb ccc ddd eee fff ggg hhh iii jjj kkkkkkkkkkkk|',
+            ' */'
+        ])
+        self.view.run_command('jsdocs_wrap_lines')
+        # filling each line greedily would give "aaa bbb ccc ddd", "eee fff ggg hhh" and "iii jjj"
+        self.assertDocBlockrResult([
+            '/**',
+            ' * aaa bbb ccc',
+            ' * ddd eee fff',
+            ' * ggg hhh iii jjj',
+            ' * kkkkkkkkkkkk',
+            ' */'
+        ])
+
+    def test_optimal_wrapping_keeps_the_aligned_columns_of_a_tag(self):
+        self.view.settings().set('rulers', [36])
+        self.view.settings().set('tab_size', 4)
+        self.view.settings().set('jsdocs_wrap_optimal', True)
+        self.set_view_content([
+            '/**',
+            ' * @param  {String} a    aaa bbb ccc ddd eee fff ggg hhh iii jjj kkkkkkkkkkkk|',
+            ' * @param  {Number} name',
+            ' */'
+        ])
+        self.view.run_command('jsdocs_wrap_lines')
+        self.assertDocBlockrResult([
+            '/**',
+            ' * @param  {String} a    aaa bbb',
+            ' * ccc ddd eee fff ggg hhh iii jjj',
+            ' * kkkkkkkkkkkk',
+            ' * @param  {Number} name',
+            ' */'
+        ])
+
+    def test_reparse_file_reactivates_the_next_doc_block_after_the_cursor(self):
+        self.set_view_content([
+            '/**',
+            ' * @param {[type]} a [description]',
+            ' */',
+            'function foo(a) {}|',
+            '/**',
+            ' * @return {[type]} [description]',
+            ' */'
+        ])
+        self.view.run_command('jsdocs_reparse_file')
+        self.assertEqual(self.view.rowcol(self.view.sel()[0].begin()), (5, 12))
+        self.assertEqual(self.view.substr(self.view.sel()[0]), '[type]')
+
+    def test_reparse_file_keeps_the_indentation_of_each_doc_block(self):
+        content = [
+            'class Foo {',
+            '    /**',
+            '     * @param {[type]} a [description]',
+            '     */',
+            '    bar(a) {}',
+            '}'
+        ]
+        self.set_view_content(content)
+        self.view.run_command('jsdocs_reparse_file')
+        self.assertDocBlockrResult(content)
+
+    def test_tab_lines_up_with_the_description_of_the_tag_above(self):
+        self.set_view_content('/**\n * @param {String} foo Bar\n * |')
+        self.view.run_command('jsdocs_indent')
+        self.assertDocBlockrResult('/**\n * @param {String} foo Bar\n *' + ' ' * 20)
+
+    def test_documenting_the_same_definition_again_uses_the_parse_cache(self):
+        self.set_view_content('/**|\nfunction foo (bar) {')
+        self.run_doc_blockr()
+        first = self.get_view_content()
+        self.view.run_command('undo')
+        hits = parseCache.hits
+        self.run_doc_blockr()
+        self.assertEqual(parseCache.hits, hits + 1)
+        self.assertEqual(self.get_view_content(), first)
+
+    def test_text_after_the_cursor_is_only_the_description_of_its_own_block(self):
+        self.set_view_content('/**|Adds two numbers\nfunction add (a, b) {')
+        self.run_doc_blockr()
+        self.assertIn(' * Adds two numbers', self.get_view_content())
+        self.set_view_content('/**|\nfunction add (a, b) {')
+        self.run_doc_blockr()
+        self.assertIn(' * [add description]', self.get_view_content())
+
+    def test_settings_changes_are_picked_up_between_runs(self):
+        self.set_view_content('/**|\nfunction foo (bar) {')
+        self.run_doc_blockr()
+        self.view.run_command('undo')
+        self.view.settings().set('jsdocs_return_tag', '@returns')
+        self.run_doc_blockr()
+        self.assertDocBlockrResult([
+            '/**',
+            ' * |SELECTION_BEGIN|[foo description]|SELECTION_END|',
+            ' * @param   {[type]} bar [description]',
+            ' * @returns {[type]}     [description]',
+            ' */',
+            'function foo (bar) {'
+        ])
+
+    def test_notation_map_prefix_and_regex_rules(self):
+        self.view.settings().set('jsdocs_notation_map', [
+            {'prefix': 'b', 'type': 'bool'},
+            {'regex': 'tbl_?[Rr]ow', 'type': 'TableRow'},
+            {'prefix': '_', 'tags': ['@private']}
+        ])
+        self.set_view_content('/**|\nfunction _foo(bSet, tblRow, bar) {')
+        self.run_doc_blockr()
+        self.assertDocBlockrResult([
+            '/**',
+            ' * |SELECTION_BEGIN|[_foo description]|SELECTION_END|',
+            ' * @param   {Boolean}  bSet   [description]',
+            ' * @param   {TableRow} tblRow [description]',
+            ' * @param   {[type]}   bar    [description]',
+            ' * @return  {[type]}          [description]',
+            ' * @private',
+            ' */',
+            'function _foo(bSet, tblRow, bar) {'
+        ])
+
+    def test_types_containing_spaces_are_aligned_as_one_column(self):
+        self.view.settings().set('jsdocs_notation_map', [{'prefix': 'map', 'type': 'Map<string, number>'}])
+        self.set_view_content('/**|\nfunction foo(mapCounts, b) {')
+        self.run_doc_blockr()
+        self.assertDocBlockrResult([
+            '/**',
+            ' * |SELECTION_BEGIN|[foo description]|SELECTION_END|',
+            ' * @param  {Map<string, number>} mapCounts [description]',
+            ' * @param  {[type]}              b         [description]',
+            ' * @return {[type]}                        [description]',
+            ' */',
+            'function foo(mapCounts, b) {'
+        ])
+
+    def test_every_cursor_gets_a_doc_block(self):
+        self.set_view_content([
+            '/**|',
+            'function foo(bar) {}',
+            '/**',
+            'function baz(a, b) {}'
+        ])
+        self.view.sel().add(self.view.text_point(2, 3))
+        self.run_doc_blockr()
+        self.assertDocBlockrResult([
+            '/**',
+            ' * |SELECTION_BEGIN|[foo description]|SELECTION_END|',
+            ' * @param  {[type]} bar [description]',
+            ' * @return {[type]}     [description]',
+            ' */',
+            'function foo(bar) {}',
+            '/**',
+            ' * |SELECTION_BEGIN|[baz description]|SELECTION_END|',
+            ' * @param  {[type]} a [description]',
+            ' * @param  {[type]} b [description]',
+            ' * @return {[type]}   [description]',
+            ' */',
+            'function baz(a, b) {}'
+        ])
+
+    def test_every_cursor_gets_a_doc_block_indented_to_match_it(self):
+        self.set_view_content([
+            'class Foo {',
+            '    /**|',
+            '    bar(a) {}',
+            '    /**',
+            '    baz(b, c) {}',
+            '}'
+        ])
+        self.view.sel().add(self.view.text_point(3, 7))
+        self.run_doc_blockr()
+        self.assertDocBlockrResult([
+            'class Foo {',
+            '    /**',
+            '     * |SELECTION_BEGIN|[bar description]|SELECTION_END|',
+            '     * @param  {[type]} a [description]',
+            '     * @return {[type]}   [description]',
+            '     */',
+            '    bar(a) {}',
+            '    /**',
+            '     * |SELECTION_BEGIN|[baz description]|SELECTION_END|',
+            '     * @param  {[type]} b [description]',
+            '     * @param  {[type]} c [description]',
+            '     * @return {[type]}   [description]',
+            '     */',
+            '    baz(b, c) {}',
+            '}'
+        ])
+
+    def test_document_file_adds_blocks_to_undocumented_functions(self):
+        self.set_view_content([
+            '/**',
+            ' * Documented',
+            ' */',
+            'function foo(a) {',
+            '    if (a) {',
+            '        return bar(a);',
+            '    }',
+            '}',
+            '',
+            'function baz(b) {}'
+        ])
+        self.view.run_command('jsdocs_document_file')
+        self.assertDocBlockrResult([
+            '/**',
+            ' * Documented',
+            ' */',
+            'function foo(a) {',
+            '    if (a) {',
+            '        return bar(a);',
+            '    }',
+            '}',
+            '',
+            '/**',
+            ' * [baz description]',
+            ' * @param  {[type]} b [description]',
+            ' * @return {[type]}   [description]',
+            ' */',
+            'function baz(b) {}'
+        ])
+
+    def test_next_undocumented_moves_to_functions_without_a_doc_block(self):
+        self.set_view_content([
+            'function foo(a) {}',
+            '/**',
+            ' * Documented',
+            ' */',
+            'function bar(b) {}',
+            '  function baz(c) {}|'
+        ])
+        self.view.run_command('jsdocs_next_undocumented')
+        self.assertEqual(self.view.sel()[0].begin(), 0)
+        self.view.run_command('jsdocs_next_undocumented')
+        self.assertEqual(self.view.rowcol(self.view.sel()[0].begin()), (5, 2))
+        self.view.run_command('jsdocs_next_undocumented', {'backwards': True})
+        self.assertEqual(self.view.sel()[0].begin(), 0)
+
+    def test_document_text_works_without_a_view(self):
+        text, missing, found = documentText('\n'.join([
+            '/* function notCode(a) {} */',
+            'var s = "/* not a comment";',
+            'function baz(b) {}'
+        ]), JsdocsJavascript, JsdocsSettings(self.view.settings()))
+        self.assertEqual(found, 1)
+        self.assertEqual(missing, [(3, 'baz')])
+        self.assertEqual(text.split('\n')[2:], [
+            '/**',
+            ' * [baz description]',
+            ' * @param  {[type]} b [description]',
+            ' * @return {[type]}   [description]',
+            ' */',
+            'function baz(b) {}'
+        ])
+
+    def test_a_plain_block_comment_does_not_document_a_function(self):
+        text, missing, found = documentText('\n'.join([
+            '/* eslint-disable-next-line */',
+            'function foo(a) {}',
+            '/**',
+            ' * Documented',
+            ' */',
+            'function bar(b) {}'
+        ]), JsdocsJavascript, JsdocsSettings(self.view.settings()), generate=False)
+        self.assertEqual(found, 2)
+        self.assertEqual(missing, [(2, 'foo')])
+
+    def test_comment_blocks_are_found_again_when_the_syntax_changes(self):
+        self.set_view_content('/* a */')
+        self.assertEqual(getCommentBlocks(self.view)[1], [(0, 7)])
+        self.view.set_syntax_file('Packages/Text/Plain text.tmLanguage')
+        self.assertEqual(getCommentBlocks(self.view)[1], [])
+
+    def test_a_long_definition_gets_a_placeholder_which_the_background_parse_replaces(self):
+        definition = 'function foo(%s) {' % ', '.join('argument%d' % i for i in range(200))
+        self.set_view_content(['/**|', definition])
+        queued = []
+        setTimeoutAsync = sublime.set_timeout_async
+        setTimeout = sublime.set_timeout
+        sublime.set_timeout_async = lambda callback, delay=0: queued.append(callback)
+        try:
+            self.run_doc_blockr()
+            self.assertDocBlockrResult(['/**', ' * ', ' */', definition])
+            self.assertEqual(len(queued), 1)
+
+            sublime.set_timeout = lambda callback, delay=0: callback()
+            queued[0]()
+        finally:
+            sublime.set_timeout_async = setTimeoutAsync
+            sublime.set_timeout = setTimeout
+        content = self.get_view_content()
+        self.assertIn(' * @param  {[type]} argument199 [description]', content)
+        self.assertTrue(content.endswith(' */\n' + definition))
+
     def test_vars_initialised_to_number_get_placeholders(self):
         self.set_view_content([
             '/**|',
@@ -248,6 +672,23 @@ class TestPHP(ViewTestCase):
         self.run_doc_blockr()
         self.assertDocBlockrResult('<?php\n/**\n * \n */\nbasic')
 
+    def test_changing_the_syntax_changes_the_parser(self):
+        self.set_view_content("<?php\n/**|\nfunction foo($a) {")
+        self.view.set_syntax_file('Packages/JavaScript/JavaScript.tmLanguage')
+        self.run_doc_blockr()
+        self.view.run_command('undo')
+        self.view.set_syntax_file(self.get_syntax_file())
+        self.run_doc_blockr()
+        self.assertDocBlockrResult([
+            "<?php",
+            "/**",
+            " * |SELECTION_BEGIN|[foo description]|SELECTION_END|",
+            " * @param  [type] $a [description]",
+            " * @return [type]    [description]",
+            " */",
+            "function foo($a) {"
+        ])
+
     def test_issue_292_php_args_pass_by_reference_missing_ampersand_char(self):
         self.set_view_content("<?php\n/**|\nfunction function_name($a1,  $a2 = 'x', array $a3, &$b1, &$b2 = 'x', array &$b3) {}")
         self.run_doc_blockr()
@@ -414,6 +855,21 @@ class TestPHP(ViewTestCase):
             "function fname($a) {}"
         ])
 
+class TestRust(ViewTestCase):
+
+    def get_syntax_file(self):
+        return 'Packages/Rust/Rust.tmLanguage'
+
+    def test_document_text_finds_functions(self):
+        text, missing, found = documentText('\n'.join([
+            'pub fn foo(a: i32) -> i32 {',
+            '    a',
+            '}'
+        ]), JsdocsRust, JsdocsSettings(self.view.settings()))
+        self.assertEqual(found, 1)
+        self.assertEqual(missing, [(1, 'foo')])
+
+
 class RunDocBlockrTests(sublime_plugin.WindowCommand):
 
     def run(self):
@@ -431,6 +887,7 @@ class RunDocBlockrTests(sublime_plugin.WindowCommand):
 
         suite.addTests(test_loader.loadTestsFromTestCase(TestJavaScript))
         suite.addTests(test_loader.loadTestsFromTestCase(TestPHP))
+        suite.addTests(test_loader.loadTestsFromTestCase(TestRust))
 
         # TODO toggle test verbosity
         unittest.TextTestRunner(verbosity=1).run(suite)